@@ -1,51 +1,168 @@
-import argparse
-import json
-import readline
 import sys
-from traceback import print_exc
 
-from rich.console import Console
+if __name__ == "__main__":
+    # A running daemon answers before any of the imports below are paid for
+    from src.daemon_client import forward
+
+    forwarded_exit_code = forward(sys.argv[1:])
+    if forwarded_exit_code is not None:
+        sys.exit(forwarded_exit_code)
+
+import json
+import os
+import threading
+import time
+from traceback import print_exc
 
-from src.chat_commands import ChatCommands  # Import the new ChatAutocomplete class
+from src.base_llm_backend import close_stream
 from src.chat_session import ChatSession
+from src.cli_args import parse_args
+from src.cli_output import print_models, report_list_errors
 from src.config import ConfigLoader
+from src.console import console
+from src.constants import (BENCH_REQUESTS, DAEMON_START_TIMEOUT, HEDGE_DELAY, RESPONSE_CACHE_MAX_SIZE,
+                           RESPONSE_CACHE_TTL, SERVE_HOST, SERVE_PORT)
+from src.context_cache import OllamaContextCache
+from src.model_catalog import ModelCatalog, fetch_models
 from src.prompt_preprocessor import PromptPreprocessor
 from src.provider_factory import ProviderFactory
-from src.token_output import TokenOutput  # Import TokenOutput from the new file
+from src.session_store import SessionStore
+from src.token_output import TokenOutput
+
 
-console = Console()
+def resolve_generation_backend(config, provider_factory, args):
+    provider_name, model_name = provider_factory.parse_model_name(args.model_name)
+    # Hedged backends get sessions of their own, so the request that loses the race can be interrupted
+    backend = provider_factory.resolve_backend(provider_name, model_name, debug=args.debug,
+                                               show_reasoning=not args.no_show_reasoning,
+                                               cancellable=bool(args.hedge))
+    if args.hedge:
+        from src.hedged_backend import HedgedBackend
+
+        hedge_provider, hedge_model = provider_factory.parse_model_name(args.hedge)
+        secondary = provider_factory.resolve_backend(hedge_provider, hedge_model, debug=args.debug,
+                                                     show_reasoning=not args.no_show_reasoning, cancellable=True)
+        delay = args.hedge_delay
+        if delay is None:
+            delay = (config.get("hedge") or {}).get("delay", HEDGE_DELAY)
+        backend = HedgedBackend(backend, secondary, f"{provider_name}/{model_name}",
+                                f"{hedge_provider}/{hedge_model}", delay=delay, debug=args.debug)
+    return provider_name, model_name, backend
 
 
 def command_generate(config, args):
     provider_factory = ProviderFactory(config)
-    provider_name, model_name = provider_factory.parse_model_name(args.model_name)
-    backend = provider_factory.resolve_backend(provider_name, model_name, debug=args.debug,
-                                               show_reasoning=not args.no_show_reasoning)
+    provider_name, model_name, backend = resolve_generation_backend(config, provider_factory, args)
 
     # If prompt is not provided, read from standard input
     if not args.prompt:
         args.prompt = sys.stdin.read().strip()
 
+    context_cache = None
+    if args.continue_context:
+        if args.hedge:
+            raise ValueError("--continue cannot be combined with --hedge.")
+        if provider_factory.provider_type(provider_name) != "ollama":
+            raise ValueError("--continue is only supported by Ollama providers.")
+        context_cache = OllamaContextCache()
+        backend.context = context_cache.load(backend.base_url, backend.model_name, args.context_name)
+        if args.debug:
+            console.print(f"DEBUG: Context '{args.context_name}': "
+                          f"{len(backend.context) if backend.context else 'no'} saved tokens", style="bold")
+
+    if context_cache and response_cache_enabled(config, args):
+        raise ValueError("--continue cannot be combined with the response cache.")
+    stats_backend = None
+    if args.stats or args.stats_json:
+        from src.generation_stats import StatsBackend
+
+        # Inside the response cache, so only real generations are measured
+        backend = stats_backend = StatsBackend(backend, f"{provider_name}/{model_name}")
+    backend = with_response_cache(config, args, backend, provider_name, model_name)
+
     # Pre-process the prompt
     preprocessor = PromptPreprocessor()
     processed_prompt = preprocessor.process_prompt(args.prompt)
 
     tokens = backend.generate(processed_prompt, stream=True)
     token_output = TokenOutput(show_reasoning=not args.no_show_reasoning, debug=args.debug, plain=args.plain)
-    token_output.output_tokens(tokens)
+    try:
+        token_output.output_tokens(tokens)
+    finally:
+        # On Ctrl-C, stops the upstream generation before the process exits
+        close_stream(tokens)
+
+    if context_cache and backend.last_context:
+        context_cache.save(backend.base_url, backend.model_name, args.context_name, backend.last_context)
+    if stats_backend is not None:
+        report_generation_stats(stats_backend.last, args)
     return 0
 
 
+def report_generation_stats(stats, args):
+    if args.stats_json and stats:
+        with open(args.stats_json, "w") as f:
+            f.write(stats.to_json() + "\n")
+    if not args.stats:
+        return
+    text = stats.format() if stats else "No generation statistics (response served from the cache)."
+    if args.plain:
+        # Standard error keeps the generated text on standard output clean
+        print(text, file=sys.stderr)
+    else:
+        console.print(text, style="bold", markup=False)
+
+
+def response_cache_enabled(config, args) -> bool:
+    if args.cache is not None:
+        return args.cache
+    return bool((config.get("response_cache") or {}).get("enabled"))
+
+
+def with_response_cache(config, args, backend, provider_name: str, model_name: str):
+    if not response_cache_enabled(config, args):
+        return backend
+
+    from src.response_cache import CachedBackend, ResponseCache
+
+    cache_cfg = config.get("response_cache") or {}
+    max_size = int(cache_cfg.get("max_size_mb", RESPONSE_CACHE_MAX_SIZE / 1024 / 1024) * 1024 * 1024)
+    cache = ResponseCache(max_size=max_size, ttl=cache_cfg.get("ttl", RESPONSE_CACHE_TTL))
+    return CachedBackend(backend, cache, provider_name, model_name,
+                         params={"show_reasoning": not args.no_show_reasoning}, debug=args.debug)
+
+
+def start_warm_up(backend, load: bool, debug: bool):
+    # Loads the model in the background while the user types the first prompt
+    def warm_up():
+        try:
+            backend.warm_up(load=load)
+        except Exception as e:
+            if debug:
+                console.print(f"DEBUG: Warm-up failed: {e}", style="bold")
+
+    threading.Thread(target=warm_up, daemon=True).start()
+
+
 def command_chat(config, args):
+    import readline
+
+    from src.chat_commands import ChatCommands
+    from src.generation_stats import StatsBackend
+
     show_reasoning = not args.no_show_reasoning
     provider_factory = ProviderFactory(config)
-    provider_name, model_name = provider_factory.parse_model_name(args.model_name)
-    backend = provider_factory.resolve_backend(provider_name, model_name, debug=args.debug,
-                                               show_reasoning=show_reasoning)
-    chat_session = ChatSession(backend)
+    provider_name, model_name, backend = resolve_generation_backend(config, provider_factory, args)
+    start_warm_up(backend, load=not args.no_warm_up, debug=args.debug)
+    backend = stats_backend = StatsBackend(backend, f"{provider_name}/{model_name}")
+    backend = with_response_cache(config, args, backend, provider_name, model_name)
+    chat_session = create_chat_session(config, args, provider_factory, backend, provider_name, model_name)
     preprocessor = PromptPreprocessor()
+    session_store = SessionStore()
+    if args.session:
+        chat_session.log = open_session_log(session_store, args.session, chat_session, provider_name, model_name)
     chat_commands = ChatCommands(chat_session=chat_session, plain=args.plain, show_reasoning=show_reasoning,
-                                 debug=args.debug)
+                                 debug=args.debug, session_store=session_store, stats_backend=stats_backend)
 
     console.print("Interactive chat started. Type 'exit' to exit or '/help' for available commands.",
                   style="bold green")
@@ -78,8 +195,9 @@ def command_chat(config, args):
             chat_commands.add_command_to_history(user_input)
 
             # Pre-process the user input
-            processed_input = preprocessor.process_prompt(user_input)
+            processed_input = preprocessor.process_prompt(user_input, attachments=chat_session.attachments)
 
+            response = None
             try:
                 response = chat_session.ask(processed_input, stream=True)
 
@@ -88,82 +206,297 @@ def command_chat(config, args):
                                            plain=chat_commands.plain)
                 token_output.output_tokens(response)
             except KeyboardInterrupt:
+                # Closing the stream now stops the upstream generation, and keeps the partial answer in the
+                # history before the next prompt
+                if response is not None:
+                    close_stream(response)
                 console.print("\nKeyboard interrupt detected", style="bold red")
 
     except (EOFError, KeyboardInterrupt):
         console.print("")
+    finally:
+        if chat_session.log:
+            chat_session.log.close()
 
     return 0
 
 
+def open_session_log(session_store, name: str, chat_session: ChatSession, provider_name: str, model_name: str):
+    log = session_store.open(name, f"{provider_name}/{model_name}")
+    restored = log.replay(chat_session)
+    if restored:
+        console.print(f"Session '{name}' resumed with {restored} messages.", style="bold green")
+    return log
+
+
+def create_chat_session(config, args, provider_factory, backend, provider_name: str, model_name: str) -> ChatSession:
+    chat_cfg = config.get("chat") or {}
+    model_cfg = (chat_cfg.get("models") or {}).get(f"{provider_name}/{model_name}") or {}
+    token_budget = args.token_budget or model_cfg.get("token_budget") or chat_cfg.get("token_budget")
+    summary_model = args.summary_model or model_cfg.get("summary_model") or chat_cfg.get("summary_model")
+
+    summarizer = None
+    if token_budget and summary_model:
+        from src.history_summarizer import HistorySummarizer
+
+        summary_provider, summary_model_name = provider_factory.parse_model_name(summary_model)
+        summarizer = HistorySummarizer(provider_factory.resolve_backend(summary_provider, summary_model_name,
+                                                                        debug=False, show_reasoning=False))
+    return ChatSession(backend, token_budget=token_budget, summarizer=summarizer, debug=args.debug)
+
+
 def command_list_models(config, args):
     provider_factory = ProviderFactory(config)
+
+    if args.refresh_catalog is not None:
+        catalog = ModelCatalog()
+        try:
+            providers = args.refresh_catalog or provider_factory.all_providers()
+            models_by_provider, _ = fetch_models(provider_factory, providers, args.timeout, debug=args.debug)
+            catalog.update(models_by_provider)
+        finally:
+            catalog.finish_refresh()
+        return 0
+
+    models, errors = collect_models(provider_factory, args)
+    report_list_errors(errors, args)
+    print_models(models, args)
+    return 1 if errors else 0
+
+
+def collect_models(provider_factory, args):
+    """
+    Lists the models of the requested providers.
+
+    Returns:
+        Tuple of the [provider/]model names and the error per provider that could not be listed.
+    """
     providers = provider_factory.all_providers() if args.provider_name == "all" else [args.provider_name]
+    catalog = ModelCatalog()
+    errors = {}
+
+    if args.cached:
+        # Serve from the catalog; missing providers are fetched now, stale ones refreshed in the background
+        missing = [provider for provider in providers if catalog.models(provider) is None]
+        stale = [provider for provider in providers if provider not in missing and catalog.is_stale(provider)]
+        if missing:
+            models_by_provider, errors = fetch_models(provider_factory, missing, args.timeout, debug=args.debug)
+            catalog.update(models_by_provider)
+        if stale and catalog.claim_refresh():
+            start_catalog_refresh(catalog, stale)
+    else:
+        models_by_provider, errors = fetch_models(provider_factory, providers, args.timeout, debug=args.debug)
+        catalog.update(models_by_provider)
 
     models = []
     for provider in providers:
-        backend = provider_factory.resolve_backend(provider_name=provider, debug=args.debug)
-        models.extend([f"{provider}/{model}" for model in backend.list_models()])
+        models.extend([f"{provider}/{model}" for model in catalog.models(provider) or []])
+    return models, errors
 
-    if args.plain:
-        for model in models:
-            print(model)
+
+def start_catalog_refresh(catalog: ModelCatalog, providers):
+    import subprocess
+
+    # One child for all stale providers; it clears the refresh marker when done
+    try:
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), "list-models", "--refresh-catalog", *providers],
+                         stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                         start_new_session=True)
+    except OSError:
+        catalog.finish_refresh()
+
+
+def command_batch(config, args):
+    import asyncio
+
+    from src.batch_runner import BatchRunner, read_batch_items, read_completed_results
+
+    if args.input == "-":
+        items = read_batch_items(sys.stdin, args.model_name)
     else:
-        console.print("Available models:", style="bold green")
-        for model in models:
-            console.print(f"- {model}")
+        with open(args.input) as f:
+            items = read_batch_items(f, args.model_name)
+
+    completed = {}
+    if args.resume:
+        if args.output == "-":
+            raise ValueError("--resume needs an output file (-o).")
+        if os.path.exists(args.output):
+            with open(args.output) as f:
+                completed = read_completed_results(f)
+            completed = {index: result for index, result in completed.items() if index < len(items)}
+
+    runner = BatchRunner(ProviderFactory(config), concurrency=args.concurrency,
+                         show_reasoning=not args.no_show_reasoning, debug=args.debug,
+                         preprocessor=PromptPreprocessor())
+    in_order = args.order == "input"
+    if args.debug:
+        console.print(f"DEBUG: {len(items)} items, {len(completed)} already done", style="bold")
+
+    if args.output == "-":
+        errors = asyncio.run(runner.run(items, sys.stdout, in_order=in_order, completed=completed))
+    else:
+        # The runner rewrites the kept results along with the new ones, so failed and cut lines of a resumed
+        # run are dropped; the previous output stays intact until the new one replaces it
+        tmp_path = f"{args.output}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as output:
+            try:
+                errors = asyncio.run(runner.run(items, output, in_order=in_order, completed=completed))
+            finally:
+                output.close()
+                os.replace(tmp_path, args.output)
+
+    if errors:
+        console.print(f"ERROR: {errors} of {len(items) - len(completed)} items failed", style="bold red")
+        return 1
     return 0
 
 
-def command_show_config(config, args):
-    console.print("Configuration:", style="bold green")
-    console.print(json.dumps(config, indent=2), style="bold green")
+def command_bench(config, args):
+    from src.batch_runner import BatchItem, read_batch_items
+    from src.bench_runner import BenchRunner, compare_summaries, format_summary
+
+    if args.prompts:
+        with open(args.prompts) as f:
+            items = read_batch_items(f, args.model_name)
+    else:
+        items = [BatchItem(0, {"prompt": args.prompt or sys.stdin.read().strip()}, args.model_name)]
+    requests = args.requests if args.requests is not None or args.duration else BENCH_REQUESTS
+
+    # Prompts are expanded once, so reading @@ references is not part of the measured time
+    preprocessor = PromptPreprocessor()
+    for item in items:
+        if item.prompt is not None:
+            item.prompt = preprocessor.process_prompt(item.prompt)
+
+    # Every worker needs its own pooled connection, as a client sending that many requests would have
+    http_cfg = config.get("http") or {}
+    config = {**config, "http": {**http_cfg, "pool_size": max(http_cfg.get("pool_size", 0), args.concurrency)}}
+    provider_factory = ProviderFactory(config)
+    provider_name, model_name = provider_factory.parse_model_name(args.model_name)
+    runner = BenchRunner(lambda: provider_factory.resolve_backend(provider_name, model_name, debug=args.debug,
+                                                                  show_reasoning=not args.no_show_reasoning),
+                         f"{provider_name}/{model_name}", concurrency=args.concurrency, rate=args.rate,
+                         debug=args.debug)
+    try:
+        if not args.no_warm_up:
+            runner.warm_up()
+        started = time.time()
+        results = runner.run(items, requests=requests, duration=args.duration)
+    finally:
+        provider_factory.close()
+
+    results = {
+        "model": f"{provider_name}/{model_name}",
+        "config": {"concurrency": args.concurrency, "rate": args.rate, "requests": requests,
+                   "duration": args.duration, "prompts": len(items)},
+        "started": started,
+        **results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+    console.print(f"Benchmark of {results['model']}:", style="bold green")
+    console.print(format_summary(results["summary"]), markup=False)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        console.print(f"Compared with {args.compare} ({baseline.get('model', '?')}):", style="bold green")
+        console.print(compare_summaries(results["summary"], baseline["summary"]), markup=False)
+    return 1 if results["summary"]["errors"] else 0
+
+
+def command_serve(config, args):
+    from aiohttp import web
+
+    from src.gateway_server import GatewayServer
+
+    serve_cfg = config.get("serve") or {}
+    host = args.host or serve_cfg.get("host", SERVE_HOST)
+    port = args.port or serve_cfg.get("port", SERVE_PORT)
+    api_key = serve_cfg.get("api_key")
+    if not api_key and host not in ("127.0.0.1", "localhost", "::1"):
+        console.print(f"WARNING: Listening on {host} without serve.api_key: anyone who can reach it uses your "
+                      f"provider keys.", style="bold red")
+
+    server = GatewayServer(ProviderFactory(config), api_key=api_key, debug=args.debug)
+    console.print(f"Serving the OpenAI-compatible API on http://{host}:{port}/v1 (Ctrl-C to stop)",
+                  style="bold green")
+    web.run_app(server.create_app(), host=host, port=port, print=None, access_log=None)
     return 0
 
 
-def parse_args(input_args):
-    parser = argparse.ArgumentParser(description="Jaguatirica Command Line Interface for LLM Models.")
-    subparsers = parser.add_subparsers(dest='command', help='Subcommands')
+def daemon_generate(config, provider_factory, args, request):
+    provider_name, model_name, backend = resolve_generation_backend(config, provider_factory, args)
+    backend = with_response_cache(config, args, backend, provider_name, model_name)
+
+    # The client sends the prompt read from its standard input, with the @@ references already expanded
+    tokens = backend.generate(request.get("prompt") or args.prompt or "", stream=True)
+    try:
+        for token in tokens:
+            yield {"token": token}
+    finally:
+        close_stream(tokens)
 
-    # Generate command
-    generate_parser = subparsers.add_parser('generate', help='Generate text from a prompt',
-                                            description="Generate text from a prompt using the specified model.")
-    generate_parser.add_argument("-m", "--model_name", required=True,
-                                 help="Name of the model to use. Format: [provider/]model_name.")
-    generate_parser.add_argument("--no-show-reasoning", action="store_true", help="Hide reasoning process.")
-    generate_parser.add_argument("-d", "--debug", action="store_true", help="Enable debug mode.")
-    generate_parser.add_argument("--plain", action="store_true", help="Show output without formatting.")
-    generate_parser.add_argument("prompt", nargs='?',
-                                 help="The text prompt to send to the model. If not provided, read from standard input.")
 
-    # Interactive chat command
-    chat_parser = subparsers.add_parser('chat', help='Interactive chat with the model',
-                                        description="Start an interactive chat session with the specified model.")
-    chat_parser.add_argument("-m", "--model_name", required=True,
-                             help="Name of the model to use. Format: [provider/]model_name.")
-    chat_parser.add_argument("--no-show-reasoning", action="store_true", help="Hide reasoning process.")
-    chat_parser.add_argument("--initial-prompt", type=str, help="Initial prompt to send to the model.")
-    chat_parser.add_argument("-d", "--debug", action="store_true", help="Enable debug mode.")
-    chat_parser.add_argument("--plain", action="store_true", help="Show output without formatting.")
+def daemon_list_models(config, provider_factory, args, request):
+    models, errors = collect_models(provider_factory, args)
+    yield {"models": models, "errors": {provider: str(error) for provider, error in errors.items()}}
 
-    # List models command
-    list_models_parser = subparsers.add_parser('list-models', help='List available models',
-                                               description="List all available models from the specified provider(s).")
-    list_models_parser.add_argument("-p", "--provider_name", default='all',
-                                    help="Name of the provider to use. Supported providers: all, ollama, openrouter, others(via config).")
-    list_models_parser.add_argument("-d", "--debug", action="store_true", help="Enable debug mode.")
-    list_models_parser.add_argument("--plain", action="store_true", help="Show output without formatting.")
 
-    # Show Config command
-    show_config_parser = subparsers.add_parser('show-config', help='Show loaded/detected configuration',
-                                               description="Show loaded/detected configuration.")
+def command_daemon(config_loader: ConfigLoader, args):
+    from src import daemon_client
+    from src.daemon_server import DaemonServer
 
-    args = parser.parse_args(input_args)
+    if args.status or args.stop:
+        reply = daemon_client.request("status" if args.status else "stop")
+        if reply is None:
+            console.print("No daemon is running.", style="bold red")
+            return 1
+        if args.stop:
+            console.print("Daemon stopped.", style="bold green")
+        else:
+            console.print(f"Daemon running: pid {reply['pid']}, up {reply['uptime']:.0f}s, "
+                          f"{reply['requests']} requests served, socket {reply['socket']}", style="bold green")
+        return 0
+
+    if args.background:
+        return start_daemon(args)
+
+    server = DaemonServer(config_loader, {"generate": daemon_generate, "list-models": daemon_list_models},
+                          debug=args.debug)
+    server.start()
+    console.print(f"Daemon listening on {daemon_client.daemon_socket_path()} (Ctrl-C to stop)", style="bold green")
+    server.serve_forever()
+    return 0
 
-    if not args.command:
-        parser.print_help()
 
-    return args
+def start_daemon(args):
+    import subprocess
+
+    from src import daemon_client
+
+    command = [sys.executable, os.path.abspath(__file__), "daemon"] + (["--debug"] if args.debug else [])
+    process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL, start_new_session=True)
+    deadline = time.monotonic() + DAEMON_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if daemon_client.request("status") is not None:
+            console.print(f"Daemon started (pid {process.pid}).", style="bold green")
+            return 0
+        if process.poll() is not None:
+            break
+        time.sleep(0.05)
+    console.print("ERROR: The daemon did not start; run 'ocelot_cli.sh daemon' to see why.", style="bold red")
+    return 1
+
+
+def command_show_config(config, args):
+    console.print("Configuration:", style="bold green")
+    console.print(json.dumps(config, indent=2), style="bold green")
+    return 0
 
 
 def run_application(config_loader: ConfigLoader, input_args):
@@ -173,12 +506,21 @@ def run_application(config_loader: ConfigLoader, input_args):
     config = config_loader.load_config()
 
     try:
-        if args.command == "generate":
+        if args.command == "daemon":
+            # Loads the configuration again whenever the file changes
+            return command_daemon(config_loader, args)
+        elif args.command == "generate":
             return command_generate(config, args)
         elif args.command == "chat":
             return command_chat(config, args)
         elif args.command == "list-models":
             return command_list_models(config, args)
+        elif args.command == "batch":
+            return command_batch(config, args)
+        elif args.command == "bench":
+            return command_bench(config, args)
+        elif args.command == "serve":
+            return command_serve(config, args)
         elif args.command == "show-config":
             return command_show_config(config, args)
         else:
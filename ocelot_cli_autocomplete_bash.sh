@@ -1,12 +1,7 @@
 _ocelot_cli_list_models_cached() {
     local cli="$1"
-    local CACHE_FILE="$HOME/.cache/ocelot_cli_model_list.txt"
-    local CACHE_DURATION=3600  # 1 hour
-    if [[ ! -f "$CACHE_FILE" || $(( $(date +%s) - $(stat -c %Y "$CACHE_FILE") )) -gt $CACHE_DURATION ]]; then
-      mkdir -p "$(dirname "$CACHE_FILE")"
-      "$cli" list-models --plain > "$CACHE_FILE" 2>/dev/null || true
-    fi
-    cat "$CACHE_FILE"
+    # Answers from the model catalog; stale entries are refreshed in the background
+    "$cli" list-models --cached --plain 2>/dev/null || true
 }
 
 _ocelot_cli_completions() {
@@ -15,7 +10,7 @@ _ocelot_cli_completions() {
     _get_comp_words_by_ref -n : cur prev words cword
 
     local script="${COMP_WORDS[0]}"
-    local commands="generate chat list-models show-config"
+    local commands="generate chat list-models batch bench serve daemon show-config"
     local arguments="-h --help --plain -d --debug"
 
     if [[ $cword -eq 1 ]]; then
@@ -25,14 +20,39 @@ _ocelot_cli_completions() {
 
     case ${words[1]} in
         generate|chat)
+            if [[ "$prev" == "-m" || "$prev" == "--model_name" || "$prev" == "--hedge" ]]; then
+                arguments="$(_ocelot_cli_list_models_cached "$script")"
+            else
+                arguments="${arguments} -m --model_name --no-show-reasoning --initial-prompt --no-warm-up --continue --context-name --cache --no-cache --token-budget --summary-model --session --stats --stats-json --hedge --hedge-delay"
+            fi
+            ;;
+        batch)
+            if [[ "$prev" == "-m" || "$prev" == "--model_name" ]]; then
+                arguments="$(_ocelot_cli_list_models_cached "$script")"
+            else
+                arguments="${arguments} -m --model_name -o --output --order --concurrency --resume --no-show-reasoning"
+                COMPREPLY=( $(compgen -f -W "${arguments}" -- "$cur") )
+                return 0
+            fi
+            ;;
+        bench)
             if [[ "$prev" == "-m" || "$prev" == "--model_name" ]]; then
                 arguments="$(_ocelot_cli_list_models_cached "$script")"
+            elif [[ "$prev" == "--prompts" || "$prev" == "-o" || "$prev" == "--output" || "$prev" == "--compare" ]]; then
+                COMPREPLY=( $(compgen -f -- "$cur") )
+                return 0
             else
-                arguments="${arguments} -m --model_name --no-show-reasoning --initial-prompt"
+                arguments="${arguments} -m --model_name --prompts -n --requests --duration --concurrency --rate -o --output --compare --no-warm-up --no-show-reasoning"
             fi
             ;;
+        serve)
+            arguments="${arguments} --host --port"
+            ;;
+        daemon)
+            arguments="${arguments} --background --status --stop"
+            ;;
         list-models)
-            arguments="${arguments} --provider_name -p"
+            arguments="${arguments} --provider_name -p --cached --timeout"
             ;;
     esac
 
@@ -0,0 +1,53 @@
+from abc import abstractmethod, ABC
+from typing import List, Dict, AsyncIterator, Callable, Optional
+
+import aiohttp
+
+from src.async_http_pool import create_client_session
+
+
+class AsyncBaseLLMBackend(ABC):
+    """
+    Asyncio counterpart of BaseLLMBackend. Responses are always streamed as async iterators.
+    """
+
+    def _init_session(self, session_factory: Optional[Callable[[], aiohttp.ClientSession]] = None):
+        self._session_factory = session_factory
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._owns_session = False
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Sessions are bound to the running event loop, so they are only created on first use
+        if self._session is None or self._session.closed:
+            if self._session_factory:
+                self._session = self._session_factory()
+            else:
+                self._session = create_client_session({})
+                self._owns_session = True
+        return self._session
+
+    @abstractmethod
+    def agenerate(self, prompt: str) -> AsyncIterator[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def achat(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        raise NotImplementedError
+
+    async def alist_models(self) -> List[str]:
+        """
+        Returns a list of available models.
+        This method should be implemented by concrete backend classes.
+
+        Returns:
+            List[str]: A list of model names.
+        """
+        raise NotImplementedError
+
+    async def aclose(self):
+        """
+        Closes the HTTP session when it is owned by this backend. Pooled sessions are closed by their pool.
+        """
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+        self._session = None
@@ -0,0 +1,88 @@
+from typing import List, Dict, AsyncIterator, Callable
+
+import aiohttp
+
+from src.async_base_llm_backend import AsyncBaseLLMBackend
+from src.base_llm_backend import RequestError
+from src.gemini_backend import GEMINI_API_URL, GeminiResponse, console
+
+
+class AsyncGeminiBackend(AsyncBaseLLMBackend):
+    def __init__(self, api_key: str, model_name: str, base_url: str = "http://localhost:11434", debug: bool = False,
+                 show_reasoning: bool = False, session_factory: Callable[[], aiohttp.ClientSession] = None,
+                 include_thoughts: bool = False):
+        self._api_key = api_key
+        self._model_name = model_name
+        self._base_url = base_url
+        self._debug = debug
+        self._show_reasoning = show_reasoning
+        # Asks thinking models for their thought summaries; models without thinking support reject it
+        self._include_thoughts = include_thoughts
+        self._init_session(session_factory)
+
+    def _get_headers(self):
+        if not self._api_key:
+            raise RuntimeError("GEMINI_API_KEY environment variable is not set.")
+
+        return {
+            "X-Goog-Api-Key": self._api_key,
+            "Content-Type": "application/json"
+        }
+
+    def _request_data(self, parts) -> dict:
+        data = {
+            "contents": [{
+                "parts": parts
+            }]
+        }
+        if self._show_reasoning and self._include_thoughts:
+            data["generationConfig"] = {"thinkingConfig": {"includeThoughts": True}}
+        return data
+
+    async def _stream_content(self, parts) -> AsyncIterator[str]:
+        url = f"{GEMINI_API_URL}/models/{self._model_name}:streamGenerateContent?alt=sse"
+
+        async with self._get_session().post(url, json=self._request_data(parts),
+                                            headers=self._get_headers()) as response:
+            if response.status != 200:
+                raise RequestError(response.status, await response.text())
+            reasoning = False
+            async for line in response.content:
+                line = line.strip()
+                if not line:
+                    continue
+                response_line = GeminiResponse(line, self._debug)
+                if response_line.is_reasoning and self._show_reasoning:
+                    if not reasoning:
+                        reasoning = True
+                        yield "<think>"
+                    yield response_line.reasoning
+                if response_line.is_content:
+                    if reasoning:
+                        reasoning = False
+                        yield "</think>\n\n"
+                    yield response_line.content
+                    continue
+                if not response_line.is_reasoning and self._debug:
+                    console.print(f"DEBUG: Unknown response: {response_line.line}", style="bold red")
+            if reasoning:
+                yield "</think>\n\n"
+
+    async def agenerate(self, prompt: str) -> AsyncIterator[str]:
+        async for token in self._stream_content([{"text": prompt}]):
+            yield token
+
+    async def achat(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        parts = [{"text": message["content"]} for message in messages]
+        async for token in self._stream_content(parts):
+            yield token
+
+    async def alist_models(self) -> List[str]:
+        url = f"{GEMINI_API_URL}/models"
+        async with self._get_session().get(url, headers=self._get_headers()) as response:
+            if response.status != 200:
+                raise RequestError(response.status, await response.text())
+            response_json = await response.json()
+
+        models = response_json.get('models', [])
+        return [model.get('name', '').replace('models/', '') for model in models]
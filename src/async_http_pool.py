@@ -0,0 +1,39 @@
+from typing import Dict, Optional
+
+import aiohttp
+
+from src.constants import ASYNC_HTTP_POOL_SIZE, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT
+
+
+def create_client_session(settings: dict) -> aiohttp.ClientSession:
+    """
+    Creates an aiohttp session from the "http" config settings. Must be called from a running event loop.
+    """
+    connector = aiohttp.TCPConnector(limit_per_host=settings.get("pool_size", ASYNC_HTTP_POOL_SIZE),
+                                     limit=0,
+                                     force_close=not settings.get("keep_alive", True))
+    timeout = aiohttp.ClientTimeout(total=None,
+                                    sock_connect=settings.get("connect_timeout", HTTP_CONNECT_TIMEOUT),
+                                    sock_read=settings.get("read_timeout", HTTP_READ_TIMEOUT))
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+
+class AsyncHttpSessionPool:
+    """
+    Keep-alive aiohttp sessions, one per provider, created on first use inside the event loop.
+    """
+
+    def __init__(self):
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+
+    def get(self, provider_name: str, settings: Optional[dict] = None) -> aiohttp.ClientSession:
+        session = self._sessions.get(provider_name)
+        if session is None or session.closed:
+            session = create_client_session(settings or {})
+            self._sessions[provider_name] = session
+        return session
+
+    async def close(self):
+        for session in self._sessions.values():
+            await session.close()
+        self._sessions.clear()
@@ -0,0 +1,101 @@
+import asyncio
+import json
+from typing import List, Dict, AsyncIterator, Callable
+
+import aiohttp
+
+from src.async_base_llm_backend import AsyncBaseLLMBackend
+from src.base_llm_backend import RequestError
+from src.ollama_backend import OllamaResponse, console, model_candidates, needs_installed_models
+
+
+class AsyncOllamaBackend(AsyncBaseLLMBackend):
+    def __init__(self, model_name: str, base_url: str = "http://localhost:11434", debug: bool = False,
+                 show_reasoning: bool = False, session_factory: Callable[[], aiohttp.ClientSession] = None,
+                 keep_alive=None, models: Dict[str, dict] = None, fallbacks: Dict[str, List[str]] = None):
+        self._model_name = model_name
+        self._base_url = base_url.rstrip("/")
+        self._debug = debug
+        self._show_reasoning = show_reasoning  # unused
+        self._keep_alive = keep_alive
+        self._models = models or {}
+        self._fallbacks = fallbacks or {}
+        self._model_lock = asyncio.Lock()
+        self._model_resolved = False
+        self._init_session(session_factory)
+
+    async def _payload(self, **fields) -> dict:
+        payload = {"model": await self.resolve_model(), **fields}
+        keep_alive = self._models.get(payload["model"], {}).get("keep_alive", self._keep_alive)
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        return payload
+
+    async def resolve_model(self) -> str:
+        """
+        Picks the model to use when the name has a fallback list, preferring the variant that is already loaded.
+        """
+        async with self._model_lock:
+            if not self._model_resolved:
+                self._model_name = await self._select_model(self._model_name)
+                self._model_resolved = True
+            return self._model_name
+
+    async def _select_model(self, model_name: str) -> str:
+        # Tagless names are left to the server here: checking them would cost a request per backend
+        if needs_installed_models(model_name, self._fallbacks):
+            return model_name
+        candidates = model_candidates(model_name, self._fallbacks)
+        try:
+            running = await self._fetch_model_names("ps")
+        except (aiohttp.ClientError, RuntimeError):
+            return candidates[0]
+        return next((name for name in candidates if name in running), candidates[0])
+
+    async def _fetch_model_names(self, endpoint: str) -> List[str]:
+        async with self._get_session().get(f"{self._base_url}/api/{endpoint}") as response:
+            await self._check_response(response)
+            data = await response.json()
+        return [m.get("name") for m in data.get("models", [])]
+
+    async def agenerate(self, prompt: str) -> AsyncIterator[str]:
+        url = f"{self._base_url}/api/generate"
+        payload = await self._payload(prompt=prompt, stream=True)
+        async with self._get_session().post(url, json=payload) as response:
+            await self._check_response(response)
+            async for line in response.content:
+                line = line.strip()
+                if not line:
+                    continue
+                response_line = OllamaResponse(line, self._debug)
+                if response_line.is_content:
+                    yield response_line.content
+                    continue
+                if self._debug:
+                    console.print(f"DEBUG: Unknown response: {response_line.line}", style="bold red")
+
+    async def achat(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        url = f"{self._base_url}/api/chat"
+        payload = await self._payload(messages=messages, stream=True)
+        async with self._get_session().post(url, json=payload) as response:
+            await self._check_response(response)
+            async for line in response.content:
+                line = line.strip()
+                if line:
+                    data = json.loads(line)
+                    yield data.get("message", {}).get("content", "")
+
+    async def alist_models(self) -> List[str]:
+        try:
+            return await self._fetch_model_names("tags")
+        except Exception as e:
+            console.print(f"ERROR: Failed to fetch models: {e}", style="bold red")
+            return []
+
+    async def _check_response(self, response: aiohttp.ClientResponse):
+        if not response.ok:
+            text = await response.text()
+            if self._debug:
+                debug_text = text.splitlines()[0] if text else ""
+                console.print(f"DEBUG: status={response.status}, text={debug_text}", style="bold")
+            raise RequestError(response.status, text)
@@ -0,0 +1,76 @@
+from typing import List, Dict, AsyncIterator, Callable
+
+import aiohttp
+
+from src.async_base_llm_backend import AsyncBaseLLMBackend
+from src.base_llm_backend import RequestError
+from src.openai_compatible_backend import OpenAiApiResponse, console
+
+
+class AsyncOpenAiCompatibleApiBackend(AsyncBaseLLMBackend):
+    def __init__(self, api_key: str, base_url: str, model_name: str, debug: bool = False, show_reasoning: bool = True,
+                 extra_headers: dict = None, session_factory: Callable[[], aiohttp.ClientSession] = None):
+        self._base_url = base_url
+        self._api_key = api_key
+        self._model_name = model_name
+        self._debug = debug
+        self._show_reasoning = show_reasoning
+        self._extra_headers = dict(extra_headers or {})
+        if "Authorization" not in self._extra_headers:
+            self._extra_headers["Authorization"] = f"Bearer {api_key}"
+        self._init_session(session_factory)
+
+    async def agenerate(self, prompt: str) -> AsyncIterator[str]:
+        async for token in self.achat([{"role": "user", "content": prompt}]):
+            yield token
+
+    async def achat(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        url = f"{self._base_url}/chat/completions"
+        payload = {
+            "model": self._model_name,
+            "messages": messages,
+            "stream": True
+        }
+        async with self._get_session().post(url, headers=self._extra_headers, json=payload) as response:
+            await self._check_response(response)
+            async for token in self._stream_response(response):
+                yield token
+
+    async def alist_models(self) -> List[str]:
+        url = f"{self._base_url}/models"
+        async with self._get_session().get(url, headers=self._extra_headers) as response:
+            await self._check_response(response)
+            data = await response.json()
+        return [model["id"] for model in data["data"]]
+
+    async def _stream_response(self, response: aiohttp.ClientResponse) -> AsyncIterator[str]:
+        reasoning = False
+        async for line in response.content:
+            line = line.strip()
+            if not line:
+                continue
+            response_line = OpenAiApiResponse(line, self._debug)
+            if response_line.is_done:
+                break
+            if response_line.is_content:
+                if reasoning:
+                    reasoning = False
+                    yield "</think>\n\n"
+                yield response_line.content
+                continue
+            if response_line.is_reasoning and self._show_reasoning:
+                if not reasoning:
+                    reasoning = True
+                    yield "<think>"
+                yield response_line.reasoning
+                continue
+            if self._debug:
+                console.print(f"DEBUG: Unknown response: {response_line.line}", style="bold red")
+
+    async def _check_response(self, response: aiohttp.ClientResponse):
+        if not response.ok:
+            text = await response.text()
+            if self._debug:
+                debug_text = text.splitlines()[0] if text else ""
+                console.print(f"DEBUG: status={response.status}, text={debug_text}", style="bold")
+            raise RequestError(response.status, text)
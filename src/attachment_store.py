@@ -0,0 +1,108 @@
+import hashlib
+import re
+from typing import Dict, List, Tuple
+
+from src.token_estimator import MESSAGE_OVERHEAD_TOKENS, estimate_tokens
+
+# Attachment references kept in the message text: private use characters around the digest and the path
+ATTACHMENT_START = "\ue000"
+ATTACHMENT_SEPARATOR = "\ue001"
+ATTACHMENT_PATTERN = re.compile(f"{ATTACHMENT_START}([0-9a-f]{{64}}){ATTACHMENT_SEPARATOR}([^{ATTACHMENT_START}]*)"
+                                f"{ATTACHMENT_START}")
+
+# Tokens of the FILE header and code fence around an attachment
+FILE_BLOCK_TOKENS = 6
+
+
+def file_block(path: str, content: str) -> str:
+    return f"\n\nFILE: {path}\n```\n{content}\n```\n"
+
+
+def unchanged_block(path: str) -> str:
+    return f"\n\nFILE: {path} (unchanged, see above)\n"
+
+
+def superseded_block(path: str) -> str:
+    return f"\n\nFILE: {path} (older version elided, a newer version follows)\n"
+
+
+class AttachmentStore:
+    """
+    Holds @@file contents once per content hash. Messages keep short references to them, and render()
+    expands the first copy of the latest version of each file, replacing later identical copies by an
+    "unchanged" stub and older versions by an "elided" stub.
+    """
+
+    def __init__(self):
+        self._contents: Dict[str, str] = {}
+
+    def reference(self, path: str, content: str) -> str:
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        self._contents.setdefault(digest, content)
+        return f"{ATTACHMENT_START}{digest}{ATTACHMENT_SEPARATOR}{path}{ATTACHMENT_START}"
+
+    def add(self, digest: str, content: str):
+        self._contents[digest] = content
+
+    def content(self, digest: str) -> str:
+        return self._contents[digest]
+
+    def clear(self):
+        self._contents.clear()
+
+    def __len__(self):
+        return len(self._contents)
+
+    @staticmethod
+    def references(text: str) -> List[Tuple[str, str]]:
+        """
+        Returns the (digest, path) of each attachment referenced in the text, in order.
+        """
+        if ATTACHMENT_START not in text:
+            return []
+        return ATTACHMENT_PATTERN.findall(text)
+
+    def render(self, messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        Returns the messages as sent to the backend: only role and content, with the attachments expanded.
+        """
+        latest = {}
+        for message in messages:
+            for digest, path in self.references(message["content"]):
+                latest[path] = digest
+
+        shown = set()
+
+        def replace_reference(match):
+            digest, path = match.groups()
+            if latest[path] != digest:
+                return superseded_block(path)
+            if path in shown:
+                return unchanged_block(path)
+            shown.add(path)
+            return file_block(path, self._contents[digest])
+
+        return [{"role": message["role"], "content": ATTACHMENT_PATTERN.sub(replace_reference, message["content"])}
+                if ATTACHMENT_START in message["content"] else {"role": message["role"], "content": message["content"]}
+                for message in messages]
+
+    def message_tokens(self, message: Dict[str, str], later_versions: Dict[str, str]) -> int:
+        """
+        Estimated tokens of the rendered message, for messages visited from the newest to the oldest.
+        Each latest version is counted in full once; later_versions collects the paths already seen.
+        """
+        content = message["content"]
+        references = self.references(content)
+        if not references:
+            return estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+        tokens = estimate_tokens(ATTACHMENT_PATTERN.sub("", content)) + MESSAGE_OVERHEAD_TOKENS
+        for digest, path in reversed(references):
+            if path not in later_versions:
+                later_versions[path] = digest
+                tokens += estimate_tokens(path) + estimate_tokens(self._contents[digest]) + FILE_BLOCK_TOKENS
+            elif later_versions[path] == digest:
+                tokens += estimate_tokens(unchanged_block(path))
+            else:
+                tokens += estimate_tokens(superseded_block(path))
+        return tokens
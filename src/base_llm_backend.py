@@ -1,8 +1,37 @@
+import time
 from abc import abstractmethod, ABC
-from typing import List, Dict, Union, Generator
+from datetime import timedelta
+from typing import Iterable, List, Dict, Optional, Union, Generator
+
+from src.console import console
+
+
+class RequestError(RuntimeError):
+    """
+    Error answer of a provider API, with its HTTP status code.
+    """
+
+    def __init__(self, status: int, text: str):
+        super().__init__(f"Request error: {status} - {text}")
+        self.status = status
+
+
+def close_stream(tokens: Iterable[str]):
+    """
+    Closes a token generator, so a stream left before its end releases its connection at once instead of when the
+    generator is garbage collected. Finished generators and plain iterators are left as they are.
+    """
+    close = getattr(tokens, "close", None)
+    if close is not None:
+        close()
 
 
 class BaseLLMBackend(ABC):
+    # Set by backends on each request: seconds until the response headers arrived, and the token
+    # counts and durations reported by the server at the end of the last generation
+    last_headers_time: Optional[float] = None
+    last_usage: Dict[str, float] = {}
+
     @abstractmethod
     def generate(self, prompt: str, stream: bool = False) -> Union[str, Generator[str, None, None]]:
         raise NotImplementedError
@@ -20,3 +49,26 @@ class BaseLLMBackend(ABC):
             List[str]: A list of model names.
         """
         raise NotImplementedError
+
+    def warm_up(self, load: bool = True):
+        """
+        Prepares the model before the first request, optionally loading it into memory.
+        Backends without a model selection or load step do nothing.
+
+        Args:
+            load (bool): Also load the model, not only select it.
+        """
+        pass
+
+    def _record_headers(self, response):
+        elapsed = getattr(response, "elapsed", None)
+        self.last_headers_time = elapsed.total_seconds() if isinstance(elapsed, timedelta) else None
+
+    def _release(self, response, completed: bool):
+        # Closing a response whose body was not read to the end drops the connection, which is how the
+        # server learns that nobody is listening and stops generating
+        start = time.perf_counter()
+        response.close()
+        elapsed = time.perf_counter() - start
+        if not completed and getattr(self, "_debug", False):
+            console.print(f"DEBUG: Stream cancelled, connection released in {elapsed * 1000:.1f}ms", style="bold")
@@ -0,0 +1,169 @@
+import asyncio
+import hashlib
+import json
+from typing import Dict, IO, Iterable, List, Optional, Tuple
+
+from src.constants import BATCH_CONCURRENCY
+from src.model_output import ModelOutput
+
+
+class BatchItem:
+    def __init__(self, index: int, record: dict, default_model: Optional[str] = None):
+        self.index = index
+        self.id = record.get("id", index)
+        self.model = record.get("model") or default_model
+        self.prompt: Optional[str] = record.get("prompt")
+        self.messages: Optional[List[Dict[str, str]]] = record.get("messages")
+        if not self.model:
+            raise ValueError(f"Line {index + 1}: no model given and no default model (-m).")
+        if (self.prompt is None) == (self.messages is None):
+            raise ValueError(f"Line {index + 1}: expected exactly one of 'prompt' or 'messages'.")
+
+    def request_key(self, provider_name: str, model_name: str) -> str:
+        request = [provider_name, model_name, self.prompt, self.messages]
+        return hashlib.sha256(json.dumps(request, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def read_batch_items(lines: Iterable[str], default_model: Optional[str] = None) -> List[BatchItem]:
+    items = []
+    for line in lines:
+        if line.strip():
+            items.append(BatchItem(len(items), json.loads(line), default_model))
+    return items
+
+
+def read_completed_results(lines: Iterable[str]) -> Dict[int, dict]:
+    """
+    Successful results of a previous output by index, used to resume a run. Error lines are dropped.
+    """
+    completed = {}
+    for line in lines:
+        try:
+            result = json.loads(line)
+        except json.JSONDecodeError:
+            continue  # line cut short by an interrupted run
+        if not isinstance(result, dict) or not isinstance(result.get("index"), int):
+            continue  # not a result line, such as one written by hand or by another tool
+        if result.get("error") is None:
+            completed[result["index"]] = result
+    return completed
+
+
+class BatchRunner:
+    """
+    Runs batch items concurrently on one event loop through the async backends. Identical requests
+    are sent once, and each provider has its own concurrency cap.
+    """
+
+    def __init__(self, provider_factory, concurrency: int = BATCH_CONCURRENCY, show_reasoning: bool = False,
+                 debug: bool = False, preprocessor=None):
+        self._provider_factory = provider_factory
+        self._concurrency = concurrency
+        self._show_reasoning = show_reasoning
+        self._debug = debug
+        self._preprocessor = preprocessor
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._backends = {}
+
+    async def run(self, items: List[BatchItem], output: IO[str], in_order: bool = True,
+                  completed: Optional[Dict[int, dict]] = None) -> int:
+        """
+        Writes one JSONL result per item to output and returns how many of them failed. Items with a result in
+        completed are not sent again; their previous result is written in their place.
+        """
+        completed = {index: result for index, result in (completed or {}).items() if index < len(items)}
+        pending = [item for item in items if item.index not in completed]
+        if not in_order:
+            for index in sorted(completed):
+                self._write(output, completed[index])
+
+        # Identical requests share one task
+        groups: Dict[str, Tuple[str, str, List[BatchItem]]] = {}
+        failures = []
+        for item in pending:
+            try:
+                provider_name, model_name = self._provider_factory.parse_model_name(item.model)
+            except ValueError as e:
+                failures.append(self._failed(item, e))
+                continue
+            key = item.request_key(provider_name, model_name)
+            groups.setdefault(key, (provider_name, model_name, []))[2].append(item)
+
+        tasks = [asyncio.ensure_future(self._run_group(provider_name, model_name, group_items))
+                 for provider_name, model_name, group_items in groups.values()]
+        tasks.extend(asyncio.ensure_future(failure) for failure in failures)
+
+        results: Dict[int, dict] = {}
+        next_index = 0
+        errors = 0
+        try:
+            for finished in asyncio.as_completed(tasks):
+                for result in await finished:
+                    if result["error"] is not None:
+                        errors += 1
+                    if not in_order:
+                        self._write(output, result)
+                        continue
+                    results[result["index"]] = result
+                    while next_index < len(items):
+                        if next_index in completed:
+                            self._write(output, completed[next_index])
+                        elif next_index in results:
+                            self._write(output, results.pop(next_index))
+                        else:
+                            break
+                        next_index += 1
+        finally:
+            for task in tasks:
+                task.cancel()
+            if in_order:
+                # Trailing completed items, and on interruption the results still held back for ordering
+                for index in range(next_index, len(items)):
+                    if index in completed or index in results:
+                        self._write(output, completed.get(index) or results[index])
+            for backend in self._backends.values():
+                await backend.aclose()
+            await self._provider_factory.aclose()
+        return errors
+
+    async def _run_group(self, provider_name: str, model_name: str, items: List[BatchItem]) -> List[dict]:
+        item = items[0]
+        result = {"model": f"{provider_name}/{model_name}", "response": None, "error": None}
+        semaphore = self._semaphores.setdefault(provider_name, asyncio.Semaphore(self._concurrency))
+        async with semaphore:
+            try:
+                backend = self._backend(provider_name, model_name)
+                if item.prompt is not None:
+                    prompt = item.prompt
+                    if self._preprocessor:
+                        # Reads the referenced files on a worker thread, off the event loop
+                        prompt = await asyncio.to_thread(self._preprocessor.process_prompt, item.prompt)
+                    tokens = backend.agenerate(prompt)
+                else:
+                    tokens = backend.achat(item.messages)
+                output = ModelOutput(show_reasoning=False)
+                async for token in tokens:
+                    output.add_token(token)
+                output.finish()
+                result["response"] = output.content()
+                if self._show_reasoning and output.reasoning():
+                    result["reasoning"] = output.reasoning()
+            except Exception as e:
+                result["error"] = str(e)
+        return [{"index": each.index, "id": each.id, **result} for each in items]
+
+    @staticmethod
+    async def _failed(item: BatchItem, error: Exception) -> List[dict]:
+        return [{"index": item.index, "id": item.id, "model": item.model, "response": None, "error": str(error)}]
+
+    def _backend(self, provider_name: str, model_name: str):
+        key = (provider_name, model_name)
+        if key not in self._backends:
+            self._backends[key] = self._provider_factory.resolve_async_backend(
+                provider_name, model_name, debug=self._debug, show_reasoning=self._show_reasoning)
+        return self._backends[key]
+
+    @staticmethod
+    def _write(output: IO[str], result: dict):
+        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+        output.flush()
@@ -0,0 +1,230 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from src.base_llm_backend import BaseLLMBackend
+from src.batch_runner import BatchItem
+from src.console import console
+from src.constants import BENCH_CONCURRENCY
+from src.generation_stats import StatsBackend
+
+BENCH_PERCENTILES = (50, 95, 99)
+
+# Summary metrics shown by format_summary and compare_summaries: (key, label, unit, lower is better)
+SUMMARY_METRICS = [
+    ("time_to_first_token", "TTFT", "s", True),
+    ("latency", "Latency", "s", True),
+    ("tokens_per_second", "Tokens/s", "", False),
+]
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """
+    Percentile with linear interpolation between the closest ranks.
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    rank = (len(values) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    return {f"p{p}": percentile(values, p) for p in BENCH_PERCENTILES}
+
+
+class BenchRunner:
+    """
+    Sends a prompt set to one model through the regular synchronous backends, from a pool of threads. Without a
+    rate, each of the `concurrency` workers sends its next request as soon as the previous one ends. With a rate,
+    requests are started on a fixed schedule and their latencies include any wait for a free worker.
+    """
+
+    def __init__(self, backend_factory: Callable[[], BaseLLMBackend], model: str,
+                 concurrency: int = BENCH_CONCURRENCY, rate: Optional[float] = None, debug: bool = False):
+        if concurrency < 1:
+            raise ValueError("The concurrency must be at least 1.")
+        if rate is not None and rate <= 0:
+            raise ValueError("The request rate must be positive.")
+        self._model = model
+        self._concurrency = concurrency
+        self._rate = rate
+        self._debug = debug
+        # One backend per worker: backends keep per-request state such as the last usage
+        self._backends = queue.Queue()
+        for _ in range(concurrency):
+            self._backends.put(StatsBackend(backend_factory(), model))
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._results: List[dict] = []
+        self._next_index = 0
+        self._start = 0.0
+
+    def warm_up(self):
+        backend = self._backends.get()
+        try:
+            backend.warm_up(load=True)
+        finally:
+            self._backends.put(backend)
+
+    def run(self, items: List[BatchItem], requests: Optional[int] = None, duration: Optional[float] = None) -> dict:
+        """
+        Runs until `requests` requests were sent or `duration` seconds passed, whichever comes first, and
+        returns the per-request results with their summary.
+        """
+        if not items:
+            raise ValueError("No prompts to send.")
+        if requests is None and duration is None:
+            raise ValueError("Give a number of requests or a duration.")
+
+        self._start = time.perf_counter()
+        deadline = self._start + duration if duration is not None else None
+        interrupted = False
+        executor = ThreadPoolExecutor(max_workers=self._concurrency)
+        try:
+            if self._rate is None:
+                futures = [executor.submit(self._worker, items, requests, deadline) for _ in range(self._concurrency)]
+            else:
+                futures = self._schedule(executor, items, requests, deadline)
+            for future in futures:
+                future.result()
+        except KeyboardInterrupt:
+            interrupted = True
+            self._stop.set()
+        finally:
+            # Requests in flight end normally; the queued ones are dropped
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        wall_time = time.perf_counter() - self._start
+        results = sorted(self._results, key=lambda result: result["index"])
+        return {"summary": summarize(results, wall_time, interrupted), "requests": results}
+
+    def _claim(self, requests: Optional[int], deadline: Optional[float]) -> Optional[int]:
+        with self._lock:
+            if self._stop.is_set() or (requests is not None and self._next_index >= requests):
+                return None
+            if deadline is not None and time.perf_counter() >= deadline:
+                return None
+            index = self._next_index
+            self._next_index += 1
+            return index
+
+    def _worker(self, items: List[BatchItem], requests: Optional[int], deadline: Optional[float]):
+        while (index := self._claim(requests, deadline)) is not None:
+            self._send(index, items[index % len(items)], scheduled=None)
+
+    def _schedule(self, executor, items: List[BatchItem], requests: Optional[int], deadline: Optional[float]):
+        futures = []
+        while True:
+            scheduled = self._start + self._next_index / self._rate
+            if deadline is not None and scheduled >= deadline:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0 and self._stop.wait(delay):
+                break
+            index = self._claim(requests, None)
+            if index is None:
+                break
+            futures.append(executor.submit(self._send, index, items[index % len(items)], scheduled))
+        return futures
+
+    def _send(self, index: int, item: BatchItem, scheduled: Optional[float]):
+        backend = self._backends.get()
+        started = time.perf_counter()
+        queue_time = started - scheduled if scheduled is not None else 0.0
+        error = None
+        try:
+            if item.messages is not None:
+                response = backend.chat(item.messages, stream=True)
+            else:
+                response = backend.generate(item.prompt, stream=True)
+            for _ in response:
+                pass
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        finally:
+            stats = backend.last.to_dict() if backend.last is not None else {}
+            self._backends.put(backend)
+
+        result = {
+            "index": index,
+            "prompt": item.index,
+            "started": started - self._start,
+            "queue_time": queue_time,
+            "time_to_headers": stats.get("time_to_headers"),
+            "time_to_first_token": stats.get("time_to_first_token"),
+            "total_time": stats.get("total_time"),
+            "tokens": stats.get("tokens", 0),
+            "tokens_per_second": stats.get("tokens_per_second"),
+            "server": stats.get("server", {}),
+            "error": error,
+        }
+        with self._lock:
+            self._results.append(result)
+        if self._debug and error:
+            console.print(f"DEBUG: request {index} failed: {error}", style="bold")
+
+
+def summarize(results: List[dict], wall_time: float, interrupted: bool = False) -> dict:
+    succeeded = [result for result in results if result["error"] is None]
+    ttft = [result["queue_time"] + result["time_to_first_token"] for result in succeeded
+            if result["time_to_first_token"] is not None]
+    latency = [result["queue_time"] + result["total_time"] for result in succeeded
+               if result["total_time"] is not None]
+    tokens_per_second = [result["tokens_per_second"] for result in succeeded
+                         if result["tokens_per_second"] is not None]
+    errors = len(results) - len(succeeded)
+    return {
+        "requests": len(results),
+        "errors": errors,
+        "error_rate": errors / len(results) if results else 0.0,
+        "duration": wall_time,
+        "interrupted": interrupted,
+        "requests_per_second": len(results) / wall_time if wall_time > 0 else None,
+        "output_tokens_per_second": (sum(result["tokens"] for result in succeeded) / wall_time
+                                     if wall_time > 0 else None),
+        "time_to_first_token": percentiles(ttft),
+        "latency": percentiles(latency),
+        "tokens_per_second": percentiles(tokens_per_second),
+    }
+
+
+def _value(value: Optional[float], unit: str) -> str:
+    return f"{value:.3f}{unit}" if value is not None else "-"
+
+
+def format_summary(summary: dict) -> str:
+    lines = [f"Requests: {summary['requests']} in {summary['duration']:.1f}s"
+             f"{' (interrupted)' if summary['interrupted'] else ''}, "
+             f"errors: {summary['errors']} ({summary['error_rate']:.1%})"]
+    if summary["requests_per_second"] is not None:
+        lines.append(f"Throughput: {summary['requests_per_second']:.2f} requests/s, "
+                     f"{summary['output_tokens_per_second']:.1f} tokens/s")
+    for key, label, unit, _ in SUMMARY_METRICS:
+        lines.append(f"{label}: " + ", ".join(f"{name} {_value(value, unit)}" for name, value in summary[key].items()))
+    return "\n".join(lines)
+
+
+def compare_summaries(summary: dict, baseline: dict) -> str:
+    """
+    One line per metric with the baseline value, the current value and the relative change, marked
+    "better" or "worse".
+    """
+    rows = [("Error rate", summary["error_rate"], baseline.get("error_rate"), True)]
+    for key, label, _, lower_is_better in SUMMARY_METRICS:
+        for name, value in summary[key].items():
+            rows.append((f"{label} {name}", value, (baseline.get(key) or {}).get(name), lower_is_better))
+
+    lines = []
+    for label, value, base, lower_is_better in rows:
+        line = f"{label}: {_value(base, '')} -> {_value(value, '')}"
+        if value is not None and base:
+            change = (value - base) / base
+            better = change < 0 if lower_is_better else change > 0
+            line += f" ({change:+.1%}, {'better' if better else 'worse'})" if change else " (same)"
+        lines.append(line)
+    return "\n".join(lines)
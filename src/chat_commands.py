@@ -1,70 +1,105 @@
+import json
 import os
 import readline
+import time
+from typing import Dict, List, Optional, Tuple
 
-from rich.console import Console
-
-console = Console()
+from src.console import console
+from src.constants import COMPLETION_DIR_CACHE_SIZE, COMPLETION_DIR_CACHE_TTL
 
 
 class ChatCommands:
     def __init__(self, plain: bool = False, show_reasoning: bool = True, debug: bool = False, base_dir: str = None,
-                 chat_session=None):
+                 chat_session=None, session_store=None, stats_backend=None):
         self.base_dir = base_dir or os.getcwd()
         self.plain = plain
         self.show_reasoning = show_reasoning
         self.debug = debug
         self._chat_session = chat_session
+        self._session_store = session_store
+        self._stats_backend = stats_backend
+
+        self._real_base_dir = None
+        self._completion: Optional[Tuple[str, bool, List[str]]] = None
+        self._dir_cache: Dict[str, Tuple[float, List[Tuple[str, bool, bool]]]] = {}
 
         self.command_history = []
         self.history_index = 0
-        self.internal_commands = ['plain', 'reasoning', 'debug', 'clear', 'help']
+        self.internal_commands = ['plain', 'reasoning', 'debug', 'clear', 'sessions', 'stats', 'help']
 
     def custom_file_reference_completer(self, text: str, state: int, safe: bool = True):
         if not text.startswith('@@'):
             return None
 
-        path = text[2:]
+        # readline asks for each state in turn: the matches are computed once per text
+        if state == 0 or self._completion is None or self._completion[:2] != (text, safe):
+            self._completion = (text, safe, self._file_reference_matches(text[2:], safe))
+        matches = self._completion[2]
+        if state < len(matches):
+            return matches[state]
+        return None
 
+    def _file_reference_matches(self, path: str, safe: bool) -> List[str]:
         # Protection against absolute or unsafe paths
         if safe and (path.startswith('/') or '..' in path or path.startswith('~') or '//' in path):
-            return None
+            return []
 
         dirname = os.path.dirname(path)
         prefix = os.path.basename(path)
 
-        dir_to_list = os.path.join(self.base_dir, dirname)
-        dir_to_list = os.path.realpath(dir_to_list)  # resolve symlinks
+        dir_to_list = os.path.realpath(os.path.join(self.base_dir, dirname))  # resolve symlinks
 
         # Security: disallow access outside the base directory
-        if safe and not dir_to_list.startswith(os.path.realpath(self.base_dir)):
-            return None
-
-        if not os.path.isdir(dir_to_list):
-            return None
-
-        try:
-            entries = os.listdir(dir_to_list)
-        except Exception:
-            return None
+        if safe and not self._inside_base_dir(dir_to_list):
+            return []
 
         matches = []
-        for entry in entries:
-            if entry.startswith(prefix):
-                full_path = os.path.join(dirname, entry) if dirname else entry
-                entry_path = os.path.join(dir_to_list, entry)
+        for name, is_dir, is_symlink in self._list_dir(dir_to_list):
+            if not name.startswith(prefix):
+                continue
 
-                # Prevent matches that escape the base directory
-                if safe and not os.path.realpath(entry_path).startswith(os.path.realpath(self.base_dir)):
-                    continue
+            # Prevent matches that escape the base directory; only symlinks can point outside of it
+            if safe and is_symlink and not self._inside_base_dir(os.path.realpath(os.path.join(dir_to_list, name))):
+                continue
 
-                if os.path.isdir(entry_path):
-                    full_path += '/'
-                matches.append('@@' + full_path)
+            full_path = os.path.join(dirname, name) if dirname else name
+            if is_dir:
+                full_path += '/'
+            matches.append('@@' + full_path)
 
         matches.sort()
-        if state < len(matches):
-            return matches[state]
-        return None
+        return matches
+
+    def _inside_base_dir(self, path: str) -> bool:
+        if self._real_base_dir is None:
+            self._real_base_dir = os.path.realpath(self.base_dir)
+        return path == self._real_base_dir or path.startswith(self._real_base_dir.rstrip(os.sep) + os.sep)
+
+    def _list_dir(self, directory: str) -> List[Tuple[str, bool, bool]]:
+        """
+        Returns (name, is_dir, is_symlink) of the directory entries, cached for a few seconds.
+        """
+        now = time.monotonic()
+        cached = self._dir_cache.get(directory)
+        if cached and now - cached[0] < COMPLETION_DIR_CACHE_TTL:
+            return cached[1]
+
+        entries = []
+        try:
+            # scandir returns the entry types with the names, without a stat call per entry
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        entries.append((entry.name, entry.is_dir(), entry.is_symlink()))
+                    except OSError:
+                        continue
+        except OSError:
+            entries = []
+
+        if len(self._dir_cache) >= COMPLETION_DIR_CACHE_SIZE:
+            self._dir_cache.pop(next(iter(self._dir_cache)))
+        self._dir_cache[directory] = (now, entries)
+        return entries
 
     def custom_completer(self, text, state):
         if text.startswith('/'):
@@ -90,10 +125,49 @@ class ChatCommands:
         self.history_index = 0
         self._chat_session.clear_history()
 
+    def list_sessions(self):
+        if self._session_store is None:
+            console.print("Sessions are not available.", style="bold red")
+            return
+        sessions = self._session_store.list()
+        if not sessions:
+            console.print("No saved sessions. Start one with 'chat --session NAME'.", style="bold green")
+            return
+        console.print("Saved sessions:", style="bold green")
+        current = self._chat_session.log.name if self._chat_session and self._chat_session.log else None
+        for session in sessions:
+            updated = time.strftime("%Y-%m-%d %H:%M", time.localtime(session["updated"]))
+            marker = "*" if session["name"] == current else "-"
+            console.print(f"{marker} {session['name']} ({session['messages']} messages, {updated}, "
+                          f"{session.get('model', '?')}) {session.get('preview', '')}", markup=False)
+
+    def show_stats(self, args: List[str]):
+        if self._stats_backend is None:
+            console.print("Statistics are not available.", style="bold red")
+            return
+        history = self._stats_backend.history
+        if args and args[0] == "json":
+            console.print(json.dumps([stats.to_dict() for stats in history], indent=2), markup=False)
+        elif args and args[0] == "save" and len(args) == 2:
+            try:
+                with open(args[1], "w") as f:
+                    json.dump([stats.to_dict() for stats in history], f, indent=2)
+            except OSError as e:
+                console.print(f"Failed to save statistics: {e}", style="bold red")
+                return
+            console.print(f"Statistics of {len(history)} responses saved to {args[1]}", style="bold green")
+        elif args:
+            console.print("Usage: /stats [json | save FILE]", style="bold red")
+        elif self._stats_backend.last is None:
+            console.print("No responses yet.", style="bold green")
+        else:
+            console.print(self._stats_backend.last.format(), markup=False)
+
     def process_command(self, user_input: str):
         if not user_input.startswith('/'):
             return False
-        command = user_input[1:].lower()
+        command, *args = user_input[1:].split() or [""]
+        command = command.lower()
         if command == "plain":
             self.plain = not self.plain
             console.print(f"Plain mode {'enabled' if self.plain else 'disabled'}", style="bold green")
@@ -106,12 +180,18 @@ class ChatCommands:
         elif command == "clear":
             self.clear_history()
             console.print("Chat history cleared.", style="bold green")
+        elif command == "sessions":
+            self.list_sessions()
+        elif command == "stats":
+            self.show_stats(args)
         elif command in ["help", "?", "h"]:
             console.print("Available commands:", style="bold green")
             console.print("/plain - Toggle plain mode on/off")
             console.print("/reasoning - Toggle reasoning mode on/off")
             console.print("/debug - Toggle debug mode on/off")
             console.print("/clear - Clear chat history")
+            console.print("/sessions - List saved chat sessions")
+            console.print("/stats [json | save FILE] - Show the statistics of the last response, or export all")
             console.print("/help - Show this help message")
         else:
             console.print(f"Unknown command: {user_input}", style="bold red")
@@ -1,39 +1,169 @@
-from typing import Dict, List, Optional, Union, Generator
+import threading
+from typing import Dict, List, Optional, Tuple, Union, Generator
+
+from src.attachment_store import AttachmentStore
+from src.base_llm_backend import BaseLLMBackend, close_stream
+from src.console import console
+from src.token_estimator import estimate_messages_tokens
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
 
-from src.base_llm_backend import BaseLLMBackend
 
 class ChatSession:
-    def __init__(self, backend: BaseLLMBackend, system_prompt: Optional[str] = None):
+    """
+    Keeps the chat history and sends it to the backend on each turn.
+
+    File attachments are kept once in the attachments store, and user messages only reference them
+    (see PromptPreprocessor.process_prompt). They are expanded when the request is built, so the history
+    grows with the number of distinct files, not with the number of times they are referenced.
+
+    With a token_budget, only the system messages and the newest turns that fit the budget are sent.
+    Older turns are dropped or, with a summarizer, condensed in the background after a turn ends, so the
+    summary is ready for a later turn without delaying the current one.
+    """
+
+    def __init__(self, backend: BaseLLMBackend, system_prompt: Optional[str] = None,
+                 token_budget: Optional[int] = None, summarizer=None, debug: bool = False):
         self.backend = backend
         self.messages: List[Dict[str, str]] = []
+        self.attachments = AttachmentStore()
+        self.token_budget = token_budget
+        self.debug = debug
+        self._summarizer = summarizer
+        self._summary: Optional[Tuple[int, str]] = None  # (messages covered, summary text)
+        self._summary_lock = threading.Lock()
+        self._summary_thread: Optional[threading.Thread] = None
+        self._history_generation = 0
+        self.log = None  # SessionLog that receives each message as it is added
         if system_prompt:
             self.add_system(system_prompt)
 
     def add_system(self, content: str):
-        self.messages.append({"role": "system", "content": content})
+        self._add({"role": "system", "content": content})
 
     def add_user(self, content: str):
-        self.messages.append({"role": "user", "content": content})
+        self._add({"role": "user", "content": content})
 
-    def add_assistant(self, content: str):
-        self.messages.append({"role": "assistant", "content": content})
+    def add_assistant(self, content: str, partial: bool = False):
+        message = {"role": "assistant", "content": content}
+        if partial:
+            message["partial"] = True
+        self._add(message)
+
+    def _add(self, message: Dict[str, str]):
+        self.messages.append(message)
+        if self.log:
+            self.log.write_message(message, self.attachments)
 
     def clear_history(self):
+        if self.log:
+            self.log.write_clear()
         self.messages = []
+        self.attachments.clear()
+        with self._summary_lock:
+            self._summary = None
+            self._history_generation += 1
+
+    @property
+    def summary(self) -> Optional[str]:
+        with self._summary_lock:
+            return self._summary[1] if self._summary else None
+
+    def window(self) -> List[Dict[str, str]]:
+        """
+        Returns the messages to send on the next request.
+        """
+        return self._window()[0]
+
+    def _window(self) -> Tuple[List[Dict[str, str]], int]:
+        if self.token_budget is None:
+            return self.attachments.render(self.messages), 0
+
+        with self._summary_lock:
+            covered, summary = self._summary or (0, None)
+        system = [message for message in self.messages if message["role"] == "system"]
+        summary_messages = [{"role": "system", "content": f"{SUMMARY_PREFIX}{summary}"}] if summary else []
+        budget = self.token_budget - estimate_messages_tokens(system) - estimate_messages_tokens(summary_messages)
+
+        # Newest messages first; the last one is always sent
+        later_versions = {}
+        start = len(self.messages)
+        for index in range(len(self.messages) - 1, covered - 1, -1):
+            message = self.messages[index]
+            if message["role"] == "system":
+                continue
+            tokens = self.attachments.message_tokens(message, later_versions)
+            if tokens > budget and start < len(self.messages):
+                break
+            budget -= tokens
+            start = index
+
+        # Start on a user message, so an answer is never sent without its question
+        while start < len(self.messages) - 1 and self.messages[start]["role"] != "user":
+            start += 1
+
+        turns = [message for message in self.messages[start:] if message["role"] != "system"]
+        return self.attachments.render(system + summary_messages + turns), start
 
     def ask(self, prompt: str, stream: bool = False) -> Union[str, Generator[str, None, None]]:
         self.add_user(prompt)
-        response = self.backend.chat(self.messages, stream=stream)
+        messages = self.window()
+        if self.debug and self.token_budget is not None:
+            console.print(f"DEBUG: History window: {len(messages)} of {len(self.messages)} messages, "
+                          f"~{estimate_messages_tokens(messages)} tokens", style="bold")
+        response = self.backend.chat(messages, stream=stream)
 
         if not stream:
             self.add_assistant(response)
+            self._start_summary()
             return response
 
         def streaming_response():
             full = ""
-            for token in response:
-                yield token
-                full += token
+            try:
+                for token in response:
+                    full += token
+                    yield token
+            except BaseException:
+                # Interrupted: stop the upstream generation now and keep what was already received,
+                # marked as partial
+                close_stream(response)
+                if full:
+                    self.add_assistant(full, partial=True)
+                raise
             self.add_assistant(full)
+            self._start_summary()
+
+        return streaming_response()
+
+    def _start_summary(self):
+        # Summarizes the turns left out of the window in the background, between turns
+        if self._summarizer is None or self.token_budget is None:
+            return
+        if self._summary_thread and self._summary_thread.is_alive():
+            return
+
+        _, start = self._window()
+        with self._summary_lock:
+            covered, previous_summary = self._summary or (0, None)
+            generation = self._history_generation
+        dropped = self.attachments.render([message for message in self.messages[covered:start]
+                                           if message["role"] != "system"])
+        if not dropped:
+            return
+
+        def summarize():
+            try:
+                summary = self._summarizer.summarize(previous_summary, dropped)
+            except Exception as e:
+                if self.debug:
+                    console.print(f"DEBUG: History summary failed: {e}", style="bold")
+                return
+            with self._summary_lock:
+                if generation == self._history_generation:
+                    self._summary = (start, summary)
+            if self.debug:
+                console.print(f"DEBUG: Summarized {len(dropped)} messages", style="bold")
 
-        return streaming_response()
\ No newline at end of file
+        self._summary_thread = threading.Thread(target=summarize, daemon=True)
+        self._summary_thread.start()
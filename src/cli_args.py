@@ -0,0 +1,157 @@
+import argparse
+
+from src.constants import (BATCH_CONCURRENCY, BENCH_CONCURRENCY, BENCH_REQUESTS, HEDGE_DELAY, MODEL_LIST_TIMEOUT,
+                           SERVE_HOST, SERVE_PORT)
+
+
+def add_hedge_arguments(parser):
+    parser.add_argument("--hedge", metavar="MODEL",
+                        help="Also send the request to MODEL ([provider/]model_name) when the first token is late, "
+                             "and keep the answer that starts first.")
+    parser.add_argument("--hedge-delay", type=float, metavar="SECONDS",
+                        help=f"Seconds to wait for the first token before hedging (default: hedge.delay in the "
+                             f"config or {HEDGE_DELAY:g}).")
+
+
+def parse_args(input_args):
+    parser = argparse.ArgumentParser(description="Jaguatirica Command Line Interface for LLM Models.")
+    subparsers = parser.add_subparsers(dest='command', help='Subcommands')
+
+    # Generate command
+    generate_parser = subparsers.add_parser('generate', help='Generate text from a prompt',
+                                            description="Generate text from a prompt using the specified model.")
+    generate_parser.add_argument("-m", "--model_name", required=True,
+                                 help="Name of the model to use. Format: [provider/]model_name.")
+    generate_parser.add_argument("--no-show-reasoning", action="store_true", help="Hide reasoning process.")
+    generate_parser.add_argument("-d", "--debug", action="store_true", help="Enable debug mode.")
+    generate_parser.add_argument("--plain", action="store_true", help="Show output without formatting.")
+    generate_parser.add_argument("--cache", action=argparse.BooleanOptionalAction, default=None,
+                                 help="Replay identical requests from the local response cache (default: "
+                                      "response_cache.enabled in the config).")
+    generate_parser.add_argument("--stats", action="store_true",
+                                 help="Show time to first token, tokens/sec and inter-token latency after the answer.")
+    generate_parser.add_argument("--stats-json", metavar="FILE",
+                                 help="Write the generation statistics to FILE as JSON.")
+    generate_parser.add_argument("--continue", dest="continue_context", action="store_true",
+                                 help="Ollama only: send the saved context of the previous --continue run and save "
+                                      "the new one, so a shared prompt prefix is evaluated only once.")
+    generate_parser.add_argument("--context-name", default="default",
+                                 help="Name of the saved context used by --continue (default: 'default').")
+    add_hedge_arguments(generate_parser)
+    generate_parser.add_argument("prompt", nargs='?',
+                                 help="The text prompt to send to the model. If not provided, read from standard input.")
+
+    # Interactive chat command
+    chat_parser = subparsers.add_parser('chat', help='Interactive chat with the model',
+                                        description="Start an interactive chat session with the specified model.")
+    chat_parser.add_argument("-m", "--model_name", required=True,
+                             help="Name of the model to use. Format: [provider/]model_name.")
+    chat_parser.add_argument("--no-show-reasoning", action="store_true", help="Hide reasoning process.")
+    chat_parser.add_argument("--initial-prompt", type=str, help="Initial prompt to send to the model.")
+    chat_parser.add_argument("--cache", action=argparse.BooleanOptionalAction, default=None,
+                             help="Replay identical requests from the local response cache (default: "
+                                  "response_cache.enabled in the config).")
+    chat_parser.add_argument("--token-budget", type=int,
+                             help="Send only the newest turns that fit this many tokens (default: chat.token_budget "
+                                  "in the config, or the whole history).")
+    chat_parser.add_argument("--summary-model",
+                             help="Model that summarizes the turns left out of the token budget, in the background. "
+                                  "Format: [provider/]model_name.")
+    chat_parser.add_argument("--session",
+                             help="Save the chat under this name and resume it if it already exists.")
+    chat_parser.add_argument("--no-warm-up", action="store_true",
+                             help="Do not load the model in the background when the chat starts.")
+    chat_parser.add_argument("-d", "--debug", action="store_true", help="Enable debug mode.")
+    add_hedge_arguments(chat_parser)
+    chat_parser.add_argument("--plain", action="store_true", help="Show output without formatting.")
+
+    # List models command
+    list_models_parser = subparsers.add_parser('list-models', help='List available models',
+                                               description="List all available models from the specified provider(s).")
+    list_models_parser.add_argument("-p", "--provider_name", default='all',
+                                    help="Name of the provider to use. Supported providers: all, ollama, openrouter, others(via config).")
+    list_models_parser.add_argument("-d", "--debug", action="store_true", help="Enable debug mode.")
+    list_models_parser.add_argument("--plain", action="store_true", help="Show output without formatting.")
+    list_models_parser.add_argument("--cached", action="store_true",
+                                    help="Answer from the local model catalog and refresh stale entries in the "
+                                         "background.")
+    list_models_parser.add_argument("--timeout", type=float, default=MODEL_LIST_TIMEOUT,
+                                    help=f"Seconds to wait for each provider (default: {MODEL_LIST_TIMEOUT}).")
+    list_models_parser.add_argument("--refresh-catalog", nargs="*", metavar="PROVIDER", help=argparse.SUPPRESS)
+
+    # Batch command
+    batch_parser = subparsers.add_parser('batch', help='Run a JSONL file of prompts concurrently',
+                                         description="Run the prompts or message lists of a JSONL file "
+                                                     "concurrently and write the results as JSONL.")
+    batch_parser.add_argument("input", nargs='?', default="-",
+                              help="JSONL file with one {\"prompt\": ...} or {\"messages\": [...]} object per "
+                                   "line, optionally with \"id\" and \"model\". Default: standard input.")
+    batch_parser.add_argument("-m", "--model_name",
+                              help="Model for lines without \"model\". Format: [provider/]model_name.")
+    batch_parser.add_argument("-o", "--output", default="-", help="Output JSONL file. Default: standard output.")
+    batch_parser.add_argument("--order", choices=["input", "completion"], default="input",
+                              help="Write results in input order (default) or as they complete.")
+    batch_parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY,
+                              help=f"Requests in flight per provider (default: {BATCH_CONCURRENCY}).")
+    batch_parser.add_argument("--resume", action="store_true",
+                              help="Keep the results already in the output file and run only the missing or "
+                                   "failed items.")
+    batch_parser.add_argument("--no-show-reasoning", action="store_true", help="Do not include the reasoning.")
+    batch_parser.add_argument("-d", "--debug", action="store_true", help="Enable debug mode.")
+
+    # Bench command
+    bench_parser = subparsers.add_parser('bench', help='Load-test a model endpoint',
+                                         description="Send a prompt set to a model at a fixed concurrency or "
+                                                     "request rate and report latency percentiles.")
+    bench_parser.add_argument("-m", "--model_name", required=True,
+                              help="Name of the model to use. Format: [provider/]model_name.")
+    bench_parser.add_argument("prompt", nargs='?',
+                              help="Prompt to send. If not provided, reads from standard input.")
+    bench_parser.add_argument("--prompts", metavar="FILE",
+                              help="JSONL file with one {\"prompt\": ...} or {\"messages\": [...]} object per "
+                                   "line, sent in turn.")
+    bench_parser.add_argument("-n", "--requests", type=int,
+                              help=f"Number of requests (default: {BENCH_REQUESTS}, or no limit with --duration).")
+    bench_parser.add_argument("--duration", type=float, help="Stop sending requests after this many seconds.")
+    bench_parser.add_argument("--concurrency", type=int, default=BENCH_CONCURRENCY,
+                              help=f"Requests in flight (default: {BENCH_CONCURRENCY}).")
+    bench_parser.add_argument("--rate", type=float,
+                              help="Start this many requests per second instead of keeping a fixed number in "
+                                   "flight. --concurrency caps the requests in flight.")
+    bench_parser.add_argument("-o", "--output", help="Write the results as JSON to this file.")
+    bench_parser.add_argument("--compare", metavar="FILE", help="Compare with the results of a previous run.")
+    bench_parser.add_argument("--no-warm-up", action="store_true",
+                              help="Do not load the model before the measured requests.")
+    bench_parser.add_argument("--no-show-reasoning", action="store_true", help="Do not request the reasoning.")
+    bench_parser.add_argument("-d", "--debug", action="store_true", help="Enable debug mode.")
+
+    # Serve command
+    serve_parser = subparsers.add_parser('serve', help='Serve an OpenAI-compatible API for the configured providers',
+                                         description="Serve /v1/chat/completions and /v1/models on a local port, "
+                                                     "routing each request by its [provider/]model name.")
+    serve_parser.add_argument("--host", help=f"Address to listen on (default: serve.host or {SERVE_HOST}).")
+    serve_parser.add_argument("--port", type=int, help=f"Port to listen on (default: serve.port or {SERVE_PORT}).")
+    serve_parser.add_argument("-d", "--debug", action="store_true", help="Enable debug mode.")
+
+    # Daemon command
+    daemon_parser = subparsers.add_parser('daemon', help='Run the resident daemon that speeds up repeated calls',
+                                          description="Keep the configuration, backends and connections in memory "
+                                                      "and answer generate and list-models calls forwarded through "
+                                                      "a Unix socket. Runs in the foreground by default.")
+    daemon_action = daemon_parser.add_mutually_exclusive_group()
+    daemon_action.add_argument("--background", action="store_true",
+                               help="Start the daemon detached and return once it answers.")
+    daemon_action.add_argument("--status", action="store_true", help="Show whether a daemon is running.")
+    daemon_action.add_argument("--stop", action="store_true", help="Stop the running daemon.")
+    daemon_parser.add_argument("-d", "--debug", action="store_true", help="Enable debug mode.")
+
+    # Show Config command
+    show_config_parser = subparsers.add_parser('show-config', help='Show loaded/detected configuration',
+                                               description="Show loaded/detected configuration.")
+
+    args = parser.parse_args(input_args)
+
+    if not args.command:
+        parser.print_help()
+
+    return args
@@ -0,0 +1,21 @@
+import sys
+
+from src.console import console
+
+
+def print_models(models, args):
+    if args.plain:
+        for model in models:
+            print(model)
+    else:
+        console.print("Available models:", style="bold green")
+        for model in models:
+            console.print(f"- {model}")
+
+
+def report_list_errors(errors: dict, args):
+    for provider, error in errors.items():
+        if args.plain:
+            print(f"ERROR: Failed to list models of {provider}: {error}", file=sys.stderr)
+        else:
+            console.print(f"ERROR: Failed to list models of {provider}: {error}", style="bold red")
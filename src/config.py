@@ -1,9 +1,6 @@
 import os
 from pathlib import Path
 
-import requests
-import yaml
-
 from src.constants import APP_NAME, CONFIG_FILENAME, OLLAMA_DEFAULT_ENDPOINT
 
 
@@ -12,13 +9,6 @@ class ConfigLoader:
         config_home = Path(os.getenv("XDG_CONFIG_HOME") or Path.home() / ".config")
         return config_home / app_name / filename
 
-    def _ollama_is_running(self, base_url) -> bool:
-        try:
-            r = requests.get(f"{base_url}/api/tags", timeout=1)
-            return r.ok
-        except requests.RequestException:
-            return False
-
     def _populate_openrouter(self, config):
         openrouter_key = os.getenv("OPENROUTER_API_KEY")
         if openrouter_key:
@@ -31,19 +21,20 @@ class ConfigLoader:
                 "openrouter"] = "OpenRouter API key not set (env var OPENROUTER_API_KEY)."
 
     def _populate_ollama(self, config):
-        endpoint = OLLAMA_DEFAULT_ENDPOINT
-        if self._ollama_is_running(endpoint):
-            config["providers"]["ollama"] = {
-                "type": "ollama",
-                "base_url": endpoint
-            }
-        else:
-            config.setdefault("not-found", {})[
-                "ollama"] = f"Ollama not running/detected on {OLLAMA_DEFAULT_ENDPOINT}."
+        # Probed by ProviderFactory only when the provider is resolved or listed
+        config.setdefault("discover", {})["ollama"] = {
+            "type": "ollama",
+            "base_url": OLLAMA_DEFAULT_ENDPOINT
+        }
+
+    def config_path(self) -> Path:
+        return self._get_config_path(APP_NAME, CONFIG_FILENAME)
 
     def load_config(self) -> dict:
-        path = self._get_config_path(APP_NAME, CONFIG_FILENAME)
+        path = self.config_path()
         if path.exists():
+            import yaml
+
             with path.open() as f:
                 return yaml.safe_load(f)
         else:
@@ -0,0 +1,20 @@
+class _LazyConsole:
+    """
+    Application-wide rich console. rich is imported on first use, so paths that never print
+    through it (like generate --plain) do not pay for the import.
+    """
+
+    def __init__(self):
+        self._console = None
+
+    def get(self):
+        if self._console is None:
+            from rich.console import Console
+            self._console = Console()
+        return self._console
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+console = _LazyConsole()
@@ -3,3 +3,35 @@ APP_NAME = "ocelot-cli"
 APP_REFERER = "https://github.com/bazoocaze/ocelot-cli"
 APP_DISPLAY_NAME = "Ocelot CLI"
 OLLAMA_DEFAULT_ENDPOINT = "http://localhost:11434"
+HTTP_POOL_SIZE = 10
+HTTP_CONNECT_TIMEOUT = 10
+HTTP_READ_TIMEOUT = 300
+ASYNC_HTTP_POOL_SIZE = 100
+PROVIDER_DISCOVERY_TTL = 120
+MODEL_CATALOG_TTL = 3600
+MODEL_CATALOG_REFRESH_TIMEOUT = 120
+MODEL_LIST_TIMEOUT = 10
+BATCH_CONCURRENCY = 4
+BENCH_CONCURRENCY = 1
+BENCH_REQUESTS = 10
+SERVE_HOST = "127.0.0.1"
+SERVE_PORT = 8765
+SERVE_MAX_REQUEST_SIZE = 16 * 1024 * 1024
+RESPONSE_CACHE_MAX_SIZE = 100 * 1024 * 1024
+RESPONSE_CACHE_TTL = 7 * 24 * 3600
+PREPROCESSOR_MMAP_THRESHOLD = 1024 * 1024
+PREPROCESSOR_MAX_BYTES = 1024 * 1024
+PREPROCESSOR_READ_WORKERS = 8
+COMPLETION_DIR_CACHE_TTL = 2
+COMPLETION_DIR_CACHE_SIZE = 64
+DAEMON_SOCKET_NAME = "daemon.sock"
+DAEMON_PROTOCOL_VERSION = 1
+DAEMON_CONNECT_TIMEOUT = 2
+DAEMON_START_TIMEOUT = 10
+ROUTER_STRATEGIES = ("ordered", "weighted", "fastest")
+ROUTER_EWMA_ALPHA = 0.3
+ROUTER_STATS_TTL = 24 * 3600
+ROUTER_STATS_SAVE_INTERVAL = 10
+ROUTER_UNHEALTHY_ERROR_RATE = 0.5
+ROUTER_ERROR_PENALTY = 30
+HEDGE_DELAY = 2.0
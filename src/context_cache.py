@@ -0,0 +1,40 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from src.paths import cache_path
+
+
+class OllamaContextCache:
+    """
+    Saved Ollama generate contexts, one JSON file per model and context name.
+    """
+
+    def __init__(self, directory: Path = None):
+        self._directory = directory or cache_path("ollama-context")
+
+    def _path(self, base_url: str, model_name: str, name: str) -> Path:
+        key = hashlib.sha256(f"{base_url}\n{model_name}\n{name}".encode("utf-8")).hexdigest()
+        return self._directory / f"{key}.json"
+
+    def load(self, base_url: str, model_name: str, name: str) -> Optional[List[int]]:
+        path = self._path(base_url, model_name, name)
+        try:
+            with path.open() as f:
+                return json.load(f).get("context")
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def save(self, base_url: str, model_name: str, name: str, context: List[int]):
+        path = self._path(base_url, model_name, name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with tmp_path.open("w") as f:
+            json.dump({"model": model_name, "name": name, "updated": time.time(), "context": context}, f)
+        os.replace(tmp_path, path)
+
+    def clear(self, base_url: str, model_name: str, name: str):
+        self._path(base_url, model_name, name).unlink(missing_ok=True)
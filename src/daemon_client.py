@@ -0,0 +1,175 @@
+import json
+import os
+import socket
+import sys
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from src.constants import DAEMON_CONNECT_TIMEOUT, DAEMON_PROTOCOL_VERSION, DAEMON_SOCKET_NAME
+from src.paths import runtime_path
+
+# Set to any value to always run in-process, even when a daemon is running
+NO_DAEMON_ENV = "OCELOT_CLI_NO_DAEMON"
+
+
+def daemon_socket_path() -> Path:
+    return runtime_path(DAEMON_SOCKET_NAME)
+
+
+class DaemonConnection:
+    """
+    One request to the resident daemon: JSON messages, one per line, in both directions.
+    """
+
+    def __init__(self, sock: socket.socket):
+        self._sock = sock
+        self._reader = sock.makefile("rb")
+
+    @classmethod
+    def open(cls, socket_path: Optional[Path] = None) -> Optional["DaemonConnection"]:
+        """
+        Connects and checks that the daemon speaks the same protocol version.
+
+        Returns:
+            The connection, or None when no compatible daemon answers.
+        """
+        socket_path = socket_path or daemon_socket_path()
+        if not os.path.exists(socket_path):
+            return None
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection = cls(sock)
+        try:
+            sock.settimeout(DAEMON_CONNECT_TIMEOUT)
+            sock.connect(str(socket_path))
+            connection.send({"version": DAEMON_PROTOCOL_VERSION})
+            hello = connection.receive()
+            sock.settimeout(None)
+        except (OSError, ValueError):
+            connection.close()
+            return None
+        if hello is None or hello.get("version") != DAEMON_PROTOCOL_VERSION:
+            connection.close()
+            return None
+        return connection
+
+    def send(self, message: dict):
+        self._sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+    def receive(self) -> Optional[dict]:
+        line = self._reader.readline()
+        return json.loads(line) if line else None
+
+    def messages(self) -> Iterator[dict]:
+        """
+        The replies up to the final one, which carries the exit code.
+        """
+        while True:
+            message = self.receive()
+            if message is None:
+                raise RuntimeError("The daemon closed the connection.")
+            yield message
+            if "exit" in message:
+                return
+
+    def close(self):
+        self._reader.close()
+        self._sock.close()
+
+
+def request(command: str, socket_path: Optional[Path] = None) -> Optional[dict]:
+    """
+    Sends a control command (status or stop) and returns the reply, or None when no daemon is running.
+    """
+    connection = DaemonConnection.open(socket_path)
+    if connection is None:
+        return None
+    try:
+        connection.send({"command": command})
+        return connection.receive()
+    finally:
+        connection.close()
+
+
+def forwardable(args) -> bool:
+    # Options that need the caller's process: saved contexts, local statistics files and debug traces
+    if args.command == "generate":
+        return not (args.continue_context or args.stats or args.stats_json or args.debug)
+    if args.command == "list-models":
+        return not (args.refresh_catalog is not None or args.debug)
+    return False
+
+
+def forward(argv: List[str], socket_path: Optional[Path] = None) -> Optional[int]:
+    """
+    Runs generate and list-models in the resident daemon, when one is running.
+
+    Returns:
+        The exit code, or None when the command must run in-process.
+    """
+    if os.getenv(NO_DAEMON_ENV) or not argv or argv[0] not in ("generate", "list-models"):
+        return None
+
+    from src.cli_args import parse_args
+
+    args = parse_args(argv)
+    if not forwardable(args):
+        return None
+    connection = DaemonConnection.open(socket_path)
+    if connection is None:
+        return None
+
+    from src.console import console
+
+    try:
+        if args.command == "generate":
+            return _forward_generate(connection, argv, args)
+        return _forward_list_models(connection, argv, args)
+    except KeyboardInterrupt:
+        # Closing the connection stops the generation in the daemon
+        console.print("Keyboard interrupt detected. Exiting...", style="bold red")
+        return 1
+    except Exception as e:
+        console.print(f"ERROR: {e}", style="bold red")
+        return 1
+    finally:
+        connection.close()
+
+
+def _forward_generate(connection: DaemonConnection, argv: List[str], args) -> int:
+    from src.prompt_preprocessor import PromptPreprocessor
+    from src.token_output import TokenOutput
+
+    # @@ references and standard input belong to the caller, so the prompt is prepared here
+    prompt = args.prompt or sys.stdin.read().strip()
+    connection.send({"command": "run", "argv": argv, "prompt": PromptPreprocessor().process_prompt(prompt)})
+
+    exit_code = 0
+
+    def tokens():
+        nonlocal exit_code
+        for message in connection.messages():
+            if "error" in message:
+                raise RuntimeError(message["error"])
+            if "token" in message:
+                yield message["token"]
+            exit_code = message.get("exit", exit_code)
+
+    TokenOutput(show_reasoning=not args.no_show_reasoning, plain=args.plain).output_tokens(tokens())
+    return exit_code
+
+
+def _forward_list_models(connection: DaemonConnection, argv: List[str], args) -> int:
+    from src.cli_output import print_models, report_list_errors
+
+    connection.send({"command": "run", "argv": argv})
+    exit_code = 0
+    failed = False
+    for message in connection.messages():
+        if "error" in message:
+            raise RuntimeError(message["error"])
+        if "models" in message:
+            report_list_errors(message["errors"], args)
+            print_models(message["models"], args)
+            failed = bool(message["errors"])
+        exit_code = message.get("exit", exit_code)
+    return 1 if failed else exit_code
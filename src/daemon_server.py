@@ -0,0 +1,174 @@
+import json
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from src.base_llm_backend import close_stream
+from src.cli_args import parse_args
+from src.console import console
+from src.constants import DAEMON_PROTOCOL_VERSION
+from src.daemon_client import daemon_socket_path
+from src.provider_factory import ProviderFactory
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            hello = self.receive()
+            self.send({"version": DAEMON_PROTOCOL_VERSION})
+            if hello is None or hello.get("version") != DAEMON_PROTOCOL_VERSION:
+                return
+            request = self.receive()
+            if request is not None:
+                self.server.daemon.handle(request, self.send)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client went away
+
+    def receive(self) -> Optional[dict]:
+        line = self.rfile.readline()
+        return json.loads(line) if line else None
+
+    def send(self, message: dict):
+        self.wfile.write(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class DaemonServer:
+    """
+    Per-user resident process that keeps the configuration, the backends and their keep-alive connections in
+    memory, so CLI calls forwarded through its Unix socket skip the startup cost.
+
+    `handlers` maps a command name to a generator function taking (config, provider_factory, args, request)
+    and yielding the reply messages. The configuration is loaded again when its file changes.
+    """
+
+    def __init__(self, config_loader, handlers: Dict[str, Callable], socket_path: Optional[Path] = None,
+                 debug: bool = False):
+        self._config_loader = config_loader
+        self._handlers = handlers
+        self._socket_path = Path(socket_path or daemon_socket_path())
+        self._debug = debug
+        self._lock = threading.Lock()
+        self._config_mtime = None
+        self._config = None
+        self._provider_factory = None
+        self._server = None
+        self._started = time.time()
+        self._requests = 0
+
+    def _load(self):
+        """
+        Returns the current configuration and provider factory, loading them again when the config file changed.
+        """
+        path = self._config_loader.config_path()
+        mtime = path.stat().st_mtime if path.exists() else None
+        with self._lock:
+            if self._config is None or mtime != self._config_mtime:
+                if self._debug and self._config is not None:
+                    console.print("DEBUG: Configuration changed, reloading", style="bold")
+                # The previous factory is not closed: requests in flight still stream through its sessions
+                self._config = self._config_loader.load_config()
+                self._provider_factory = ProviderFactory(self._config)
+                self._config_mtime = mtime
+            return self._config, self._provider_factory
+
+    def start(self):
+        if socket_in_use(self._socket_path):
+            raise RuntimeError(f"A daemon is already running on {self._socket_path}.")
+
+        _, provider_factory = self._load()
+        # Discovers the providers now, so the first requests do not probe them concurrently
+        provider_factory.all_providers()
+
+        self._socket_path.parent.mkdir(parents=True, exist_ok=True)
+        os.chmod(self._socket_path.parent, 0o700)
+        if self._socket_path.exists():
+            self._socket_path.unlink()  # left by a daemon that did not exit cleanly
+        umask = os.umask(0o077)
+        try:
+            self._server = _UnixServer(str(self._socket_path), _RequestHandler)
+        finally:
+            os.umask(umask)
+        self._server.daemon = self
+
+    def serve_forever(self):
+        previous = signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
+        try:
+            self._server.serve_forever()
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+            self.close()
+
+    def stop(self):
+        # shutdown() waits for serve_forever to return, so it cannot run on the serving thread
+        threading.Thread(target=self._server.shutdown, daemon=True).start()
+
+    def close(self):
+        self._server.server_close()
+        if self._socket_path.exists():
+            self._socket_path.unlink()
+        if self._provider_factory is not None:
+            self._provider_factory.close()
+
+    def status(self) -> dict:
+        return {"pid": os.getpid(), "uptime": time.time() - self._started, "requests": self._requests,
+                "socket": str(self._socket_path)}
+
+    def handle(self, request: dict, send: Callable[[dict], None]):
+        command = request.get("command")
+        if command == "status":
+            send({**self.status(), "exit": 0})
+        elif command == "stop":
+            send({"exit": 0})
+            self.stop()
+        elif command == "run":
+            with self._lock:
+                self._requests += 1
+            self._run(request, send)
+        else:
+            send({"error": f"Unknown daemon command: {command}", "exit": 1})
+
+    def _run(self, request: dict, send: Callable[[dict], None]):
+        messages = None
+        try:
+            args = parse_args(request.get("argv") or [])
+            handler = self._handlers.get(args.command)
+            if handler is None:
+                raise ValueError(f"The daemon does not run '{args.command}'.")
+            config, provider_factory = self._load()
+            messages = handler(config, provider_factory, args, request)
+            for message in messages:
+                send(message)
+        except (BrokenPipeError, ConnectionResetError):
+            raise
+        except SystemExit:
+            send({"error": "Invalid arguments.", "exit": 1})
+            return
+        except Exception as e:
+            if self._debug:
+                console.print(f"DEBUG: Request failed: {e}", style="bold")
+            send({"error": str(e), "exit": 1})
+            return
+        finally:
+            # When the client is gone, this stops the upstream generation
+            close_stream(messages)
+        send({"exit": 0})
+
+
+def socket_in_use(socket_path: Path) -> bool:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(socket_path))
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
@@ -0,0 +1,189 @@
+import asyncio
+import json
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+from src.console import console
+from src.constants import MODEL_LIST_TIMEOUT, SERVE_MAX_REQUEST_SIZE
+from src.model_catalog import ModelCatalog, fetch_models
+from src.model_output import ModelOutput
+
+
+def error_response(status: int, message: str, error_type: str) -> web.Response:
+    return web.json_response({"error": {"message": message, "type": error_type}}, status=status)
+
+
+def message_text(content) -> str:
+    # OpenAI clients may send the content as a list of parts; only the text parts are forwarded
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content if isinstance(content, str) else ""
+
+
+class GatewayServer:
+    """
+    OpenAI-compatible HTTP API in front of the configured providers. The model of each request is a
+    [provider/]model name, served by the async backends, which share one pooled aiohttp session per provider.
+    """
+
+    def __init__(self, provider_factory, api_key: Optional[str] = None, catalog: ModelCatalog = None,
+                 debug: bool = False):
+        self._provider_factory = provider_factory
+        self._api_key = api_key
+        self._catalog = catalog or ModelCatalog()
+        self._debug = debug
+        self._backends: Dict[str, Tuple[str, object]] = {}
+        self._resolve_lock = asyncio.Lock()
+
+    def create_app(self) -> web.Application:
+        @web.middleware
+        async def authorize(request, handler):
+            if self._api_key and request.headers.get("Authorization") != f"Bearer {self._api_key}":
+                return error_response(401, "Invalid or missing API key.", "authentication_error")
+            return await handler(request)
+
+        app = web.Application(middlewares=[authorize], client_max_size=SERVE_MAX_REQUEST_SIZE)
+        app.router.add_get("/v1/models", self.list_models)
+        app.router.add_post("/v1/chat/completions", self.chat_completions)
+        app.on_cleanup.append(self._cleanup)
+        return app
+
+    async def list_models(self, request: web.Request) -> web.Response:
+        providers = await asyncio.to_thread(self._provider_factory.all_providers)
+        outdated = [provider for provider in providers
+                    if self._catalog.models(provider) is None or self._catalog.is_stale(provider)]
+        if outdated:
+            # The sync backends list models from threads, like list-models does
+            models_by_provider, errors = await asyncio.to_thread(fetch_models, self._provider_factory, outdated,
+                                                                 MODEL_LIST_TIMEOUT)
+            self._catalog.update(models_by_provider)
+            if self._debug:
+                for provider, error in errors.items():
+                    console.print(f"DEBUG: Failed to list models of {provider}: {error}", style="bold")
+
+        data = [{"id": f"{provider}/{model}", "object": "model", "created": 0, "owned_by": provider}
+                for provider in providers for model in self._catalog.models(provider) or []]
+        return web.json_response({"object": "list", "data": data})
+
+    async def chat_completions(self, request: web.Request) -> web.StreamResponse:
+        try:
+            body = await request.json()
+        except json.JSONDecodeError:
+            return error_response(400, "The request body is not valid JSON.", "invalid_request_error")
+        if not (isinstance(body, dict) and isinstance(body.get("model"), str)
+                and isinstance(body.get("messages"), list)):
+            return error_response(400, "Expected a 'model' name and a 'messages' list.", "invalid_request_error")
+        messages = [{"role": message.get("role", "user"), "content": message_text(message.get("content"))}
+                    for message in body["messages"] if isinstance(message, dict)]
+
+        try:
+            model, backend = await self._backend(body["model"])
+        except ValueError as e:
+            return error_response(404, str(e), "model_not_found")
+
+        tokens = backend.achat(messages)
+        try:
+            # Waits for the first token, so an upstream failure is still reported with an HTTP status
+            try:
+                first = await anext(tokens, None)
+            except Exception as e:
+                return error_response(502, str(e), "upstream_error")
+            if body.get("stream"):
+                return await self._stream(request, model, first, tokens)
+            return await self._complete(model, first, tokens)
+        finally:
+            # Also runs when the client goes away, which closes the upstream stream
+            await tokens.aclose()
+
+    async def _stream(self, request: web.Request, model: str, first: Optional[str], tokens) -> web.StreamResponse:
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+        chunk_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+
+        async def send(delta: dict, finish_reason: Optional[str] = None):
+            chunk = {"id": chunk_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+            await response.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+
+        await send({"role": "assistant", "content": ""})
+        output = ModelOutput(show_reasoning=False)
+        try:
+            async for delta in self._deltas(output, first, tokens):
+                await send(delta)
+            remaining = output.finish()
+            if remaining:
+                await send({"content": remaining})
+        except ConnectionResetError:
+            raise  # the client went away
+        except Exception as e:
+            # Headers are already sent: the error goes in the stream
+            error = {"error": {"message": str(e), "type": "upstream_error"}}
+            await response.write(f"data: {json.dumps(error)}\n\n".encode("utf-8"))
+        else:
+            await send({}, finish_reason="stop")
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def _complete(self, model: str, first: Optional[str], tokens) -> web.Response:
+        output = ModelOutput(show_reasoning=False)
+        try:
+            async for _ in self._deltas(output, first, tokens):
+                pass
+        except Exception as e:
+            return error_response(502, str(e), "upstream_error")
+        output.finish()
+
+        message = {"role": "assistant", "content": output.content()}
+        if output.reasoning():
+            message["reasoning"] = output.reasoning()
+        return web.json_response({
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": message, "finish_reason": "stop"}],
+        })
+
+    @staticmethod
+    def _split(output: ModelOutput, token: str) -> List[dict]:
+        """
+        Splits a backend token into content and reasoning deltas, the way OpenRouter streams them.
+        """
+        reasoning_count = len(output.reasoning_segments)
+        content = output.add_token(token)
+        reasoning = "".join(output.reasoning_segments[reasoning_count:])
+        return ([{"reasoning": reasoning}] if reasoning else []) + ([{"content": content}] if content else [])
+
+    async def _deltas(self, output: ModelOutput, first: Optional[str], tokens):
+        if first is not None:
+            for delta in self._split(output, first):
+                yield delta
+        async for token in tokens:
+            for delta in self._split(output, token):
+                yield delta
+
+    async def _backend(self, name: str) -> Tuple[str, object]:
+        backend = self._backends.get(name)
+        if backend is not None:
+            return backend
+        async with self._resolve_lock:
+            if name not in self._backends:
+                # Resolving may probe a discoverable provider or read the model catalog, so it runs off the loop
+                self._backends[name] = await asyncio.to_thread(self._resolve, name)
+        return self._backends[name]
+
+    def _resolve(self, name: str) -> Tuple[str, object]:
+        provider_name, model_name = self._provider_factory.parse_model_name(name)
+        backend = self._provider_factory.resolve_async_backend(provider_name, model_name, debug=self._debug,
+                                                               show_reasoning=True)
+        return f"{provider_name}/{model_name}", backend
+
+    async def _cleanup(self, app: web.Application):
+        for _, backend in self._backends.values():
+            await backend.aclose()
+        await self._provider_factory.aclose()
@@ -1,21 +1,81 @@
+import json
 from typing import List, Dict, Union, Generator
 
 import requests
-from rich.console import Console
 
-from src.base_llm_backend import BaseLLMBackend
+from src.base_llm_backend import BaseLLMBackend, RequestError
+from src.console import console
 
-console = Console()
+GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta"
+
+
+class GeminiResponse:
+    def __init__(self, line, debug=False):
+        self.valid = True
+        self.content = ""
+        self.reasoning = ""
+        self.usage = {}
+        self.line = line.decode('utf-8') if isinstance(line, bytes) else line
+        self._debug = debug
+        self._process_line(self.line)
+
+    def _process_line(self, line):
+        if not line.startswith('data: '):
+            self.valid = False
+            return
+        try:
+            self.process_data(json.loads(line[6:]))  # Skip 'data: ' prefix
+        except json.JSONDecodeError:
+            self.valid = False
+            if self._debug:
+                console.print(f"DEBUG: Failed to parse line: {line}", style="bold red")
+
+    @classmethod
+    def from_data(cls, data: dict, debug=False) -> "GeminiResponse":
+        response = cls("", debug)
+        response.valid = True
+        response.process_data(data)
+        return response
+
+    def process_data(self, data: dict):
+        candidates = data.get('candidates') or [{}]
+        for part in candidates[0].get('content', {}).get('parts', []):
+            if part.get('thought'):
+                self.reasoning += part.get('text', '')
+            else:
+                self.content += part.get('text', '')
+        usage = data.get('usageMetadata') or {}
+        self.usage = {name: usage[field] for name, field in (("prompt_tokens", "promptTokenCount"),
+                                                            ("completion_tokens", "candidatesTokenCount"),
+                                                            ("reasoning_tokens", "thoughtsTokenCount"))
+                      if field in usage}
+
+    @property
+    def is_valid(self) -> bool:
+        return self.valid
+
+    @property
+    def is_reasoning(self) -> bool:
+        return bool(self.reasoning)
+
+    @property
+    def is_content(self) -> bool:
+        return bool(self.content)
 
 
 class GeminiBackend(BaseLLMBackend):
     def __init__(self, api_key: str, model_name: str, base_url: str = "http://localhost:11434", debug: bool = False,
-                 show_reasoning: bool = False):
+                 show_reasoning: bool = False, session: requests.Session = None, timeout=None,
+                 include_thoughts: bool = False):
         self._api_key = api_key
         self._model_name = model_name
         self._base_url = base_url
         self._debug = debug
         self._show_reasoning = show_reasoning
+        # Asks thinking models for their thought summaries; models without thinking support reject it
+        self._include_thoughts = include_thoughts
+        self._session = session or requests  # module-level functions when no pooled session is given
+        self._timeout = timeout
 
     def _get_headers(self):
         if not self._api_key:
@@ -28,40 +88,92 @@ class GeminiBackend(BaseLLMBackend):
         }
         return headers
 
-    def _generate_content(self, parts):
-        headers = self._get_headers()
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/{self._model_name}:generateContent"
+    def _request_data(self, parts) -> dict:
         data = {
             "contents": [{
                 "parts": parts
             }]
         }
+        if self._show_reasoning and self._include_thoughts:
+            data["generationConfig"] = {"thinkingConfig": {"includeThoughts": True}}
+        return data
 
-        response = requests.post(url, json=data, headers=headers)
+    def _generate_content(self, parts):
+        headers = self._get_headers()
+        url = f"{GEMINI_API_URL}/models/{self._model_name}:generateContent"
+
+        response = self._session.post(url, json=self._request_data(parts), headers=headers, timeout=self._timeout)
         if response.status_code != 200:
-            raise RuntimeError(f"Request error: {response.status_code} - {response.text}")
+            raise RequestError(response.status_code, response.text)
         if self._debug:
             console.print(f"DEBUG: status={response.status_code}, text={response.json()}", style="bold")
 
-        response_json = response.json()
-        content = response_json.get('candidates', [{}])[0].get('content', {}).get('parts', [{}])[0].get('text', '')
-        yield content
+        result = GeminiResponse.from_data(response.json(), self._debug)
+        if result.is_reasoning:
+            yield f"<think>{result.reasoning}</think>\n\n"
+        yield result.content
+
+    def _stream_content(self, parts):
+        headers = self._get_headers()
+        url = f"{GEMINI_API_URL}/models/{self._model_name}:streamGenerateContent?alt=sse"
+
+        response = self._session.post(url, json=self._request_data(parts), headers=headers, stream=True,
+                                      timeout=self._timeout)
+        self._record_headers(response)
+        if response.status_code != 200:
+            raise RequestError(response.status_code, response.text)
+        yield from self._stream_response(response)
+
+    def _stream_response(self, response: requests.Response) -> Generator[str, None, None]:
+        reasoning = False
+        completed = False
+        try:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = GeminiResponse(line, self._debug)
+                if chunk.usage:
+                    self.last_usage = chunk.usage
+                if chunk.is_reasoning and self._show_reasoning:
+                    if not reasoning:
+                        reasoning = True
+                        yield "<think>"
+                    yield chunk.reasoning
+                if chunk.is_content:
+                    if reasoning:
+                        reasoning = False
+                        yield "</think>\n\n"
+                    yield chunk.content
+                    continue
+                if not chunk.is_reasoning and not chunk.usage and self._debug:
+                    console.print(f"DEBUG: Unknown response: {chunk.line}", style="bold red")
+            completed = True
+        finally:
+            self._release(response, completed)
+        if reasoning:
+            yield "</think>\n\n"
 
     def generate(self, prompt: str, stream: bool = False) -> Union[str, Generator[str, None, None]]:
         parts = [{"text": prompt}]
-        yield from self._generate_content(parts)
+        if stream:
+            yield from self._stream_content(parts)
+        else:
+            yield from self._generate_content(parts)
 
     def chat(self, messages: List[Dict[str, str]], stream: bool = False) -> Union[str, Generator[str, None, None]]:
         parts = [{"text": message["content"]} for message in messages]
-        yield from self._generate_content(parts)
+        if stream:
+            yield from self._stream_content(parts)
+        else:
+            yield from self._generate_content(parts)
 
     def list_models(self) -> List[str]:
         headers = self._get_headers()
-        url = "https://generativelanguage.googleapis.com/v1beta/models"
+        url = f"{GEMINI_API_URL}/models"
 
-        response = requests.get(url, headers=headers)
+        response = self._session.get(url, headers=headers, timeout=self._timeout)
         if response.status_code != 200:
-            raise RuntimeError(f"Request error: {response.status_code} - {response.text}")
+            raise RequestError(response.status_code, response.text)
 
         response_json = response.json()
         models = response_json.get('models', [])
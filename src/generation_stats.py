@@ -0,0 +1,165 @@
+import json
+import time
+from typing import Dict, Generator, Iterable, List, Optional, Union
+
+from src.base_llm_backend import BaseLLMBackend, close_stream
+
+# Upper bounds, in milliseconds, of the inter-token latency histogram buckets
+LATENCY_BUCKETS_MS = (5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class GenerationStats:
+    """
+    Client-side timings of one streamed generation, plus the token counts and durations reported by the
+    server when the backend provides them. Tokens are counted as received stream chunks.
+    """
+
+    def __init__(self, model: str):
+        self.model = model
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self._last_token: Optional[float] = None
+        self.time_to_headers: Optional[float] = None
+        self.time_to_first_token: Optional[float] = None
+        self.total_time: Optional[float] = None
+        self.tokens = 0
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.max_inter_token_latency = 0.0
+        self._inter_token_total = 0.0
+        self.server: Dict[str, float] = {}
+        self.completed = False
+
+    def headers_received(self, seconds: Optional[float] = None):
+        self.time_to_headers = seconds if seconds is not None else time.perf_counter() - self._start
+
+    def token_received(self):
+        now = time.perf_counter()
+        if self._last_token is None:
+            self.time_to_first_token = now - self._start
+        else:
+            gap = now - self._last_token
+            self._inter_token_total += gap
+            self.max_inter_token_latency = max(self.max_inter_token_latency, gap)
+            gap_ms = gap * 1000
+            bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if gap_ms < bound), len(LATENCY_BUCKETS_MS))
+            self.histogram[bucket] += 1
+        self._last_token = now
+        self.tokens += 1
+
+    def finish(self, server: Optional[Dict[str, float]] = None, completed: bool = True):
+        self.total_time = time.perf_counter() - self._start
+        self.server = dict(server or {})
+        self.completed = completed
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        # Decoding rate: the tokens after the first one, over the time since the first one
+        if self.tokens < 2 or self._inter_token_total <= 0:
+            return None
+        return (self.tokens - 1) / self._inter_token_total
+
+    @property
+    def mean_inter_token_latency(self) -> Optional[float]:
+        return self._inter_token_total / (self.tokens - 1) if self.tokens > 1 else None
+
+    def histogram_dict(self) -> Dict[str, int]:
+        labels = [f"<{bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">={LATENCY_BUCKETS_MS[-1]}ms"]
+        return dict(zip(labels, self.histogram))
+
+    def to_dict(self) -> dict:
+        return {
+            "model": self.model,
+            "started": self.started,
+            "completed": self.completed,
+            "time_to_headers": self.time_to_headers,
+            "time_to_first_token": self.time_to_first_token,
+            "total_time": self.total_time,
+            "tokens": self.tokens,
+            "tokens_per_second": self.tokens_per_second,
+            "inter_token_latency": {
+                "mean": self.mean_inter_token_latency,
+                "max": self.max_inter_token_latency if self.tokens > 1 else None,
+                "histogram": self.histogram_dict(),
+            },
+            "server": self.server,
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def format(self) -> str:
+        def seconds(value):
+            return f"{value:.3f}s" if value is not None else "-"
+
+        lines = [
+            f"Model: {self.model}{'' if self.completed else ' (interrupted)'}",
+            f"Time to headers: {seconds(self.time_to_headers)}",
+            f"Time to first token: {seconds(self.time_to_first_token)}",
+            f"Total time: {seconds(self.total_time)}",
+            f"Tokens: {self.tokens}"
+            + (f" ({self.tokens_per_second:.1f} tokens/s)" if self.tokens_per_second else ""),
+        ]
+        if self.tokens > 1:
+            lines.append(f"Inter-token latency: mean {self.mean_inter_token_latency * 1000:.1f}ms, "
+                         f"max {self.max_inter_token_latency * 1000:.1f}ms")
+            lines.append("  " + "  ".join(f"{label}: {count}" for label, count in self.histogram_dict().items()
+                                          if count))
+        if self.server:
+            lines.append("Server: " + ", ".join(f"{name}={value:g}" if isinstance(value, (int, float))
+                                                else f"{name}={value}" for name, value in self.server.items()))
+        return "\n".join(lines)
+
+
+class StatsBackend(BaseLLMBackend):
+    """
+    Wraps a backend and records GenerationStats for every streamed request.
+    """
+
+    def __init__(self, backend: BaseLLMBackend, model: str):
+        self._backend = backend
+        self._model = model
+        self.history: List[GenerationStats] = []
+
+    def __getattr__(self, name):
+        return getattr(self._backend, name)
+
+    @property
+    def last(self) -> Optional[GenerationStats]:
+        return self.history[-1] if self.history else None
+
+    def generate(self, prompt: str, stream: bool = False) -> Union[str, Generator[str, None, None]]:
+        return self._instrument(lambda: self._backend.generate(prompt, stream=stream), stream)
+
+    def chat(self, messages: List[Dict[str, str]], stream: bool = False) -> Union[str, Generator[str, None, None]]:
+        return self._instrument(lambda: self._backend.chat(messages, stream=stream), stream)
+
+    def list_models(self) -> List[str]:
+        return self._backend.list_models()
+
+    def warm_up(self, load: bool = True):
+        self._backend.warm_up(load=load)
+
+    def _instrument(self, request, stream: bool):
+        if not stream:
+            return request()
+        stats = GenerationStats(self._model)
+        self.history.append(stats)
+        self._backend.last_headers_time = None
+        self._backend.last_usage = {}
+        return self._record(stats, request())
+
+    def _record(self, stats: GenerationStats, response: Iterable[str]) -> Generator[str, None, None]:
+        completed = False
+        try:
+            for token in response:
+                if stats.time_to_headers is None:
+                    stats.headers_received(self._backend.last_headers_time)
+                if token:
+                    stats.token_received()
+                yield token
+            completed = True
+        finally:
+            if stats.time_to_headers is None and self._backend.last_headers_time is not None:
+                stats.headers_received(self._backend.last_headers_time)
+            stats.finish(self._backend.last_usage, completed=completed)
+            close_stream(response)
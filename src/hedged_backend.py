@@ -0,0 +1,150 @@
+import queue
+import threading
+from typing import Dict, Generator, List, Optional, Tuple, Union
+
+from src.base_llm_backend import BaseLLMBackend, close_stream
+from src.console import console
+from src.constants import HEDGE_DELAY
+from src.http_pool import RequestScope
+
+
+class _Racer:
+    def __init__(self, name: str, backend: BaseLLMBackend):
+        self.name = name
+        self.backend = backend
+        self.tokens = None
+        self.cancelled = False
+        self.scope = RequestScope()
+
+
+class HedgedBackend(BaseLLMBackend):
+    """
+    Sends each request to a primary backend and, when it has not streamed a first token within `delay` seconds,
+    to a secondary one as well. The first stream to produce a token is kept; the other is cancelled and its
+    connection closed. A primary that fails before its first token hands the request to the secondary at once.
+
+    Each stream is started and read up to its first token by its own thread, so a backend blocked on a slow
+    server does not hold the other one back. A loser is cancelled whether it is still waiting for its response
+    headers or already reading the body, when its backend was resolved with cancellable=True; a connection still
+    being opened is only dropped once open, within the connect timeout. Other backends are abandoned instead: their
+    thread ends and closes the stream once it gets an answer.
+    """
+
+    def __init__(self, primary: BaseLLMBackend, secondary: BaseLLMBackend, primary_name: str, secondary_name: str,
+                 delay: float = HEDGE_DELAY, debug: bool = False):
+        if delay < 0:
+            raise ValueError("The hedge delay cannot be negative.")
+        self._primary = primary
+        self._secondary = secondary
+        self._primary_name = primary_name
+        self._secondary_name = secondary_name
+        self._delay = delay
+        self._debug = debug
+        self.last_winner: Optional[str] = None
+
+    def generate(self, prompt: str, stream: bool = False) -> Union[str, Generator[str, None, None]]:
+        tokens = self._stream(lambda backend: backend.generate(prompt, stream=True))
+        return tokens if stream else "".join(tokens)
+
+    def chat(self, messages: List[Dict[str, str]], stream: bool = False) -> Union[str, Generator[str, None, None]]:
+        tokens = self._stream(lambda backend: backend.chat(messages, stream=True))
+        return tokens if stream else "".join(tokens)
+
+    def list_models(self) -> List[str]:
+        return self._primary.list_models()
+
+    def warm_up(self, load: bool = True):
+        # The secondary only answers slow requests, so its model is not loaded ahead of them
+        self._primary.warm_up(load=load)
+        self._secondary.warm_up(load=False)
+
+    def _stream(self, request) -> Generator[str, None, None]:
+        winner, first = self._race(request)
+        self.last_winner = winner.name
+        self.last_headers_time = winner.backend.last_headers_time
+        try:
+            if first is not None:
+                yield first
+                yield from winner.tokens
+        finally:
+            close_stream(winner.tokens)
+            self.last_usage = winner.backend.last_usage
+
+    def _race(self, request) -> Tuple[_Racer, Optional[str]]:
+        events = queue.Queue()
+        lock = threading.Lock()
+        racers = [_Racer(self._primary_name, self._primary)]
+        self._start(racers[0], request, events, lock)
+        errors = {}
+        winner = None
+        try:
+            while winner is None:
+                hedging = len(racers) == 1
+                try:
+                    racer, first, error = events.get(timeout=self._delay if hedging else None)
+                except queue.Empty:
+                    if self._debug:
+                        console.print(f"DEBUG: No first token from {self._primary_name} after {self._delay:g}s, "
+                                      f"also sending to {self._secondary_name}", style="bold")
+                    racers.append(_Racer(self._secondary_name, self._secondary))
+                    self._start(racers[-1], request, events, lock)
+                    continue
+
+                if error is None:
+                    winner = racer
+                    continue
+                errors[racer.name] = error
+                if self._debug:
+                    console.print(f"DEBUG: {racer.name} failed before the first token: {error}", style="bold")
+                if hedging:
+                    racers.append(_Racer(self._secondary_name, self._secondary))
+                    self._start(racers[-1], request, events, lock)
+                elif len(errors) == len(racers):
+                    # Both failed: the primary error is the one the request would have had without hedging
+                    raise errors[racers[0].name]
+        finally:
+            self._cancel([racer for racer in racers if racer is not winner], events, lock)
+
+        if self._debug and len(racers) > 1:
+            console.print(f"DEBUG: {winner.name} answered first", style="bold")
+        return winner, first
+
+    @staticmethod
+    def _start(racer: _Racer, request, events: queue.Queue, lock: threading.Lock):
+        def run():
+            first = error = None
+            try:
+                with racer.scope:
+                    racer.tokens = request(racer.backend)
+                    # A racer cancelled while waiting for the response headers does not wait for a token as well
+                    if not racer.cancelled:
+                        first = next(iter(racer.tokens), None)
+            except Exception as e:
+                error = e
+            with lock:
+                cancelled = racer.cancelled
+                if not cancelled:
+                    events.put((racer, first, error))
+            if cancelled:
+                # Lost the race while still connecting: the stream is dropped as soon as it is open
+                close_stream(racer.tokens)
+
+        # Daemon threads, so a server that never answers does not keep the process alive
+        threading.Thread(target=run, daemon=True).start()
+
+    @staticmethod
+    def _cancel(losers: List[_Racer], events: queue.Queue, lock: threading.Lock):
+        with lock:
+            for racer in losers:
+                racer.cancelled = True
+        for racer in losers:
+            # Wakes a thread blocked waiting for the response; it then closes the stream itself
+            racer.scope.cancel()
+        # Losers that reached their first token before being cancelled are closed here
+        while True:
+            try:
+                racer, _, _ = events.get_nowait()
+            except queue.Empty:
+                break
+            if racer in losers:
+                close_stream(racer.tokens)
@@ -0,0 +1,38 @@
+from typing import Dict, List, Optional
+
+from src.base_llm_backend import BaseLLMBackend
+from src.model_output import ModelOutput
+
+SUMMARY_INSTRUCTIONS = ("Summarize the conversation below in a few short paragraphs. Keep the facts, decisions, "
+                        "names, file names and open questions that later messages may refer to. Answer with the "
+                        "summary only.")
+
+# Longer messages (usually file attachments) are cut before summarizing
+SUMMARY_MESSAGE_CHARS = 4000
+
+
+class HistorySummarizer:
+    """
+    Condenses chat turns that no longer fit the token budget, usually with a small and cheap model.
+    """
+
+    def __init__(self, backend: BaseLLMBackend):
+        self._backend = backend
+
+    def summarize(self, previous_summary: Optional[str], messages: List[Dict[str, str]]) -> str:
+        parts = []
+        if previous_summary:
+            parts.append(f"Summary of the conversation so far:\n{previous_summary}")
+        for message in messages:
+            content = message["content"]
+            if len(content) > SUMMARY_MESSAGE_CHARS:
+                content = content[:SUMMARY_MESSAGE_CHARS] + " [...]"
+            parts.append(f"{message['role']}: {content}")
+
+        request = [{"role": "system", "content": SUMMARY_INSTRUCTIONS},
+                   {"role": "user", "content": "\n\n".join(parts)}]
+        output = ModelOutput(show_reasoning=False)
+        for token in self._backend.chat(request, stream=True):
+            output.add_token(token)
+        output.finish()
+        return output.content().strip()
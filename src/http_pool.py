@@ -0,0 +1,140 @@
+import socket
+import threading
+from typing import Dict, Optional, Tuple
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from src.constants import HTTP_CONNECT_TIMEOUT, HTTP_POOL_SIZE, HTTP_READ_TIMEOUT
+
+
+def http_timeout(settings: dict) -> Tuple[float, float]:
+    return (settings.get("connect_timeout", HTTP_CONNECT_TIMEOUT),
+            settings.get("read_timeout", HTTP_READ_TIMEOUT))
+
+
+_local = threading.local()
+
+# Cancellable sessions subclass the urllib3 connection classes; with another major version they fall back to the
+# stock adapter, and a request can then only be abandoned, not interrupted
+CANCELLABLE_SESSIONS = urllib3.__version__.split(".")[0] == "2"
+
+
+class RequestScope:
+    """
+    The requests that one thread sends through a cancellable session while inside `with scope:`. Another thread can
+    cancel them at any point: waiting for the response headers, or reading the body. Their socket is shut down,
+    so the blocked read fails at once and the connection is dropped.
+
+    A connection still being opened is not interrupted: it is cancelled as soon as it is open, so the wait is
+    bounded by the connect timeout.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._socket: Optional[socket.socket] = None
+        self.cancelled = False
+
+    def __enter__(self):
+        _local.scope = self
+        return self
+
+    def __exit__(self, *exc_info):
+        _local.scope = None
+        with self._lock:
+            self._socket = None
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            if self._socket is not None:
+                _shutdown(self._socket)
+
+    def _sent(self, sock: Optional[socket.socket]):
+        with self._lock:
+            # The socket itself is kept: a response read until the connection closes detaches it from the connection
+            self._socket = sock
+            if self.cancelled and sock is not None:
+                _shutdown(sock)
+
+
+def _shutdown(sock: socket.socket):
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass  # already closed
+
+
+class _ScopedConnection:
+    def request(self, *args, **kwargs):
+        # Opens the connection when needed; a scope cancelled meanwhile does not wait for the response
+        super().request(*args, **kwargs)
+        scope = getattr(_local, "scope", None)
+        if scope is not None:
+            scope._sent(self.sock)
+
+
+class _ScopedHTTPConnection(_ScopedConnection, HTTPConnection):
+    pass
+
+
+class _ScopedHTTPSConnection(_ScopedConnection, HTTPSConnection):
+    pass
+
+
+class _ScopedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _ScopedHTTPConnection
+
+
+class _ScopedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _ScopedHTTPSConnection
+
+
+class _ScopedAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        if isinstance(getattr(self.poolmanager, "pool_classes_by_scheme", None), dict):
+            self.poolmanager.pool_classes_by_scheme = {"http": _ScopedHTTPConnectionPool,
+                                                       "https": _ScopedHTTPSConnectionPool}
+
+
+def create_session(settings: dict, cancellable: bool = False) -> requests.Session:
+    """
+    Args:
+        cancellable (bool): Lets a RequestScope interrupt the requests of the session. Such a session must serve one
+            backend only, so that the sockets a scope holds are never lent to another one.
+    """
+    pool_size = settings.get("pool_size", HTTP_POOL_SIZE)
+    adapter_class = _ScopedAdapter if cancellable and CANCELLABLE_SESSIONS else HTTPAdapter
+    adapter = adapter_class(pool_connections=pool_size, pool_maxsize=pool_size)
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if not settings.get("keep_alive", True):
+        session.headers["Connection"] = "close"
+    return session
+
+
+class HttpSessionPool:
+    """
+    Keep-alive HTTP sessions, one per provider, created on first use.
+    """
+
+    def __init__(self):
+        self._sessions: Dict[str, requests.Session] = {}
+
+    def get(self, provider_name: str, settings: Optional[dict] = None) -> requests.Session:
+        session = self._sessions.get(provider_name)
+        if session is None:
+            session = create_session(settings or {})
+            self._sessions[provider_name] = session
+        return session
+
+    def close(self):
+        for session in self._sessions.values():
+            session.close()
+        self._sessions.clear()
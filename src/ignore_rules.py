@@ -0,0 +1,122 @@
+import os
+import re
+from typing import List, Optional, Pattern, Tuple
+
+GIT_DIR = ".git"
+IGNORE_FILE = ".gitignore"
+
+
+def glob_to_regex(pattern: str) -> str:
+    """
+    Translates a glob with '**' support into a regular expression matching '/' separated paths.
+    """
+    regex = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            regex.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            regex.append(".*")
+            i += 2
+            continue
+        if char == "*":
+            regex.append("[^/]*")
+        elif char == "?":
+            regex.append("[^/]")
+        elif char == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                regex.append(re.escape(char))
+            else:
+                group = pattern[i + 1:end]
+                if group.startswith("!"):
+                    group = "^" + group[1:]
+                regex.append(f"[{group}]")
+                i = end
+        else:
+            regex.append(re.escape(char))
+        i += 1
+    return "".join(regex)
+
+
+class _Rule:
+    def __init__(self, line: str):
+        self.negated = line.startswith("!")
+        if self.negated:
+            line = line[1:]
+        elif line.startswith("\\"):
+            line = line[1:]
+        self.dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        # A slash at the start or in the middle anchors the pattern to the .gitignore directory
+        self.anchored = "/" in line
+        self.regex: Pattern = re.compile(glob_to_regex(line.lstrip("/")) + r"\Z")
+
+    def matches(self, relative_path: str, is_dir: bool) -> bool:
+        if self.dir_only and not is_dir:
+            return False
+        target = relative_path if self.anchored else relative_path.rsplit("/", 1)[-1]
+        return self.regex.match(target) is not None
+
+
+def _read_rules(directory: str) -> List[_Rule]:
+    try:
+        with open(os.path.join(directory, IGNORE_FILE), encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except (OSError, UnicodeDecodeError):
+        return []
+    return [_Rule(line.rstrip()) for line in lines if line.strip() and not line.startswith("#")]
+
+
+class IgnoreRules:
+    """
+    .gitignore rules in effect for a directory: the files of the directory itself and of its parents up
+    to the repository root. Deeper files and later lines take precedence, as in git.
+    """
+
+    def __init__(self, rule_sets: Optional[List[Tuple[str, List[_Rule]]]] = None):
+        self._rule_sets = rule_sets or []
+
+    @classmethod
+    def for_directory(cls, directory: str) -> "IgnoreRules":
+        directory = os.path.realpath(directory)
+        parents = []
+        current = directory
+        while True:
+            parents.append(current)
+            parent = os.path.dirname(current)
+            if os.path.isdir(os.path.join(current, GIT_DIR)) or parent == current:
+                break
+            current = parent
+        rule_sets = [(path, rules) for path in reversed(parents) if (rules := _read_rules(path))]
+        return cls(rule_sets)
+
+    def child(self, directory: str) -> "IgnoreRules":
+        """
+        Rules for a subdirectory, adding its own .gitignore when it has one.
+        """
+        rules = _read_rules(directory)
+        if not rules:
+            return self
+        return IgnoreRules(self._rule_sets + [(os.path.realpath(directory), rules)])
+
+    def is_ignored(self, path: str, is_dir: bool) -> bool:
+        """
+        Args:
+            path (str): Resolved absolute path, as built from the directory given to for_directory().
+            is_dir (bool): The path is a directory.
+        """
+        if is_dir and os.path.basename(path) == GIT_DIR:
+            return True
+        ignored = False
+        for base, rules in self._rule_sets:
+            if not path.startswith(base + os.sep):
+                continue
+            relative_path = path[len(base) + 1:].replace(os.sep, "/")
+            for rule in rules:
+                if rule.matches(relative_path, is_dir):
+                    ignored = not rule.negated
+        return ignored
@@ -0,0 +1,81 @@
+from typing import List, Optional
+
+
+class MarkdownBlockSplitter:
+    """
+    Splits streamed Markdown text into finished blocks and a still-open tail.
+
+    A block is finished when it is followed by a blank line (or a closing code fence) and the next
+    non-blank line starts a new top-level block. Text is scanned once, line by line, so the work per
+    fed chunk depends only on the chunk size and the open block.
+    """
+
+    def __init__(self):
+        self._pending = ""
+        self._scan_pos = 0
+        self._fence: Optional[str] = None
+        self._boundary: Optional[int] = None
+        self._has_content = False
+
+    @property
+    def pending(self) -> str:
+        return self._pending
+
+    def feed(self, text: str) -> List[str]:
+        """
+        Appends streamed text and returns the blocks that became finished.
+        """
+        if not text:
+            return []
+        self._pending += text
+
+        blocks = []
+        while True:
+            # A non-indented line after a blank line (or closed fence) starts a new block
+            if self._boundary is not None and self._scan_pos < len(self._pending) \
+                    and not self._pending[self._scan_pos].isspace():
+                blocks.append(self._take_block())
+
+            end = self._pending.find("\n", self._scan_pos)
+            if end < 0:
+                break
+            line = self._pending[self._scan_pos:end]
+            self._scan_pos = end + 1
+            self._process_line(line)
+        return blocks
+
+    def flush(self) -> str:
+        """
+        Returns the remaining text and resets the splitter.
+        """
+        rest = self._pending
+        self.__init__()
+        return rest
+
+    def _take_block(self) -> str:
+        block = self._pending[:self._boundary]
+        self._pending = self._pending[self._boundary:]
+        self._scan_pos -= self._boundary
+        self._boundary = None
+        self._has_content = False
+        return block
+
+    def _process_line(self, line: str):
+        stripped = line.strip()
+
+        if self._fence:
+            if stripped.startswith(self._fence) and not stripped.strip(self._fence[0]):
+                self._fence = None
+                self._boundary = self._scan_pos
+            return
+
+        if not stripped:
+            if self._has_content:
+                self._boundary = self._scan_pos
+            return
+
+        self._has_content = True
+        self._boundary = None
+        indent = len(line) - len(line.lstrip(" "))
+        if indent < 4 and stripped[:3] in ("```", "~~~"):
+            self._fence = stripped[:len(stripped) - len(stripped.lstrip(stripped[0]))]
@@ -0,0 +1,130 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from src.constants import MODEL_CATALOG_REFRESH_TIMEOUT, MODEL_CATALOG_TTL
+from src.paths import cache_path
+
+
+class ModelCatalog:
+    """
+    On-disk catalog of the models of each provider, used by list-models --cached, shell completion
+    and model name resolution.
+    """
+
+    def __init__(self, path: Path = None, ttl: float = MODEL_CATALOG_TTL):
+        self._path = path or cache_path("model_catalog.json")
+        self._ttl = ttl
+
+    def _load(self) -> dict:
+        try:
+            with self._path.open() as f:
+                return json.load(f).get("providers", {})
+        except (OSError, json.JSONDecodeError, AttributeError):
+            return {}
+
+    def models(self, provider_name: str) -> Optional[List[str]]:
+        entry = self._load().get(provider_name)
+        return entry["models"] if entry else None
+
+    def is_stale(self, provider_name: str) -> bool:
+        entry = self._load().get(provider_name)
+        return entry is None or time.time() - entry["updated"] >= self._ttl
+
+    def claim_refresh(self, timeout: float = MODEL_CATALOG_REFRESH_TIMEOUT) -> bool:
+        """
+        Marks a background refresh as in flight, so that the calls made meanwhile, such as one per TAB, do not
+        start their own. Returns False while another refresh started less than timeout seconds ago.
+        """
+        marker = self._refresh_marker()
+        try:
+            marker.parent.mkdir(parents=True, exist_ok=True)
+            if time.time() - self._refresh_started(marker) >= timeout:
+                # Left by a refresh that crashed or hung, if any
+                marker.unlink(missing_ok=True)
+            fd = os.open(marker, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+        except OSError:
+            # Another refresh claimed it first, or the catalog directory cannot be written either
+            return False
+        with os.fdopen(fd, "w") as f:
+            f.write(str(time.time()))
+        return True
+
+    def finish_refresh(self):
+        try:
+            self._refresh_marker().unlink(missing_ok=True)
+        except OSError:
+            pass
+
+    def _refresh_marker(self) -> Path:
+        return self._path.with_suffix(".refresh")
+
+    @staticmethod
+    def _refresh_started(marker: Path) -> float:
+        try:
+            return float(marker.read_text())
+        except ValueError:
+            return marker.stat().st_mtime  # not written yet by the refresh that created it
+        except FileNotFoundError:
+            return 0.0
+
+    def find_providers(self, model_name: str) -> List[str]:
+        return [provider for provider, entry in self._load().items() if model_name in entry["models"]]
+
+    def update(self, models_by_provider: Dict[str, List[str]]):
+        if not models_by_provider:
+            return
+        providers = self._load()
+        now = time.time()
+        for provider_name, models in models_by_provider.items():
+            providers[provider_name] = {"models": models, "updated": now}
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._path.with_suffix(f".{os.getpid()}.tmp")
+            with tmp_path.open("w") as f:
+                json.dump({"providers": providers}, f)
+            os.replace(tmp_path, self._path)
+        except OSError:
+            pass
+
+
+def fetch_models(provider_factory, providers: List[str], timeout: float,
+                 debug: bool = False) -> Tuple[Dict[str, List[str]], Dict[str, str]]:
+    """
+    Lists the models of the given providers in parallel.
+
+    Returns:
+        Tuple of the models per provider and the error per provider that failed or did not answer in time.
+    """
+    results = {}
+    errors = {}
+    lock = threading.Lock()
+
+    def fetch(provider_name):
+        try:
+            backend = provider_factory.resolve_backend(provider_name=provider_name, debug=debug)
+            models = backend.list_models()
+            with lock:
+                results[provider_name] = models
+        except Exception as e:
+            with lock:
+                errors[provider_name] = e
+
+    # Daemon threads, so a provider that hangs does not keep the process alive after the deadline
+    threads = [threading.Thread(target=fetch, args=(provider,), daemon=True) for provider in providers]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + timeout
+    for thread in threads:
+        thread.join(max(0.0, deadline - time.monotonic()))
+
+    with lock:
+        models = dict(results)
+        failures = {provider: str(error) for provider, error in errors.items()}
+    for provider_name in providers:
+        if provider_name not in models and provider_name not in failures:
+            failures[provider_name] = f"no answer within {timeout:g}s"
+    return models, failures
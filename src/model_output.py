@@ -1,30 +1,99 @@
+from typing import List
+
+THINK_OPEN_TAG = "<think>"
+THINK_CLOSE_TAG = "</think>"
+
+
 class ModelOutput:
+    """
+    Streaming scanner that separates <think> reasoning from visible content.
+
+    Each token is scanned once, together with a carry-over of at most one tag length for tags split
+    across tokens. Visible content and reasoning are kept as append-only segments.
+    """
+
     def __init__(self, show_reasoning: bool = True):
-        self._buffer = ""
         self._reasoning = False
         self._show_reasoning = show_reasoning
-        self._content = ""
-
-    def add_token(self, token: str):
-        self._buffer += token
-        if not self._show_reasoning:
-            if "<think>" in self._buffer:
-                if "</think>" in self._buffer:
-                    # Remove think tags and their content
-                    start = self._buffer.find("<think>")
-                    end = self._buffer.find("</think>") + len("</think>")
-                    self._buffer = self._buffer[:start] + self._buffer[end:]
-                    self._reasoning = False
-                else:
-                    self._reasoning = True
-            self._content = self._buffer
-        else:
-            # Escape think tags if not hiding
-            self._content = self._buffer.replace(
-                "<think>", "\\<think\\>").replace(
-                "</think>", "\\</think\\>")
-
-    def content(self):
-        if self._reasoning and not self._show_reasoning:
-            return ""
-        return self._content
+        self._carry = ""
+        self._content_segments: List[str] = []
+        self._reasoning_segments: List[str] = []
+        self._content_cache = ""
+        self._content_cache_count = 0
+
+    def add_token(self, token: str) -> str:
+        """
+        Scans a new token and returns the text appended to the visible content.
+        """
+        text = self._carry + token
+        self._carry = ""
+        added = []
+        pos = 0
+        while pos < len(text):
+            tag = THINK_CLOSE_TAG if self._reasoning else THINK_OPEN_TAG
+            index = text.find(tag, pos)
+            if index < 0:
+                keep = self._partial_tag_length(text, tag, pos)
+                self._append(text[pos:len(text) - keep], added)
+                self._carry = text[len(text) - keep:]
+                break
+            self._append(text[pos:index], added)
+            self._switch_reasoning(added)
+            pos = index + len(tag)
+        return "".join(added)
+
+    def finish(self) -> str:
+        """
+        Releases a pending partial tag at the end of the stream as plain text.
+        """
+        added = []
+        self._append(self._carry, added)
+        self._carry = ""
+        return "".join(added)
+
+    def content(self) -> str:
+        if self._content_cache_count != len(self._content_segments):
+            self._content_cache = "".join(self._content_segments)
+            self._content_cache_count = len(self._content_segments)
+        return self._content_cache
+
+    def reasoning(self) -> str:
+        return "".join(self._reasoning_segments)
+
+    @property
+    def content_segments(self) -> List[str]:
+        return self._content_segments
+
+    @property
+    def reasoning_segments(self) -> List[str]:
+        return self._reasoning_segments
+
+    @property
+    def is_reasoning(self) -> bool:
+        return self._reasoning
+
+    def _append(self, text: str, added: List[str]):
+        if not text:
+            return
+        if self._reasoning:
+            self._reasoning_segments.append(text)
+            if not self._show_reasoning:
+                return
+        self._content_segments.append(text)
+        added.append(text)
+
+    def _switch_reasoning(self, added: List[str]):
+        if self._show_reasoning:
+            # Escape think tags so Markdown renders them literally
+            escaped = "\\</think\\>" if self._reasoning else "\\<think\\>"
+            self._content_segments.append(escaped)
+            added.append(escaped)
+        self._reasoning = not self._reasoning
+
+    @staticmethod
+    def _partial_tag_length(text: str, tag: str, start: int) -> int:
+        # Longest suffix of text (after start) that is a proper prefix of tag
+        for length in range(min(len(tag) - 1, len(text) - start), 0, -1):
+            if text.endswith(tag[:length]):
+                return length
+        return 0
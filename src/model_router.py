@@ -0,0 +1,283 @@
+import atexit
+import json
+import os
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Generator, List, Optional, Tuple, Union
+
+import requests
+
+from src.base_llm_backend import BaseLLMBackend, RequestError, close_stream
+from src.console import console
+from src.constants import (ROUTER_ERROR_PENALTY, ROUTER_EWMA_ALPHA, ROUTER_STATS_SAVE_INTERVAL, ROUTER_STATS_TTL,
+                           ROUTER_STRATEGIES, ROUTER_UNHEALTHY_ERROR_RATE)
+from src.paths import cache_path
+
+
+def is_failover_error(error: Exception) -> bool:
+    """
+    Whether an error is worth another target: a lost or timed out connection, or an overloaded or failing
+    server, but not a rejected request.
+    """
+    if isinstance(error, RequestError):
+        return error.status == 429 or 500 <= error.status < 600
+    if isinstance(error, (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError,
+                          ConnectionError, TimeoutError)):
+        return True
+    # aiohttp is only loaded by the async backends
+    aiohttp = sys.modules.get("aiohttp")
+    return aiohttp is not None and isinstance(error, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError))
+
+
+class RouteTarget:
+    def __init__(self, provider_name: str, model_name: str, weight: float = 1.0):
+        if weight <= 0:
+            raise ValueError(f"The weight of {provider_name}/{model_name} must be positive.")
+        self.provider_name = provider_name
+        self.model_name = model_name
+        self.weight = weight
+
+    @property
+    def name(self) -> str:
+        return f"{self.provider_name}/{self.model_name}"
+
+
+class RouterStats:
+    """
+    Moving averages of the time to first token and of the error rate of each provider/model, kept on disk
+    so every run starts from what the previous ones measured. Entries not updated within ttl seconds are
+    forgotten, so a target that failed yesterday is tried again.
+
+    Attempts are recorded in memory and saved at most every save_interval seconds, and on close or at exit.
+    """
+
+    def __init__(self, path: Path = None, alpha: float = ROUTER_EWMA_ALPHA, ttl: float = ROUTER_STATS_TTL,
+                 save_interval: float = ROUTER_STATS_SAVE_INTERVAL):
+        self._path = path or cache_path("router_stats.json")
+        self._alpha = alpha
+        self._ttl = ttl
+        self._save_interval = save_interval
+        self._lock = threading.Lock()
+        self._targets = self._load()
+        # Entries recorded since the last save
+        self._changed: Dict[str, dict] = {}
+        self._saved = time.monotonic()
+        atexit.register(self.flush)
+
+    def _load(self) -> dict:
+        try:
+            with self._path.open() as f:
+                return json.load(f).get("targets", {})
+        except (OSError, json.JSONDecodeError, AttributeError):
+            return {}
+
+    def get(self, name: str) -> Optional[dict]:
+        entry = self._targets.get(name)
+        if entry is None or time.time() - entry["updated"] >= self._ttl:
+            return None
+        return entry
+
+    def record(self, name: str, time_to_first_token: Optional[float]):
+        """
+        Records one attempt: its time to first token, or None when it failed before the first token.
+        """
+        error = 1.0 if time_to_first_token is None else 0.0
+        with self._lock:
+            entry = self._targets.get(name)
+            if entry is None or time.time() - entry["updated"] >= self._ttl:
+                entry = {"ttft": time_to_first_token, "error_rate": error}
+            else:
+                entry["error_rate"] += self._alpha * (error - entry["error_rate"])
+                if time_to_first_token is not None:
+                    ttft = entry.get("ttft")
+                    entry["ttft"] = (time_to_first_token if ttft is None
+                                     else ttft + self._alpha * (time_to_first_token - ttft))
+            entry["updated"] = time.time()
+            self._targets[name] = entry
+            self._changed[name] = entry
+            if time.monotonic() - self._saved >= self._save_interval:
+                self._save()
+
+    def flush(self):
+        """
+        Saves the attempts recorded since the last save.
+        """
+        with self._lock:
+            if self._changed:
+                self._save()
+
+    def close(self):
+        self.flush()
+        atexit.unregister(self.flush)
+
+    def _save(self):
+        # Other processes may have saved attempts since this one loaded the file; their entries are kept, except
+        # for the targets measured here
+        targets = self._load()
+        targets.update(self._changed)
+        self._targets = targets
+        self._changed = {}
+        self._saved = time.monotonic()
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._path.with_suffix(f".{os.getpid()}.tmp")
+            with tmp_path.open("w") as f:
+                json.dump({"targets": targets}, f)
+            os.replace(tmp_path, self._path)
+        except OSError:
+            pass
+
+    def expected_wait(self, name: str) -> Optional[float]:
+        """
+        Expected seconds until the first token, counting a failed attempt as a fixed penalty. None when the
+        target was not measured recently.
+        """
+        entry = self.get(name)
+        if entry is None:
+            return None
+        ttft = entry["ttft"] if entry.get("ttft") is not None else ROUTER_ERROR_PENALTY
+        return ttft * (1 - entry["error_rate"]) + ROUTER_ERROR_PENALTY * entry["error_rate"]
+
+
+class RoutedBackend(BaseLLMBackend):
+    """
+    Backend for a model alias: each request goes to one of several provider/model targets, in an order given
+    by the alias strategy and the recent measurements of each target.
+
+    - ordered: the configured order, with targets whose recent error rate is high moved last.
+    - weighted: the first target is drawn by weight, scaled down by its expected wait; the others follow
+      from the fastest.
+    - fastest: from the lowest expected wait; targets without recent measurements are tried first.
+
+    A connection error, timeout or server error before the first token moves the request to the next target.
+    Once a token has been streamed, errors are raised as they are.
+    """
+
+    def __init__(self, alias: str, targets: List[RouteTarget], resolve: Callable[[RouteTarget], BaseLLMBackend],
+                 strategy: str = "ordered", stats: RouterStats = None, debug: bool = False):
+        if not targets:
+            raise ValueError(f"Model alias '{alias}' has no targets.")
+        if strategy not in ROUTER_STRATEGIES:
+            raise ValueError(f"Unknown routing strategy '{strategy}' for '{alias}'. Available: "
+                             f"{list(ROUTER_STRATEGIES)}")
+        self._alias = alias
+        self._targets = targets
+        self._resolve = resolve
+        self._strategy = strategy
+        self._stats = stats or RouterStats()
+        self._debug = debug
+        self._backends: Dict[str, BaseLLMBackend] = {}
+        self.last_target: Optional[str] = None
+
+    def _backend(self, target: RouteTarget) -> BaseLLMBackend:
+        # Resolved on first use, so a provider that is never reached is never probed
+        if target.name not in self._backends:
+            self._backends[target.name] = self._resolve(target)
+        return self._backends[target.name]
+
+    def route(self) -> List[RouteTarget]:
+        """
+        The targets in the order they will be tried for the next request.
+        """
+        if self._strategy == "ordered":
+            return sorted(self._targets, key=self._unhealthy)
+        by_wait = sorted(self._targets, key=lambda target: self._stats.expected_wait(target.name) or 0.0)
+        if self._strategy == "fastest":
+            return by_wait
+
+        waits = [self._stats.expected_wait(target.name) for target in self._targets]
+        measured = [wait for wait in waits if wait]
+        # Targets without measurements are scaled as an average one
+        default_wait = sum(measured) / len(measured) if measured else 1.0
+        scores = [target.weight / (wait or default_wait) for target, wait in zip(self._targets, waits)]
+        first = random.choices(self._targets, weights=scores)[0]
+        return [first] + [target for target in by_wait if target is not first]
+
+    def _unhealthy(self, target: RouteTarget) -> bool:
+        entry = self._stats.get(target.name)
+        return entry is not None and entry["error_rate"] >= ROUTER_UNHEALTHY_ERROR_RATE
+
+    def generate(self, prompt: str, stream: bool = False) -> Union[str, Generator[str, None, None]]:
+        tokens = self._stream(lambda backend: backend.generate(prompt, stream=True))
+        return tokens if stream else "".join(tokens)
+
+    def chat(self, messages: List[Dict[str, str]], stream: bool = False) -> Union[str, Generator[str, None, None]]:
+        tokens = self._stream(lambda backend: backend.chat(messages, stream=True))
+        return tokens if stream else "".join(tokens)
+
+    def warm_up(self, load: bool = True):
+        # Warms the first target that answers; the others are recorded as failed, as a request would
+        for target in self.route():
+            try:
+                self._backend(target).warm_up(load=load)
+                return
+            except Exception as e:
+                if target.name in self._backends and not is_failover_error(e):
+                    raise
+                self._stats.record(target.name, None)
+                if self._debug:
+                    console.print(f"DEBUG: {target.name} skipped during warm-up: {e}", style="bold")
+
+    def _stream(self, request) -> Generator[str, None, None]:
+        failures = []
+        for target in self.route():
+            start = time.perf_counter()
+            tokens = None
+            try:
+                # A provider that cannot be resolved, such as an Ollama server that is not running, is skipped
+                backend = self._backend(target)
+                tokens = request(backend)
+                first = next(iter(tokens), None)
+            except Exception as e:
+                close_stream(tokens)
+                self._stats.record(target.name, None)
+                if target.name in self._backends and not is_failover_error(e):
+                    raise
+                if self._debug:
+                    console.print(f"DEBUG: {target.name} failed before the first token: {e}", style="bold")
+                failures.append(f"{target.name}: {e}")
+                continue
+
+            self._stats.record(target.name, time.perf_counter() - start)
+            self.last_target = target.name
+            self.last_headers_time = backend.last_headers_time
+            if self._debug:
+                console.print(f"DEBUG: {self._alias} routed to {target.name}", style="bold")
+            try:
+                if first is not None:
+                    yield first
+                    yield from tokens
+            finally:
+                close_stream(tokens)
+                self.last_usage = backend.last_usage
+            return
+        raise RuntimeError(f"All targets of '{self._alias}' failed: {'; '.join(failures)}")
+
+
+def parse_alias(alias: str, alias_cfg) -> Tuple[str, List[Tuple[str, float]]]:
+    """
+    Reads an alias of the `aliases` config section: a list of [provider/]model names, or a mapping with the
+    `targets` (names, or {model, weight} entries) and an optional `strategy`.
+
+    Returns:
+        Tuple of the strategy and the list of (name, weight) targets.
+    """
+    if isinstance(alias_cfg, list):
+        alias_cfg = {"targets": alias_cfg}
+    if not isinstance(alias_cfg, dict) or not isinstance(alias_cfg.get("targets"), list):
+        raise ValueError(f"Model alias '{alias}' must be a list of targets or have a 'targets' list.")
+
+    targets = []
+    for entry in alias_cfg["targets"]:
+        if isinstance(entry, str):
+            targets.append((entry, None))
+        elif isinstance(entry, dict) and isinstance(entry.get("model"), str):
+            targets.append((entry["model"], entry.get("weight")))
+        else:
+            raise ValueError(f"Invalid target of model alias '{alias}': {entry!r}")
+    weighted = any(weight is not None for _, weight in targets)
+    strategy = alias_cfg.get("strategy") or ("weighted" if weighted else "ordered")
+    return strategy, [(name, weight if weight is not None else 1.0) for name, weight in targets]
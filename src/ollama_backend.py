@@ -1,17 +1,41 @@
 import json
-from typing import List, Dict, Union, Generator
+import threading
+import time
+from typing import List, Dict, Union, Generator, Optional
 
 import requests
-from rich.console import Console
 
-console = Console()
-from src.base_llm_backend import BaseLLMBackend  # Updated import path
+from src.base_llm_backend import BaseLLMBackend, RequestError
+from src.console import console
+
+NANOSECONDS = 1_000_000_000
+
+
+def model_candidates(model_name: str, fallbacks: Dict[str, List[str]], installed: List[str] = None) -> List[str]:
+    """
+    Returns the models that can serve a requested name, in order of preference. A name without a
+    tag is ambiguous when several tags of it are installed.
+    """
+    if model_name in fallbacks:
+        return list(fallbacks[model_name])
+    if ":" in model_name or installed is None:
+        return [model_name]
+    tagged = [name for name in installed if name.split(":")[0] == model_name]
+    if len(tagged) < 2:
+        return [model_name]
+    return sorted(tagged, key=lambda name: name != f"{model_name}:latest")
+
+
+def needs_installed_models(model_name: str, fallbacks: Dict[str, List[str]]) -> bool:
+    return model_name not in fallbacks and ":" not in model_name
 
 
 class OllamaResponse:
     def __init__(self, line, debug=False):
         self.valid = True
+        self.done = False
         self.content = ""
+        self.data = {}
         self.line = line.decode('utf-8')
         self._debug = debug
         self._process_line(self.line)
@@ -21,16 +45,42 @@ class OllamaResponse:
             self.valid = False
             return
 
-        data = json.loads(line)
-        content = data.get("response", "")
+        self.data = json.loads(line)
+        self.done = self.data.get("done", False)
+        content = self.data.get("response", "")
         if content:
             self.content = content
             return
 
+    @property
+    def timings(self) -> Dict[str, float]:
+        """
+        Server-side durations in seconds, reported in the final chunk.
+        """
+        return {name: self.data[f"{name}_duration"] / NANOSECONDS
+                for name in ("load", "prompt_eval", "eval", "total") if f"{name}_duration" in self.data}
+
+    @property
+    def usage(self) -> Dict[str, float]:
+        """
+        Token counts and durations in seconds reported in the final chunk.
+        """
+        usage = {name: self.data[field] for name, field in (("prompt_tokens", "prompt_eval_count"),
+                                                            ("completion_tokens", "eval_count"))
+                 if field in self.data}
+        usage.update({f"{name}_seconds": value for name, value in self.timings.items()})
+        if usage.get("completion_tokens") and usage.get("eval_seconds"):
+            usage["tokens_per_second"] = usage["completion_tokens"] / usage["eval_seconds"]
+        return usage
+
     @property
     def is_valid(self) -> bool:
         return self.valid
 
+    @property
+    def is_done(self) -> bool:
+        return self.done
+
     @property
     def is_content(self) -> bool:
         return bool(self.content)
@@ -38,74 +88,170 @@ class OllamaResponse:
 
 class OllamaBackend(BaseLLMBackend):
     def __init__(self, model_name: str, base_url: str = "http://localhost:11434", debug: bool = False,
-                 show_reasoning: bool = False):
+                 show_reasoning: bool = False, session: requests.Session = None, timeout=None, keep_alive=None,
+                 models: Dict[str, dict] = None, fallbacks: Dict[str, List[str]] = None):
         self._model_name = model_name
         self._base_url = base_url.rstrip("/")
         self._debug = debug
         self._show_reasoning = show_reasoning  # unused
+        self._session = session or requests  # module-level functions when no pooled session is given
+        self._timeout = timeout
+        self._keep_alive = keep_alive
+        self._models = models or {}
+        self._fallbacks = fallbacks or {}
+        self._model_lock = threading.Lock()
+        self._model_resolved = False
+        self.last_timings: Dict[str, float] = {}
+        self.context: Optional[List[int]] = None  # sent with generate to skip re-evaluating a saved prompt
+        self.last_context: Optional[List[int]] = None
+
+    @property
+    def base_url(self) -> str:
+        return self._base_url
+
+    @property
+    def model_name(self) -> str:
+        # Chosen on first use, so a request for a tagless name pays the lookup only when it reaches the server
+        return self.resolve_model()
+
+    def _keep_alive_for(self, model_name: str):
+        return self._models.get(model_name, {}).get("keep_alive", self._keep_alive)
+
+    def _payload(self, **fields) -> dict:
+        payload = {"model": self.model_name, **fields}
+        keep_alive = self._keep_alive_for(payload["model"])
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        return payload
+
+    def warm_up(self, load: bool = True):
+        self.resolve_model()
+        if not load:
+            return
+
+        start = time.monotonic()
+        response = self._session.post(f"{self._base_url}/api/generate", json=self._payload(stream=False),
+                                      timeout=self._timeout)
+        if not response.ok:
+            raise RequestError(response.status_code, response.text)
+        load_duration = response.json().get("load_duration", 0) / NANOSECONDS
+        if self._debug:
+            console.print(f"DEBUG: model {self._model_name} ready in {time.monotonic() - start:.2f}s "
+                          f"(load={load_duration:.2f}s)", style="bold")
+
+    def resolve_model(self) -> str:
+        """
+        Picks the model to use when the name is ambiguous or has a fallback list, preferring the
+        variant that is already loaded.
+        """
+        with self._model_lock:
+            if not self._model_resolved:
+                self._model_name = self._select_model(self._model_name)
+                self._model_resolved = True
+            return self._model_name
+
+    def _select_model(self, model_name: str) -> str:
+        try:
+            installed = None
+            if needs_installed_models(model_name, self._fallbacks):
+                installed = self._fetch_model_names("tags")
+            candidates = model_candidates(model_name, self._fallbacks, installed)
+            if len(candidates) < 2:
+                return candidates[0]
+
+            running = self._fetch_model_names("ps")
+        except (requests.RequestException, RuntimeError) as e:
+            if self._debug:
+                console.print(f"DEBUG: Model selection skipped: {e}", style="bold")
+            return model_name
+
+        selected = next((name for name in candidates if name in running), candidates[0])
+        if self._debug:
+            console.print(f"DEBUG: Model {model_name} resolved to {selected} (running: {running})", style="bold")
+        return selected
+
+    def _fetch_model_names(self, endpoint: str) -> List[str]:
+        response = self._session.get(f"{self._base_url}/api/{endpoint}", timeout=self._timeout)
+        if not response.ok:
+            raise RequestError(response.status_code, response.text)
+        return [m.get("name") for m in response.json().get("models", [])]
 
     def generate(self, prompt: str, stream: bool = False) -> Union[str, Generator[str, None, None]]:
         url = f"{self._base_url}/api/generate"
-        payload = {
-            "model": self._model_name,
-            "prompt": prompt,
-            "stream": stream
-        }
-        response = requests.post(url, json=payload, stream=stream)
+        payload = self._payload(prompt=prompt, stream=stream)
+        if self.context:
+            payload["context"] = self.context
+        response = self._session.post(url, json=payload, stream=stream, timeout=self._timeout)
+        self._record_headers(response)
         if not response.ok:
             if self._debug:
                 debug_text = response.text.splitlines()[0]
                 console.print(f"DEBUG: status={response.status_code}, text={debug_text}", style="bold")
-            raise RuntimeError(f"Request error: {response.status_code} - {response.text}")
+            raise RequestError(response.status_code, response.text)
         return self._stream_generate_response(response)
 
     def chat(self, messages: List[Dict[str, str]], stream: bool = False) -> Union[str, Generator[str, None, None]]:
         url = f"{self._base_url}/api/chat"
-        payload = {
-            "model": self._model_name,
-            "messages": messages,
-            "stream": stream
-        }
-        response = requests.post(url, json=payload, stream=stream)
+        payload = self._payload(messages=messages, stream=stream)
+        response = self._session.post(url, json=payload, stream=stream, timeout=self._timeout)
+        self._record_headers(response)
         if not response.ok:
-            raise RuntimeError(f"Request error: {response.status_code} - {response.text}")
+            raise RequestError(response.status_code, response.text)
         return self._stream_chat_response(response)
 
     def list_models(self) -> List[str]:
-        url = f"{self._base_url}/api/tags"
         try:
-            response = requests.get(url)
-            if not response.ok:
-                raise RuntimeError(f"Request error: {response.status_code} - {response.text}")
-            data = response.json()
-            return [m.get("name") for m in data.get("models", [])]
+            return self._fetch_model_names("tags")
         except Exception as e:
             console.print(f"ERROR: Failed to fetch models: {e}", style="bold red")
             return []
 
     def get_running_models(self) -> List[str]:
-        url = f"{self._base_url}/api/ps"
         try:
-            response = requests.get(url)
-            if not response.ok:
-                raise RuntimeError(f"Request error: {response.status_code} - {response.text}")
-            data = response.json()
-            return ["ollama/" + m.get("name") for m in data.get("models", [])]
+            return ["ollama/" + name for name in self._fetch_model_names("ps")]
         except Exception as e:
             console.print(f"ERROR: Failed to fetch running models: {e}", style="bold red")
             return []
 
     def _stream_generate_response(self, response: requests.Response) -> Generator[str, None, None]:
-        for line in response.iter_lines():
-            response = OllamaResponse(line, self._debug)
-            if response.is_content:
-                yield response.content
-                continue
-            if self._debug:
-                console.print(f"DEBUG: Unknown response: {response.line}", style="bold red")
+        completed = False
+        try:
+            for line in response.iter_lines():
+                chunk = OllamaResponse(line, self._debug)
+                if chunk.is_content:
+                    yield chunk.content
+                    continue
+                if chunk.is_done:
+                    self._record_timings(chunk.timings)
+                    self.last_usage = chunk.usage
+                    self.last_context = chunk.data.get("context")
+                    continue
+                if self._debug:
+                    console.print(f"DEBUG: Unknown response: {chunk.line}", style="bold red")
+            completed = True
+        finally:
+            self._release(response, completed)
 
     def _stream_chat_response(self, response: requests.Response) -> Generator[str, None, None]:
-        for line in response.iter_lines():
-            if line:
-                data = json.loads(line)
-                yield data.get("message", {}).get("content", "")
+        completed = False
+        try:
+            for line in response.iter_lines():
+                if line:
+                    chunk = OllamaResponse(line, self._debug)
+                    content = chunk.data.get("message", {}).get("content", "")
+                    if content:
+                        yield content
+                    if chunk.is_done:
+                        self._record_timings(chunk.timings)
+                        self.last_usage = chunk.usage
+            completed = True
+        finally:
+            self._release(response, completed)
+
+    def _record_timings(self, timings: Dict[str, float]):
+        self.last_timings = timings
+        if self._debug and timings:
+            generation = timings.get("prompt_eval", 0) + timings.get("eval", 0)
+            console.print(f"\nDEBUG: load={timings.get('load', 0):.2f}s, generation={generation:.2f}s "
+                          f"(prompt_eval={timings.get('prompt_eval', 0):.2f}s, eval={timings.get('eval', 0):.2f}s)",
+                          style="bold")
@@ -2,10 +2,19 @@ import json
 from typing import List, Dict, Union, Generator
 
 import requests
-from rich.console import Console
 
-console = Console()
-from src.base_llm_backend import BaseLLMBackend  # Updated import path
+from src.base_llm_backend import BaseLLMBackend, RequestError
+from src.console import console
+
+
+def usage_counts(usage: dict) -> Dict[str, float]:
+    counts = {name: usage[name] for name in ("prompt_tokens", "completion_tokens") if usage.get(name) is not None}
+    reasoning_tokens = (usage.get("completion_tokens_details") or {}).get("reasoning_tokens")
+    if reasoning_tokens:
+        counts["reasoning_tokens"] = reasoning_tokens
+    if usage.get("cost") is not None:
+        counts["cost"] = usage["cost"]
+    return counts
 
 
 class OpenAiApiResponse:
@@ -14,6 +23,7 @@ class OpenAiApiResponse:
         self.done = False
         self.content = ""
         self.reasoning = ""
+        self.usage = {}
         self.line = line.decode('utf-8')
         self._debug = debug
         self._process_line(self.line)
@@ -27,8 +37,11 @@ class OpenAiApiResponse:
             return
         try:
             data = json.loads(line[6:])  # Skip 'data: ' prefix
-            self.content = data["choices"][0]["delta"].get("content", "")
-            self.reasoning = data["choices"][0]["delta"].get("reasoning", "")
+            # The usage chunk sent at the end of the stream has no choices
+            delta = (data.get("choices") or [{}])[0].get("delta") or {}
+            self.content = delta.get("content") or ""
+            self.reasoning = delta.get("reasoning") or ""
+            self.usage = data.get("usage") or {}
         except json.JSONDecodeError:
             if self._debug:
                 console.print(f"DEBUG: Failed to parse line: {line}", style="bold red")
@@ -52,7 +65,8 @@ class OpenAiApiResponse:
 
 class OpenAiCompatibleApiBackend(BaseLLMBackend):
     def __init__(self, api_key: str, base_url: str, model_name: str, debug: bool = False, show_reasoning: bool = True,
-                 extra_headers: dict = None):
+                 extra_headers: dict = None, session: requests.Session = None, timeout=None,
+                 stream_usage: bool = False):
         self._base_url = base_url
         self._api_key = api_key
         self._model_name = model_name
@@ -61,6 +75,10 @@ class OpenAiCompatibleApiBackend(BaseLLMBackend):
         self._extra_headers = extra_headers or {}
         if "Authorization" not in self._extra_headers:
             extra_headers["Authorization"] = f"Bearer {api_key}"
+        self._session = session or requests  # module-level functions when no pooled session is given
+        self._timeout = timeout
+        # Asks for a final usage chunk in streamed answers; not every OpenAI-compatible server accepts it
+        self._stream_usage = stream_usage
 
     def generate(self, prompt: str, stream: bool = False) -> Union[str, Generator[str, None, None]]:
         url = f"{self._base_url}/chat/completions"
@@ -73,13 +91,16 @@ class OpenAiCompatibleApiBackend(BaseLLMBackend):
             "messages": messages,
             "stream": stream
         }
+        if stream and self._stream_usage:
+            payload["stream_options"] = {"include_usage": True}
 
-        response = requests.post(url, headers=headers, json=payload, stream=stream)
+        response = self._session.post(url, headers=headers, json=payload, stream=stream, timeout=self._timeout)
+        self._record_headers(response)
         if not response.ok:
             if self._debug:
                 debug_text = response.text.splitlines()[0]
                 console.print(f"DEBUG: status={response.status_code}, text={debug_text}", style="bold")
-            raise RuntimeError(f"Request error: {response.status_code} - {response.text}")
+            raise RequestError(response.status_code, response.text)
 
         if stream:
             return self._stream_response(response)
@@ -96,13 +117,16 @@ class OpenAiCompatibleApiBackend(BaseLLMBackend):
             "messages": messages,
             "stream": stream
         }
+        if stream and self._stream_usage:
+            payload["stream_options"] = {"include_usage": True}
 
-        response = requests.post(url, headers=headers, json=payload, stream=stream)
+        response = self._session.post(url, headers=headers, json=payload, stream=stream, timeout=self._timeout)
+        self._record_headers(response)
         if not response.ok:
             if self._debug:
                 debug_text = response.text.splitlines()[0]
                 console.print(f"DEBUG: status={response.status_code}, text={debug_text}", style="bold")
-            raise RuntimeError(f"Request error: {response.status_code} - {response.text}")
+            raise RequestError(response.status_code, response.text)
 
         if stream:
             return self._stream_response(response)
@@ -114,35 +138,44 @@ class OpenAiCompatibleApiBackend(BaseLLMBackend):
         url = f"{self._base_url}/models"
         headers = self._extra_headers.copy()
 
-        response = requests.get(url, headers=headers)
+        response = self._session.get(url, headers=headers, timeout=self._timeout)
         if not response.ok:
             if self._debug:
                 debug_text = response.text.splitlines()[0]
                 console.print(f"DEBUG: status={response.status_code}, text={debug_text}", style="bold")
-            raise RuntimeError(f"Request error: {response.status_code} - {response.text}")
+            raise RequestError(response.status_code, response.text)
 
         data = response.json()
         return [model["id"] for model in data["data"]]
 
     def _stream_response(self, response: requests.Response) -> Generator[str, None, None]:
         reasoning = False
-        for line in response.iter_lines():
-            if not line:
-                continue
-            response = OpenAiApiResponse(line, self._debug)
-            if response.is_done:
-                break
-            if response.is_content:
-                if reasoning:
-                    reasoning = False
-                    yield "</think>\n\n"
-                yield response.content
-                continue
-            if response.is_reasoning and self._show_reasoning:
-                if not reasoning:
-                    reasoning = True
-                    yield "<think>"
-                yield response.reasoning
-                continue
-            if self._debug:
-                console.print(f"DEBUG: Unknown response: {response.line}", style="bold red")
+        completed = False
+        try:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = OpenAiApiResponse(line, self._debug)
+                if chunk.is_done:
+                    break
+                if chunk.usage:
+                    self.last_usage = usage_counts(chunk.usage)
+                    if not chunk.is_content and not chunk.is_reasoning:
+                        continue
+                if chunk.is_content:
+                    if reasoning:
+                        reasoning = False
+                        yield "</think>\n\n"
+                    yield chunk.content
+                    continue
+                if chunk.is_reasoning and self._show_reasoning:
+                    if not reasoning:
+                        reasoning = True
+                        yield "<think>"
+                    yield chunk.reasoning
+                    continue
+                if self._debug:
+                    console.print(f"DEBUG: Unknown response: {chunk.line}", style="bold red")
+            completed = True
+        finally:
+            self._release(response, completed)
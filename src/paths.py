@@ -0,0 +1,22 @@
+import os
+from pathlib import Path
+
+from src.constants import APP_NAME
+
+
+def cache_path(*parts: str) -> Path:
+    cache_home = Path(os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache")
+    return cache_home.joinpath(APP_NAME, *parts)
+
+
+def data_path(*parts: str) -> Path:
+    data_home = Path(os.getenv("XDG_DATA_HOME") or Path.home() / ".local" / "share")
+    return data_home.joinpath(APP_NAME, *parts)
+
+
+def runtime_path(*parts: str) -> Path:
+    # Sockets belong in the per-user runtime directory; the cache directory stands in where there is none
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR")
+    if not runtime_dir:
+        return cache_path(*parts)
+    return Path(runtime_dir).joinpath(APP_NAME, *parts)
@@ -1,21 +1,222 @@
+import mmap
+import os
 import re
-import sys
-from pathlib import Path
+import stat
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.attachment_store import AttachmentStore, file_block
+from src.constants import PREPROCESSOR_MAX_BYTES, PREPROCESSOR_MMAP_THRESHOLD, PREPROCESSOR_READ_WORKERS
+from src.ignore_rules import IgnoreRules, glob_to_regex
+
+GLOB_CHARS = re.compile(r'[*?\[]')
+
+# Bytes inspected to tell binary files apart
+BINARY_CHECK_SIZE = 8192
 
 
 class PromptPreprocessor:
-    def __init__(self):
+    """
+    Replaces @@file references with the file contents. Keep one instance for the whole session:
+    contents are cached by path and only read again when the file mtime or size changes.
+
+    @@dir/ and glob references such as @@src/**/*.py expand to every matching file, skipping files
+    excluded by .gitignore and binary files. Files are read in parallel, and the attachments of one
+    prompt are capped at max_bytes.
+    """
+
+    def __init__(self, mmap_threshold: int = PREPROCESSOR_MMAP_THRESHOLD, max_bytes: int = PREPROCESSOR_MAX_BYTES,
+                 read_workers: int = PREPROCESSOR_READ_WORKERS):
         self.file_reference_pattern = re.compile(r'@@(\S+)')
+        self.mmap_threshold = mmap_threshold
+        self.max_bytes = max_bytes
+        self.read_workers = read_workers
+        self._contents: Dict[str, Tuple[int, int, Optional[str]]] = {}
 
-    def process_prompt(self, prompt: str) -> str:
-        def replace_file_reference(match):
-            file_name = match.group(1)
-            file_path = Path(file_name)
-            if file_path.exists() and file_path.is_file():
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    content = file.read().strip()
-                return f"\n\nFILE: {file_name}\n```\n{content}\n```\n"
+    def process_prompt(self, prompt: str, attachments: Optional[AttachmentStore] = None) -> str:
+        """
+        Args:
+            prompt (str): Prompt with @@ references.
+            attachments (AttachmentStore): When given, file contents are stored there and the prompt only keeps
+                references to them, to be expanded by AttachmentStore.render().
+        """
+        # References repeated in the prompt are resolved once
+        references = list(dict.fromkeys(self.file_reference_pattern.findall(prompt)))
+        if not references:
+            return prompt
+
+        # (reference, path, size) of every file, in prompt order then path order
+        multi = {reference for reference in references if is_multi_file_reference(reference)}
+        entries = []
+        for reference in references:
+            if reference in multi:
+                entries.extend((reference, path, size) for path, size in expand_reference(reference))
+            else:
+                entries.append((reference, reference, file_size(reference)))
+
+        # Files are taken in order while they fit the byte cap; explicit file references are always included.
+        # They are read in parallel, and binary files, which read_file rejects, give their share back, so the
+        # files that did not fit are tried again with it.
+        budget = self.max_bytes
+        contents: Dict[str, Optional[str]] = {}
+        pending = list(range(len(entries)))
+        skipped = set()
+        while pending:
+            batch = []
+            for index in pending:
+                reference, _, size = entries[index]
+                if size <= budget or reference not in multi:
+                    batch.append(index)
+                    budget -= size
+            if not batch:
+                break
+            taken = set(batch)
+            pending = [index for index in pending if index not in taken]
+            self._read_files([entries[index][1] for index in batch if entries[index][1] not in contents], contents)
+            for index in batch:
+                if contents[entries[index][1]] is None:
+                    skipped.add(index)
+                    budget += entries[index][2]
+            if not skipped.intersection(batch):
+                break
+
+        left_out = set(pending)
+        selected: Dict[str, Tuple[List[str], int, int]] = {reference: ([], 0, 0) for reference in references}
+        for index, (reference, path, _) in enumerate(entries):
+            files, omitted, binary = selected[reference]
+            if index in skipped:
+                binary += 1
+            elif index in left_out:
+                omitted += 1
             else:
-                return match.group(0)  # Return the original reference if file not found
+                files.append(path)
+            selected[reference] = (files, omitted, binary)
+
+        attach = attachments.reference if attachments is not None else file_block
+        replacements = {}
+        for reference, (files, omitted, binary) in selected.items():
+            blocks = [attach(path, contents[path]) for path in files]
+            if omitted:
+                blocks.append(f"\n[{omitted} more files of {reference} omitted: "
+                              f"attachment limit of {self.max_bytes} bytes reached]\n")
+            if binary and reference in multi:
+                blocks.append(f"\n[{binary} binary files of {reference} skipped]\n")
+            replacements[reference] = "".join(blocks) or None
+
+        def replace_file_reference(match):
+            return replacements[match.group(1)] or match.group(0)  # Keep the original reference if file not found
 
         return self.file_reference_pattern.sub(replace_file_reference, prompt)
+
+    def _read_files(self, paths: List[str], contents: Dict[str, Optional[str]]):
+        paths = list(dict.fromkeys(paths))
+        if len(paths) > 1:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=min(self.read_workers, len(paths))) as executor:
+                contents.update(zip(paths, executor.map(self.read_file, paths)))
+        else:
+            contents.update((path, self.read_file(path)) for path in paths)
+
+    def read_file(self, file_name: str) -> Optional[str]:
+        """
+        Returns the stripped contents of the file, or None when it does not exist, is not a regular file
+        or is binary.
+        """
+        try:
+            path = os.path.realpath(file_name)
+            file_stat = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(file_stat.st_mode):
+            return None
+
+        cached = self._contents.get(path)
+        if cached and cached[0] == file_stat.st_mtime_ns and cached[1] == file_stat.st_size:
+            return cached[2]
+
+        text = self._read_text(path, file_stat.st_size)
+        content = text.strip() if text is not None else None
+        self._contents[path] = (file_stat.st_mtime_ns, file_stat.st_size, content)
+        return content
+
+    def _read_text(self, path: str, size: int) -> Optional[str]:
+        try:
+            with open(path, 'rb') as file:
+                if size and size >= self.mmap_threshold:
+                    # Decode straight from the page cache instead of copying the file into a bytes buffer first
+                    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        if mapped.find(b'\0', 0, BINARY_CHECK_SIZE) != -1:
+                            return None
+                        text = str(mapped, 'utf-8')
+                else:
+                    data = file.read()
+                    if b'\0' in data[:BINARY_CHECK_SIZE]:
+                        return None
+                    text = data.decode('utf-8')
+        except UnicodeDecodeError:
+            return None
+        # Same newline translation as reading in text mode
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text
+
+    def clear_cache(self):
+        self._contents.clear()
+
+
+def is_multi_file_reference(reference: str) -> bool:
+    return reference.endswith("/") or os.path.isdir(reference) or is_glob(reference)
+
+
+def is_glob(reference: str) -> bool:
+    # A file whose name has glob characters, such as notes[1].md, is still referenced by its name
+    return GLOB_CHARS.search(reference) is not None and not os.path.exists(reference)
+
+
+def file_size(path: str) -> int:
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+
+def expand_reference(reference: str) -> Iterator[Tuple[str, int]]:
+    """
+    Yields (path, size) of the files matched by a directory or glob reference, sorted by path.
+    """
+    if is_glob(reference):
+        parts = reference.split("/")
+        first_glob = next(i for i, part in enumerate(parts) if GLOB_CHARS.search(part))
+        base = "/".join(parts[:first_glob])
+        pattern = re.compile(glob_to_regex(reference) + r"\Z")
+    else:
+        base = reference.rstrip("/") or "/"
+        pattern = None
+
+    root = base or "."
+    if not os.path.isdir(root):
+        return
+    real_root = os.path.realpath(root)
+    for relative_path, size in _walk(real_root, "", IgnoreRules.for_directory(real_root)):
+        path = os.path.join(base, relative_path) if base else relative_path
+        if pattern is None or pattern.match(path):
+            yield path, size
+
+
+def _walk(directory: str, relative_dir: str, ignore_rules: IgnoreRules) -> Iterator[Tuple[str, int]]:
+    try:
+        with os.scandir(directory) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+    except OSError:
+        return
+    for entry in entries:
+        relative_path = f"{relative_dir}{entry.name}"
+        try:
+            # Symlinked directories are not followed, so a link cycle cannot loop the walk
+            if entry.is_dir(follow_symlinks=False):
+                if not ignore_rules.is_ignored(entry.path, is_dir=True):
+                    yield from _walk(entry.path, f"{relative_path}/", ignore_rules.child(entry.path))
+            elif entry.is_file() and not ignore_rules.is_ignored(entry.path, is_dir=False):
+                yield relative_path, entry.stat().st_size
+        except OSError:
+            continue
@@ -0,0 +1,59 @@
+import json
+import os
+import time
+from pathlib import Path
+
+from src.constants import PROVIDER_DISCOVERY_TTL
+from src.paths import cache_path
+
+
+class ProviderDiscovery:
+    """
+    Probes auto-detected providers on demand and remembers the result on disk for a while,
+    so repeated CLI calls do not pay the probe again.
+    """
+
+    def __init__(self, cache_file: Path = None, ttl: float = PROVIDER_DISCOVERY_TTL):
+        self._cache_file = cache_file or cache_path("discovery.json")
+        self._ttl = ttl
+
+    def is_available(self, provider_cfg: dict) -> bool:
+        key = f"{provider_cfg['type']}|{provider_cfg.get('base_url', '')}"
+        cache = self._load_cache()
+        entry = cache.get(key)
+        if entry and time.time() - entry["checked"] < self._ttl:
+            return entry["available"]
+
+        available = self._probe(provider_cfg)
+        cache[key] = {"available": available, "checked": time.time()}
+        self._save_cache(cache)
+        return available
+
+    @staticmethod
+    def _probe(provider_cfg: dict) -> bool:
+        if provider_cfg["type"] == "ollama":
+            import requests
+
+            try:
+                r = requests.get(f"{provider_cfg['base_url']}/api/tags", timeout=1)
+                return r.ok
+            except requests.RequestException:
+                return False
+        return True
+
+    def _load_cache(self) -> dict:
+        try:
+            with self._cache_file.open() as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _save_cache(self, cache: dict):
+        try:
+            self._cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self._cache_file.with_suffix(f".{os.getpid()}.tmp")
+            with tmp_file.open("w") as f:
+                json.dump(cache, f)
+            os.replace(tmp_file, self._cache_file)
+        except OSError:
+            pass
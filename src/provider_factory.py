@@ -1,62 +1,179 @@
-from typing import List
-
-from rich.console import Console
+import importlib
+import weakref
+from functools import partial
+from typing import List, Tuple, TYPE_CHECKING
 
 from src.base_llm_backend import BaseLLMBackend
-from src.gemini_backend import GeminiBackend
-from src.ollama_backend import OllamaBackend
-from src.openai_compatible_backend import OpenAiCompatibleApiBackend
-from src.openrouter_backend import OpenRouterBackend
+from src.http_pool import HttpSessionPool, create_session, http_timeout
+from src.model_catalog import ModelCatalog
+from src.provider_discovery import ProviderDiscovery
+
+if TYPE_CHECKING:
+    from src.async_base_llm_backend import AsyncBaseLLMBackend
 
-console = Console()
+# Provider name given to the model aliases of the "aliases" config section
+ALIAS_PROVIDER = "alias"
 
+# Backend modules are imported only when a provider of that type is resolved
 BACKEND_CLASSES = {
-    "ollama": OllamaBackend,
-    "openrouter": OpenRouterBackend,
-    "openai": OpenAiCompatibleApiBackend,
-    "gemini": GeminiBackend,
+    "ollama": "src.ollama_backend:OllamaBackend",
+    "openrouter": "src.openrouter_backend:OpenRouterBackend",
+    "openai": "src.openai_compatible_backend:OpenAiCompatibleApiBackend",
+    "gemini": "src.gemini_backend:GeminiBackend",
 }
 
+ASYNC_BACKEND_CLASSES = {
+    "ollama": "src.async_ollama_backend:AsyncOllamaBackend",
+    "openrouter": "src.async_openrouter_backend:AsyncOpenRouterBackend",
+    "openai": "src.async_openai_compatible_backend:AsyncOpenAiCompatibleApiBackend",
+    "gemini": "src.async_gemini_backend:AsyncGeminiBackend",
+}
+
+
+def load_backend_class(class_path: str) -> type:
+    module_name, class_name = class_path.split(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
 
 class ProviderFactory:
-    def __init__(self, config: dict):
-        self._providers = config["providers"]
+    def __init__(self, config: dict, discovery: ProviderDiscovery = None, catalog: ModelCatalog = None):
+        self._providers = dict(config["providers"])
+        self._discoverable = dict(config.get("discover") or {})
+        self._provider_order = list(self._discoverable) + list(self._providers)
+        self._discovery = discovery or ProviderDiscovery()
+        self._catalog = catalog or ModelCatalog()
+        self._http_settings = config.get("http") or {}
+        self._session_pool = HttpSessionPool()
+        self._async_session_pool = None
+        self._aliases = dict(config.get("aliases") or {})
+        self._router_stats = None
 
     def parse_model_name(self, model_name: str):
+        if model_name in self._aliases:
+            return ALIAS_PROVIDER, model_name
         if "/" not in model_name:
-            if len(self.all_providers()) == 1:
-                return self.all_providers()[0], model_name
-            else:
-                return "ollama", model_name
+            providers = self.all_providers()
+            if len(providers) == 1:
+                return providers[0], model_name
+            # Prefer a provider that is known to serve the model
+            serving = self._catalog.find_providers(model_name)
+            for provider in providers:
+                if provider in serving:
+                    return provider, model_name
+            return "ollama", model_name
         return model_name.split("/", 1)
 
     def resolve_backend(self, provider_name: str = None, model_name: str = None, debug: bool = False,
-                        show_reasoning: bool = True) -> BaseLLMBackend:
+                        show_reasoning: bool = True, cancellable: bool = False) -> BaseLLMBackend:
+        """
+        Args:
+            cancellable (bool): Gives the backend its own HTTP session, whose requests a RequestScope can
+                interrupt from another thread, as hedged requests do. The session is closed with the backend.
+        """
+        if provider_name == ALIAS_PROVIDER:
+            return self._resolve_alias(model_name, debug, show_reasoning, cancellable)
+        cls, kwargs, http_settings = self._backend_config(BACKEND_CLASSES, provider_name, model_name, debug,
+                                                          show_reasoning)
+        if cancellable:
+            session = create_session(http_settings, cancellable=True)
+        else:
+            session = self._session_pool.get(provider_name, http_settings)
+        kwargs["session"] = session
+        kwargs["timeout"] = http_timeout(http_settings)
+        backend = cls(**kwargs)
+        if cancellable:
+            weakref.finalize(backend, session.close)
+        return backend
+
+    def resolve_async_backend(self, provider_name: str = None, model_name: str = None, debug: bool = False,
+                              show_reasoning: bool = True) -> "AsyncBaseLLMBackend":
+        if provider_name == ALIAS_PROVIDER:
+            raise ValueError(f"Model alias '{model_name}' is only supported by generate, chat and bench.")
+        cls, kwargs, http_settings = self._backend_config(ASYNC_BACKEND_CLASSES, provider_name, model_name, debug,
+                                                          show_reasoning)
+        if self._async_session_pool is None:
+            from src.async_http_pool import AsyncHttpSessionPool
+            self._async_session_pool = AsyncHttpSessionPool()
+
+        # aiohttp sessions need a running event loop, so the backend creates it on first request
+        kwargs["session_factory"] = partial(self._async_session_pool.get, provider_name, http_settings)
+        return cls(**kwargs)
+
+    def _resolve_alias(self, alias: str, debug: bool, show_reasoning: bool, cancellable: bool) -> BaseLLMBackend:
+        from src.model_router import RoutedBackend, RouterStats, RouteTarget, parse_alias
+
+        if alias not in self._aliases:
+            raise ValueError(f"Model alias '{alias}' not found.")
+        strategy, entries = parse_alias(alias, self._aliases[alias])
+        targets = []
+        for name, weight in entries:
+            provider_name, model_name = self.parse_model_name(name)
+            if provider_name == ALIAS_PROVIDER:
+                raise ValueError(f"Model alias '{alias}' cannot target the alias '{name}'.")
+            targets.append(RouteTarget(provider_name, model_name, weight))
+        if self._router_stats is None:
+            self._router_stats = RouterStats()
+        return RoutedBackend(alias, targets, lambda target: self.resolve_backend(
+            target.provider_name, target.model_name, debug=debug, show_reasoning=show_reasoning,
+            cancellable=cancellable),
+                             strategy=strategy, stats=self._router_stats, debug=debug)
+
+    def _backend_config(self, backend_classes: dict, provider_name: str, model_name: str, debug: bool,
+                        show_reasoning: bool) -> Tuple[type, dict, dict]:
         kwargs = {
             "debug": debug,
             "show_reasoning": show_reasoning,
             "model_name": model_name or "none",
         }
 
-        if provider_name not in self._providers:
-            raise ValueError(f"Provider '{provider_name}' not found or not configured.")
-
-        provider_cfg = self._providers[provider_name]
+        provider_cfg = self._provider_config(provider_name)
         provider_type = provider_cfg["type"]
 
-        if provider_type not in BACKEND_CLASSES:
+        if provider_type not in backend_classes:
             raise ValueError(
-                f"Provider type '{provider_type}' not supported. Available: {list(BACKEND_CLASSES.keys())}")
+                f"Provider type '{provider_type}' not supported. Available: {list(backend_classes.keys())}")
 
-        cls = BACKEND_CLASSES[provider_type]
+        cls = load_backend_class(backend_classes[provider_type])
 
         kwargs.update(provider_cfg)
         kwargs["type"] = None
 
+        # Connection pool settings: global "http" section, overridden per provider
+        http_settings = {**self._http_settings, **(provider_cfg.get("http") or {})}
+        kwargs["http"] = None
+
         # Remove None
         kwargs = {k: v for k, v in kwargs.items() if v is not None}
 
-        return cls(**kwargs)
+        return cls, kwargs, http_settings
+
+    def _provider_config(self, provider_name: str) -> dict:
+        if provider_name in self._discoverable:
+            self._discover(provider_name)
+        if provider_name not in self._providers:
+            raise ValueError(f"Provider '{provider_name}' not found or not configured.")
+        return self._providers[provider_name]
+
+    def _discover(self, provider_name: str):
+        provider_cfg = self._discoverable.pop(provider_name)
+        if self._discovery.is_available(provider_cfg):
+            self._providers[provider_name] = provider_cfg
+
+    def provider_type(self, provider_name: str) -> str:
+        if provider_name == ALIAS_PROVIDER:
+            return ALIAS_PROVIDER
+        return self._provider_config(provider_name)["type"]
 
     def all_providers(self) -> List[str]:
-        return list(self._providers.keys())
+        for provider_name in list(self._discoverable):
+            self._discover(provider_name)
+        return [name for name in self._provider_order if name in self._providers]
+
+    def close(self):
+        self._session_pool.close()
+        if self._router_stats is not None:
+            self._router_stats.close()
+
+    async def aclose(self):
+        if self._async_session_pool is not None:
+            await self._async_session_pool.close()
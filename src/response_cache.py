@@ -0,0 +1,163 @@
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Generator, Iterable, List, Optional, Union
+
+from src.base_llm_backend import BaseLLMBackend, close_stream
+from src.console import console
+from src.constants import RESPONSE_CACHE_MAX_SIZE, RESPONSE_CACHE_TTL
+from src.paths import cache_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    tokens TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def request_key(provider_name: str, model_name: str, messages: List[Dict[str, str]], params: dict) -> str:
+    request = {"provider": provider_name, "model": model_name, "messages": messages, "params": params}
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite cache of complete responses, stored as the list of streamed tokens so a hit can be replayed
+    the same way. Entries expire after ttl seconds, and the least recently used ones are evicted once the
+    stored tokens exceed max_size bytes.
+    """
+
+    def __init__(self, path: Path = None, max_size: int = RESPONSE_CACHE_MAX_SIZE, ttl: float = RESPONSE_CACHE_TTL):
+        self._path = path or cache_path("responses.sqlite3")
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._max_size = max_size
+        self._ttl = ttl
+        self._db = sqlite3.connect(str(self._path), timeout=5)
+        self._db.executescript(SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[List[str]]:
+        row = self._db.execute("SELECT tokens, created FROM responses WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is None or now - row[1] >= self._ttl:
+            if row is not None:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.misses += 1
+            self._count("misses")
+            return None
+
+        self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        self._count("hits")
+        return json.loads(row[0])
+
+    def put(self, key: str, tokens: List[str]):
+        data = json.dumps(tokens)
+        now = time.time()
+        with self._db:
+            self._db.execute("INSERT OR REPLACE INTO responses (key, tokens, size, created, accessed) "
+                             "VALUES (?, ?, ?, ?, ?)", (key, data, len(data), now, now))
+            self._evict(now)
+
+    def _evict(self, now: float):
+        self._db.execute("DELETE FROM responses WHERE created <= ?", (now - self._ttl,))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self._max_size:
+            return
+        evicted = []
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            if total <= self._max_size:
+                break
+            evicted.append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+    def _count(self, name: str):
+        with self._db:
+            self._db.execute("INSERT INTO stats (name, value) VALUES (?, 1) "
+                             "ON CONFLICT (name) DO UPDATE SET value = value + 1", (name,))
+
+    def totals(self) -> Dict[str, int]:
+        totals = {"hits": 0, "misses": 0}
+        totals.update(self._db.execute("SELECT name, value FROM stats"))
+        return totals
+
+    def close(self):
+        self._db.close()
+
+
+class CachedBackend(BaseLLMBackend):
+    """
+    Wraps a backend so that complete responses are stored in a ResponseCache and replayed on a hit.
+    """
+
+    def __init__(self, backend: BaseLLMBackend, cache: ResponseCache, provider_name: str, model_name: str,
+                 params: dict = None, debug: bool = False):
+        self._backend = backend
+        self._cache = cache
+        self._provider_name = provider_name
+        self._model_name = model_name
+        self._params = params or {}
+        self._debug = debug
+
+    def __getattr__(self, name):
+        return getattr(self._backend, name)
+
+    def generate(self, prompt: str, stream: bool = False) -> Union[str, Generator[str, None, None]]:
+        messages = [{"role": "user", "content": prompt}]
+        return self._cached("generate", messages, lambda: self._backend.generate(prompt, stream=stream), stream)
+
+    def chat(self, messages: List[Dict[str, str]], stream: bool = False) -> Union[str, Generator[str, None, None]]:
+        return self._cached("chat", messages, lambda: self._backend.chat(messages, stream=stream), stream)
+
+    def list_models(self) -> List[str]:
+        return self._backend.list_models()
+
+    def warm_up(self, load: bool = True):
+        self._backend.warm_up(load=load)
+
+    def _cached(self, kind: str, messages: List[Dict[str, str]], request, stream: bool):
+        key = request_key(self._provider_name, self._model_name, messages, {"kind": kind, **self._params})
+        tokens = self._cache.get(key)
+        self._report(tokens is not None)
+
+        if tokens is not None:
+            return iter(tokens) if stream else "".join(tokens)
+
+        response = request()
+        if not stream:
+            response = response if isinstance(response, str) else "".join(response)
+            self._cache.put(key, [response])
+            return response
+        return self._record(key, response)
+
+    def _record(self, key: str, response: Iterable[str]) -> Generator[str, None, None]:
+        # Only a response streamed to the end is stored
+        tokens = []
+        try:
+            for token in response:
+                tokens.append(token)
+                yield token
+        finally:
+            close_stream(response)
+        self._cache.put(key, tokens)
+
+    def _report(self, hit: bool):
+        if not self._debug:
+            return
+        totals = self._cache.totals()
+        console.print(f"DEBUG: Response cache {'hit' if hit else 'miss'} "
+                      f"(this run: {self._cache.hits} hits, {self._cache.misses} misses; "
+                      f"total: {totals['hits']} hits, {totals['misses']} misses)", style="bold")
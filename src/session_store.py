@@ -0,0 +1,150 @@
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from src.attachment_store import ATTACHMENT_PATTERN
+from src.paths import data_path
+
+SESSION_NAME_PATTERN = re.compile(r"[\w.-]+")
+INDEX_FILENAME = "index.json"
+
+# Characters of the first prompt shown by /sessions
+PREVIEW_LENGTH = 60
+
+
+def preview(content: str) -> str:
+    return " ".join(ATTACHMENT_PATTERN.sub("", content).split())[:PREVIEW_LENGTH]
+
+
+class SessionStore:
+    """
+    Chat sessions saved as append-only JSONL logs, plus a small index so listing them does not read any log.
+    """
+
+    def __init__(self, directory: Path = None):
+        self._directory = directory or data_path("sessions")
+
+    def open(self, name: str, model: str) -> "SessionLog":
+        if not SESSION_NAME_PATTERN.fullmatch(name):
+            raise ValueError(f"Invalid session name '{name}': use letters, digits, '.', '_' or '-'.")
+        self._directory.mkdir(parents=True, exist_ok=True)
+        return SessionLog(self, name, self._directory / f"{name}.jsonl", model)
+
+    def list(self) -> List[Dict]:
+        """
+        Returns the sessions of the index, most recently updated first.
+        """
+        sessions = [{"name": name, **entry} for name, entry in self._load_index().items()]
+        return sorted(sessions, key=lambda session: session["updated"], reverse=True)
+
+    def _load_index(self) -> dict:
+        try:
+            with (self._directory / INDEX_FILENAME).open() as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def update_index(self, name: str, **fields):
+        index = self._load_index()
+        entry = index.setdefault(name, {"created": time.time(), "messages": 0, "preview": ""})
+        entry.update(fields)
+        entry["updated"] = time.time()
+        try:
+            tmp_path = self._directory / f"{INDEX_FILENAME}.{os.getpid()}.tmp"
+            with tmp_path.open("w") as f:
+                json.dump(index, f)
+            os.replace(tmp_path, self._directory / INDEX_FILENAME)
+        except OSError:
+            pass
+
+
+class SessionLog:
+    """
+    Log of one chat session. Each message is appended as soon as it is added to the ChatSession, and each
+    attachment content is written once, before the first message that references it.
+    """
+
+    def __init__(self, store: SessionStore, name: str, path: Path, model: str):
+        self.name = name
+        self._store = store
+        self._path = path
+        self._model = model
+        self._file = None
+        self._written_digests = set()
+        self._messages = 0
+        self._preview = ""
+
+    def replay(self, chat_session) -> int:
+        """
+        Rebuilds the chat history from the log, one line at a time. Returns the number of messages restored.
+        """
+        try:
+            log = self._path.open(encoding="utf-8")
+        except FileNotFoundError:
+            return 0
+
+        messages = []
+        with log:
+            for line in log:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # last line cut short by a crash
+                record_type = record.get("type")
+                if record_type == "attachment":
+                    chat_session.attachments.add(record["digest"], record["content"])
+                    self._written_digests.add(record["digest"])
+                elif record_type == "message":
+                    message = {"role": record["role"], "content": record["content"]}
+                    if record.get("partial"):
+                        message["partial"] = True
+                    messages.append(message)
+                    if not self._preview and record["role"] == "user":
+                        self._preview = preview(record["content"])
+                elif record_type == "clear":
+                    messages = []
+                    self._preview = ""
+                    chat_session.attachments.clear()
+                    self._written_digests.clear()
+
+        chat_session.messages.extend(messages)
+        self._messages = len(messages)
+        return len(messages)
+
+    def write_message(self, message: Dict[str, str], attachments):
+        for digest, _ in attachments.references(message["content"]):
+            if digest not in self._written_digests:
+                self._write({"type": "attachment", "digest": digest, "content": attachments.content(digest)})
+                self._written_digests.add(digest)
+        self._write({"type": "message", **message, "time": time.time()})
+
+        self._messages += 1
+        if not self._preview and message["role"] == "user":
+            self._preview = preview(message["content"])
+        self._store.update_index(self.name, model=self._model, messages=self._messages, preview=self._preview)
+
+    def write_clear(self):
+        self._write({"type": "clear", "time": time.time()})
+        self._written_digests.clear()
+        self._messages = 0
+        self._preview = ""
+        self._store.update_index(self.name, messages=0, preview="")
+
+    def _write(self, record: dict):
+        if self._file is None:
+            self._file = self._path.open("a+", encoding="utf-8")
+            if self._file.tell() > 0:
+                self._file.seek(self._file.tell() - 1)
+                if self._file.read(1) != "\n":
+                    # Terminates a line cut short by a crash, so the next record starts on its own line
+                    self._file.write("\n")
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
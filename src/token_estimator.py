@@ -0,0 +1,22 @@
+from typing import Dict, Iterable
+
+# Average characters per token of common BPE tokenizers on English text and code
+CHARS_PER_TOKEN = 4
+
+# Tokens added by the chat template around each message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count of a text, cheap enough to run over the whole history on every turn.
+    """
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def estimate_message_tokens(message: Dict[str, str]) -> int:
+    return estimate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+def estimate_messages_tokens(messages: Iterable[Dict[str, str]]) -> int:
+    return sum(estimate_message_tokens(message) for message in messages)
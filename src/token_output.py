@@ -1,11 +1,7 @@
-from rich.console import Console
-from rich.live import Live
-from rich.markdown import Markdown
-
+from src.console import console
+from src.markdown_stream import MarkdownBlockSplitter
 from src.model_output import ModelOutput
 
-console = Console()
-
 
 class TokenOutput:
     def __init__(self, show_reasoning: bool, debug: bool = False, plain: bool = False):
@@ -18,6 +14,7 @@ class TokenOutput:
         for token in tokens:
             self.output.add_token(token)
             print(f"[{token}]", end="", flush=True)
+        self.output.finish()
         print("\n--- CONTENT ---")
         print(self.output.content())
         print("---")
@@ -26,13 +23,26 @@ class TokenOutput:
         for token in tokens:
             self.output.add_token(token)
             print(f"{token}", end="", flush=True)
+        self.output.finish()
 
     def _rich_output(self, tokens):
-        with Live(Markdown(self.output.content()), console=console, refresh_per_second=10,
+        from rich.live import Live
+        from rich.markdown import Markdown
+
+        # Finished blocks go to scrollback once; only the open block is re-rendered by Live
+        splitter = MarkdownBlockSplitter()
+        with Live(Markdown(""), console=console.get(), refresh_per_second=10,
                   vertical_overflow="visible") as live:
             for token in tokens:
-                self.output.add_token(token)
-                live.update(Markdown(self.output.content(), style="bright_blue"))
+                added = self.output.add_token(token)
+                if not added:
+                    continue
+                for block in splitter.feed(added):
+                    live.console.print(Markdown(block, style="bright_blue"))
+                live.update(Markdown(splitter.pending, style="bright_blue"))
+            for block in splitter.feed(self.output.finish()):
+                live.console.print(Markdown(block, style="bright_blue"))
+            live.update(Markdown(splitter.flush(), style="bright_blue"))
 
     def output_tokens(self, tokens):
         if self.debug:
@@ -0,0 +1,140 @@
+import asyncio
+import json
+import unittest
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.async_ollama_backend import AsyncOllamaBackend
+from src.async_openrouter_backend import AsyncOpenRouterBackend
+from src.provider_factory import ProviderFactory
+
+
+def _ollama_app():
+    async def generate(request):
+        body = await request.json()
+        response = web.StreamResponse()
+        await response.prepare(request)
+        for word in ["Hello", ", ", body["prompt"]]:
+            await response.write(json.dumps({"response": word}).encode() + b"\n")
+        await response.write(json.dumps({"response": "", "done": True}).encode() + b"\n")
+        return response
+
+    async def chat(request):
+        response = web.StreamResponse()
+        await response.prepare(request)
+        await response.write(json.dumps({"message": {"content": "Hi there"}}).encode() + b"\n")
+        return response
+
+    async def tags(request):
+        return web.json_response({"models": [{"name": "test_model"}]})
+
+    async def failure(request):
+        return web.Response(status=500, text="Internal Server Error")
+
+    app = web.Application()
+    app.router.add_post("/api/generate", generate)
+    app.router.add_post("/api/chat", chat)
+    app.router.add_get("/api/tags", tags)
+    app.router.add_post("/broken/api/generate", failure)
+    return app
+
+
+def _openai_app():
+    async def completions(request):
+        response = web.StreamResponse()
+        await response.prepare(request)
+        chunks = [{"reasoning": "thinking"}, {"content": "test "}, {"content": "content"}]
+        for delta in chunks:
+            await response.write(f"data: {json.dumps({'choices': [{'delta': delta}]})}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+    async def models(request):
+        return web.json_response({"data": [{"id": "model1"}, {"id": request.headers["X-Title"]}]})
+
+    app = web.Application()
+    app.router.add_post("/chat/completions", completions)
+    app.router.add_get("/models", models)
+    return app
+
+
+class TestAsyncOllamaBackend(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = TestServer(_ollama_app())
+        await self.server.start_server()
+        self.base_url = str(self.server.make_url("")).rstrip("/")
+        self.backend = AsyncOllamaBackend(model_name="test_model", base_url=self.base_url)
+
+    async def asyncTearDown(self):
+        await self.backend.aclose()
+        await self.server.close()
+
+    async def test_agenerate_success(self):
+        result = [token async for token in self.backend.agenerate("world")]
+        self.assertEqual(result, ["Hello", ", ", "world"])
+
+    async def test_achat_success(self):
+        result = [token async for token in self.backend.achat([{"role": "user", "content": "Hi"}])]
+        self.assertEqual(result, ["Hi there"])
+
+    async def test_agenerate_failure(self):
+        backend = AsyncOllamaBackend(model_name="test_model", base_url=f"{self.base_url}/broken")
+        with self.assertRaises(RuntimeError) as context:
+            async for _ in backend.agenerate("Test prompt"):
+                pass
+        await backend.aclose()
+        self.assertIn("Request error: 500 - Internal Server Error", str(context.exception))
+
+    async def test_alist_models_success(self):
+        self.assertEqual(await self.backend.alist_models(), ["test_model"])
+
+    async def test_many_concurrent_streams(self):
+        async def collect(i):
+            return "".join([token async for token in self.backend.agenerate(str(i))])
+
+        results = await asyncio.gather(*(collect(i) for i in range(200)))
+        self.assertEqual(results, [f"Hello, {i}" for i in range(200)])
+
+
+class TestAsyncOpenRouterBackend(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = TestServer(_openai_app())
+        await self.server.start_server()
+        self.base_url = str(self.server.make_url("")).rstrip("/")
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def test_achat_stream_with_reasoning(self):
+        backend = AsyncOpenRouterBackend(api_key="key", model_name="test_model", base_url=self.base_url)
+        result = [token async for token in backend.achat([{"role": "user", "content": "Hi"}])]
+        await backend.aclose()
+        self.assertEqual(result, ["<think>", "thinking", "</think>\n\n", "test ", "content"])
+
+    async def test_agenerate_hides_reasoning(self):
+        backend = AsyncOpenRouterBackend(api_key="key", model_name="test_model", base_url=self.base_url,
+                                         show_reasoning=False)
+        result = [token async for token in backend.agenerate("Hi")]
+        await backend.aclose()
+        self.assertEqual(result, ["test ", "content"])
+
+    async def test_alist_models_sends_headers(self):
+        backend = AsyncOpenRouterBackend(api_key="key", model_name="test_model", base_url=self.base_url)
+        self.assertEqual(await backend.alist_models(), ["model1", "Ocelot CLI"])
+        await backend.aclose()
+
+    async def test_provider_factory_shares_session(self):
+        config = {"providers": {"openrouter": {"type": "openrouter", "api_key": "key", "base_url": self.base_url}}}
+        provider_factory = ProviderFactory(config=config)
+        first = provider_factory.resolve_async_backend("openrouter", "model-a")
+        second = provider_factory.resolve_async_backend("openrouter", "model-b")
+        result = [token async for token in first.agenerate("Hi")]
+        await second.alist_models()
+        self.assertIs(first._get_session(), second._get_session())
+        self.assertIn("content", result)
+        await provider_factory.aclose()
+
+
+if __name__ == '__main__':
+    unittest.main()
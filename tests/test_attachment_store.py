@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.attachment_store import AttachmentStore, file_block, superseded_block, unchanged_block
+from src.chat_session import ChatSession
+from src.prompt_preprocessor import PromptPreprocessor
+
+
+class FakeBackend:
+    def __init__(self):
+        self.requests = []
+
+    def chat(self, messages, stream=False):
+        self.requests.append(list(messages))
+        return "ok"
+
+
+class TestAttachmentStore(unittest.TestCase):
+    def test_content_is_stored_once(self):
+        store = AttachmentStore()
+        first = store.reference("a.py", "print(1)")
+        second = store.reference("a.py", "print(1)")
+        self.assertEqual(first, second)
+        self.assertEqual(len(store), 1)
+        store.reference("b.py", "print(1)")
+        self.assertEqual(len(store), 1)
+
+    def test_render_identical_copies(self):
+        store = AttachmentStore()
+        messages = [{"role": "user", "content": "Read" + store.reference("a.py", "A")},
+                    {"role": "assistant", "content": "Done"},
+                    {"role": "user", "content": "Again" + store.reference("a.py", "A")}]
+        rendered = store.render(messages)
+        self.assertEqual(rendered[0]["content"], "Read" + file_block("a.py", "A"))
+        self.assertEqual(rendered[1], {"role": "assistant", "content": "Done"})
+        self.assertEqual(rendered[2]["content"], "Again" + unchanged_block("a.py"))
+
+    def test_render_superseded_versions(self):
+        store = AttachmentStore()
+        messages = [{"role": "user", "content": store.reference("a.py", "v1")},
+                    {"role": "user", "content": store.reference("a.py", "v2") + store.reference("b.py", "B")}]
+        rendered = store.render(messages)
+        self.assertEqual(rendered[0]["content"], superseded_block("a.py"))
+        self.assertEqual(rendered[1]["content"], file_block("a.py", "v2") + file_block("b.py", "B"))
+
+    def test_message_tokens_count_each_version_once(self):
+        store = AttachmentStore()
+        content = "x" * 400
+        newer = {"role": "user", "content": store.reference("a.py", content)}
+        older = {"role": "user", "content": store.reference("a.py", content)}
+        later_versions = {}
+        self.assertGreater(store.message_tokens(newer, later_versions), 100)
+        self.assertLess(store.message_tokens(older, later_versions), 20)
+
+
+class TestChatAttachments(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file = Path(self.tmp_dir.name) / "big.txt"
+        self.file.write_text("line\n" * 1000)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_history_does_not_duplicate_attachments(self):
+        backend = FakeBackend()
+        session = ChatSession(backend)
+        preprocessor = PromptPreprocessor()
+        for _ in range(3):
+            session.ask(preprocessor.process_prompt(f"Check @@{self.file}", attachments=session.attachments))
+
+        self.assertEqual(len(session.attachments), 1)
+        self.assertTrue(all(len(m["content"]) < 200 for m in session.messages))
+        request = backend.requests[-1]
+        self.assertEqual(sum(m["content"].count("line\n") for m in request), 1000)
+        self.assertTrue(request[4]["content"].endswith(unchanged_block(str(self.file))))
+
+    def test_changed_file_elides_older_version(self):
+        backend = FakeBackend()
+        session = ChatSession(backend)
+        preprocessor = PromptPreprocessor()
+        session.ask(preprocessor.process_prompt(f"Check @@{self.file}", attachments=session.attachments))
+        self.file.write_text("changed\n")
+        stat = self.file.stat()
+        os.utime(self.file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        session.ask(preprocessor.process_prompt(f"Check @@{self.file}", attachments=session.attachments))
+
+        request = backend.requests[-1]
+        self.assertEqual(request[0]["content"], "Check " + superseded_block(str(self.file)))
+        self.assertEqual(request[2]["content"], "Check " + file_block(str(self.file), "changed"))
+
+    def test_token_budget_keeps_one_full_copy(self):
+        backend = FakeBackend()
+        session = ChatSession(backend, token_budget=1500)
+        preprocessor = PromptPreprocessor()
+        for _ in range(4):
+            session.ask(preprocessor.process_prompt(f"Check @@{self.file}", attachments=session.attachments))
+
+        # The file (about 1250 tokens) fits once; without deduplication the budget would keep a single turn
+        request = backend.requests[-1]
+        self.assertGreater(len(request), 1)
+        self.assertEqual(sum(m["content"].count("FILE:") for m in request), len(request) // 2 + 1)
+        self.assertIn("```", request[0]["content"])
+
+
+if __name__ == '__main__':
+    unittest.main()
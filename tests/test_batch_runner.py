@@ -0,0 +1,167 @@
+import asyncio
+import io
+import json
+import unittest
+
+from src.batch_runner import BatchRunner, read_batch_items, read_completed_results
+
+
+class FakeAsyncBackend:
+    def __init__(self, factory, model_name):
+        self.factory = factory
+        self.model_name = model_name
+
+    async def agenerate(self, prompt):
+        self.factory.calls.append(prompt)
+        self.factory.in_flight += 1
+        self.factory.max_in_flight = max(self.factory.max_in_flight, self.factory.in_flight)
+        try:
+            # Later prompts finish first, so completion order differs from input order
+            await asyncio.sleep(self.factory.delays.get(prompt, 0.01))
+            if prompt == "fail":
+                raise RuntimeError("Request error: 500 - boom")
+            yield "<think>hmm</think>"
+            yield f"echo {prompt}"
+        finally:
+            self.factory.in_flight -= 1
+
+    async def achat(self, messages):
+        self.factory.calls.append(messages)
+        yield f"reply {messages[-1]['content']}"
+
+    async def aclose(self):
+        pass
+
+
+class FakeProviderFactory:
+    def __init__(self, delays=None):
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.delays = delays or {}
+        self.closed = False
+
+    def parse_model_name(self, model_name):
+        provider_name, _, name = model_name.partition("/")
+        if provider_name not in ("ollama", "openrouter"):
+            raise ValueError(f"Provider '{provider_name}' not found or not configured.")
+        return provider_name, name
+
+    def resolve_async_backend(self, provider_name, model_name, debug=False, show_reasoning=True):
+        return FakeAsyncBackend(self, model_name)
+
+    async def aclose(self):
+        self.closed = True
+
+
+def run_batch(lines, factory, **kwargs):
+    items = read_batch_items(lines, default_model="ollama/model1")
+    output = io.StringIO()
+    errors = asyncio.run(BatchRunner(factory, concurrency=kwargs.pop("concurrency", 4)).run(items, output, **kwargs))
+    return errors, [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+class TestBatchRunner(unittest.TestCase):
+    def test_input_order(self):
+        factory = FakeProviderFactory(delays={"a": 0.05, "b": 0.03, "c": 0.01})
+        lines = [json.dumps({"id": name, "prompt": name}) for name in ["a", "b", "c"]]
+        errors, results = run_batch(lines, factory)
+        self.assertEqual(errors, 0)
+        self.assertEqual([r["id"] for r in results], ["a", "b", "c"])
+        self.assertEqual(results[0]["response"], "echo a")
+        self.assertEqual(results[0]["model"], "ollama/model1")
+        self.assertTrue(factory.closed)
+
+    def test_completion_order(self):
+        factory = FakeProviderFactory(delays={"a": 0.05, "b": 0.03, "c": 0.01})
+        lines = [json.dumps({"prompt": name}) for name in ["a", "b", "c"]]
+        _, results = run_batch(lines, factory, in_order=False)
+        self.assertEqual([r["index"] for r in results], [2, 1, 0])
+
+    def test_identical_requests_sent_once(self):
+        factory = FakeProviderFactory()
+        lines = [json.dumps({"prompt": "same"}), json.dumps({"prompt": "same"}),
+                 json.dumps({"prompt": "same", "model": "openrouter/model1"})]
+        _, results = run_batch(lines, factory)
+        self.assertEqual(factory.calls, ["same", "same"])
+        self.assertEqual([r["index"] for r in results], [0, 1, 2])
+        self.assertEqual(results[1]["response"], "echo same")
+
+    def test_messages(self):
+        factory = FakeProviderFactory()
+        _, results = run_batch([json.dumps({"messages": [{"role": "user", "content": "hi"}]})], factory)
+        self.assertEqual(results[0]["response"], "reply hi")
+
+    def test_concurrency_cap_per_provider(self):
+        factory = FakeProviderFactory()
+        lines = [json.dumps({"prompt": f"p{i}"}) for i in range(10)]
+        run_batch(lines, factory, concurrency=3)
+        self.assertEqual(factory.max_in_flight, 3)
+
+    def test_errors_are_reported_per_item(self):
+        factory = FakeProviderFactory()
+        lines = [json.dumps({"prompt": "fail"}), json.dumps({"prompt": "ok", "model": "unknown/model"}),
+                 json.dumps({"prompt": "ok"})]
+        errors, results = run_batch(lines, factory)
+        self.assertEqual(errors, 2)
+        self.assertIn("500", results[0]["error"])
+        self.assertIn("unknown", results[1]["error"])
+        self.assertEqual(results[2]["response"], "echo ok")
+
+    def test_resume_skips_completed(self):
+        previous = [json.dumps({"index": 0, "response": "done", "error": None}),
+                    json.dumps({"index": 1, "response": None, "error": "boom"}),
+                    '{"index": 2, "resp',
+                    json.dumps({"response": "no index", "error": None}),
+                    json.dumps([3, "not a result"])]
+        completed = read_completed_results(previous)
+        self.assertEqual(list(completed), [0])
+
+        factory = FakeProviderFactory()
+        lines = [json.dumps({"prompt": name}) for name in ["a", "b", "c"]]
+        _, results = run_batch(lines, factory, completed=completed)
+        self.assertEqual(factory.calls, ["b", "c"])
+        # The kept result is written again in its place, the failed one is replaced
+        self.assertEqual([r["index"] for r in results], [0, 1, 2])
+        self.assertEqual([r["response"] for r in results], ["done", "echo b", "echo c"])
+
+    def test_resume_keeps_input_order(self):
+        completed = {1: {"index": 1, "response": "done 1", "error": None},
+                     3: {"index": 3, "response": "done 3", "error": None}}
+        factory = FakeProviderFactory(delays={"a": 0.05})
+        lines = [json.dumps({"prompt": name}) for name in ["a", "b", "c", "d"]]
+        _, results = run_batch(lines, factory, completed=completed)
+        self.assertEqual([r["index"] for r in results], [0, 1, 2, 3])
+        self.assertEqual(results[3]["response"], "done 3")
+
+        _, results = run_batch(lines, FakeProviderFactory(), completed=completed, in_order=False)
+        self.assertEqual(sorted(r["index"] for r in results), [0, 1, 2, 3])
+
+    def test_prompt_files_read_off_the_event_loop(self):
+        loop_threads = []
+
+        class Preprocessor:
+            def process_prompt(self, prompt):
+                try:
+                    asyncio.get_running_loop()
+                    loop_threads.append(True)
+                except RuntimeError:
+                    loop_threads.append(False)
+                return prompt.upper()
+
+        factory = FakeProviderFactory()
+        items = read_batch_items([json.dumps({"prompt": "a"})], default_model="ollama/model1")
+        output = io.StringIO()
+        asyncio.run(BatchRunner(factory, preprocessor=Preprocessor()).run(items, output))
+        self.assertEqual(factory.calls, ["A"])
+        self.assertEqual(loop_threads, [False])
+
+    def test_invalid_lines(self):
+        with self.assertRaises(ValueError):
+            read_batch_items([json.dumps({"prompt": "a"})])
+        with self.assertRaises(ValueError):
+            read_batch_items([json.dumps({"model": "ollama/m"})])
+
+
+if __name__ == '__main__':
+    unittest.main()
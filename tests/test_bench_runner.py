@@ -0,0 +1,97 @@
+import threading
+import time
+import unittest
+
+from src.batch_runner import BatchItem
+from src.bench_runner import BenchRunner, compare_summaries, format_summary, percentile
+
+
+class FakeBackend:
+    def __init__(self, state):
+        self.state = state
+        self.last_headers_time = None
+        self.last_usage = {}
+
+    def generate(self, prompt, stream=False):
+        with self.state["lock"]:
+            self.state["calls"].append(prompt)
+            self.state["in_flight"] += 1
+            self.state["max_in_flight"] = max(self.state["max_in_flight"], self.state["in_flight"])
+        try:
+            if prompt == "fail":
+                raise RuntimeError("Request error: 500 - boom")
+            time.sleep(0.01)
+            yield "a"
+            time.sleep(0.01)
+            yield "b"
+        finally:
+            with self.state["lock"]:
+                self.state["in_flight"] -= 1
+
+    def chat(self, messages, stream=False):
+        return self.generate(messages[-1]["content"], stream=stream)
+
+
+def new_state():
+    return {"lock": threading.Lock(), "calls": [], "in_flight": 0, "max_in_flight": 0}
+
+
+def items(*prompts):
+    return [BatchItem(i, {"prompt": prompt}, "ollama/model1") for i, prompt in enumerate(prompts)]
+
+
+class TestPercentile(unittest.TestCase):
+    def test_interpolation(self):
+        self.assertIsNone(percentile([], 50))
+        self.assertEqual(percentile([3.0], 99), 3.0)
+        self.assertEqual(percentile([4.0, 1.0, 3.0, 2.0], 50), 2.5)
+        self.assertAlmostEqual(percentile(list(range(101)), 95), 95.0)
+
+
+class TestBenchRunner(unittest.TestCase):
+    def test_fixed_concurrency(self):
+        state = new_state()
+        runner = BenchRunner(lambda: FakeBackend(state), "ollama/model1", concurrency=3)
+        results = runner.run(items("one", "two"), requests=10)
+
+        self.assertEqual(len(state["calls"]), 10)
+        self.assertEqual(state["calls"][:2], ["one", "two"])
+        self.assertLessEqual(state["max_in_flight"], 3)
+        self.assertEqual([r["index"] for r in results["requests"]], list(range(10)))
+        summary = results["summary"]
+        self.assertEqual(summary["errors"], 0)
+        self.assertGreater(summary["time_to_first_token"]["p50"], 0.005)
+        self.assertGreater(summary["latency"]["p99"], summary["time_to_first_token"]["p99"])
+        self.assertIsNotNone(summary["tokens_per_second"]["p95"])
+
+    def test_errors(self):
+        state = new_state()
+        runner = BenchRunner(lambda: FakeBackend(state), "ollama/model1", concurrency=2)
+        summary = runner.run(items("ok", "fail"), requests=4)["summary"]
+        self.assertEqual(summary["errors"], 2)
+        self.assertEqual(summary["error_rate"], 0.5)
+        self.assertIn("errors: 2 (50.0%)", format_summary(summary))
+
+    def test_rate_for_duration(self):
+        state = new_state()
+        runner = BenchRunner(lambda: FakeBackend(state), "ollama/model1", concurrency=4, rate=50)
+        results = runner.run(items("one"), duration=0.2)
+
+        # Requests start every 20ms while the duration lasts
+        self.assertIn(len(results["requests"]), range(9, 12))
+        starts = [r["started"] for r in results["requests"]]
+        self.assertGreaterEqual(starts[-1] - starts[0], 0.15)
+
+    def test_compare(self):
+        state = new_state()
+        runner = BenchRunner(lambda: FakeBackend(state), "ollama/model1")
+        summary = runner.run(items("one"), requests=2)["summary"]
+        slower = {**summary, "latency": {name: value * 2 for name, value in summary["latency"].items()}}
+        comparison = compare_summaries(summary, slower)
+        self.assertIn("Latency p50:", comparison)
+        self.assertIn("-50.0%, better", comparison)
+        self.assertIn("TTFT p50:", comparison)
+
+
+if __name__ == '__main__':
+    unittest.main()
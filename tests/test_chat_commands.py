@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.chat_commands import ChatCommands
+
+
+def complete_all(commands, text, safe=True):
+    matches = []
+    state = 0
+    while (match := commands.custom_file_reference_completer(text, state, safe=safe)) is not None:
+        matches.append(match)
+        state += 1
+    return matches
+
+
+class TestFileReferenceCompleter(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.outside_dir = tempfile.TemporaryDirectory()
+        self.base_dir = os.path.join(self.tmp_dir.name, "base")
+        os.makedirs(os.path.join(self.base_dir, "src", "pkg"))
+        for name in ["setup.py", "src/main.py", "src/model.py", "src/pkg/util.py"]:
+            with open(os.path.join(self.base_dir, name), "w") as f:
+                f.write("")
+        os.symlink(self.outside_dir.name, os.path.join(self.base_dir, "src", "mirror"))
+        os.symlink(os.path.join(self.base_dir, "src", "pkg"), os.path.join(self.base_dir, "src", "modules"))
+        # Sibling directory whose name starts with the base directory name
+        os.makedirs(self.base_dir + "2")
+        self.commands = ChatCommands(base_dir=self.base_dir)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+        self.outside_dir.cleanup()
+
+    def test_matches(self):
+        self.assertEqual(complete_all(self.commands, "@@s"), ["@@setup.py", "@@src/"])
+        self.assertEqual(complete_all(self.commands, "@@src/m"), ["@@src/main.py", "@@src/model.py", "@@src/modules/"])
+        self.assertEqual(complete_all(self.commands, "@@src/pkg/"), ["@@src/pkg/util.py"])
+        self.assertEqual(complete_all(self.commands, "@@missing/"), [])
+        self.assertIsNone(self.commands.custom_file_reference_completer("src", 0))
+
+    def test_unsafe_paths(self):
+        self.assertEqual(complete_all(self.commands, "@@../base2"), [])
+        self.assertEqual(complete_all(self.commands, "@@/etc/pass"), [])
+        # Symlinks leaving the base directory are not offered
+        self.assertNotIn("@@src/mirror/", complete_all(self.commands, "@@src/"))
+        self.assertIn("@@src/mirror/", complete_all(self.commands, "@@src/", safe=False))
+
+    def test_directory_listed_once_per_prefix(self):
+        with patch("src.chat_commands.os.scandir", wraps=os.scandir) as scandir, \
+                patch("src.chat_commands.os.path.realpath", wraps=os.path.realpath) as realpath:
+            complete_all(self.commands, "@@src/")
+            self.assertEqual(scandir.call_count, 1)
+            # The base directory, the listed directory and the two symlinks; not every entry
+            self.assertLessEqual(realpath.call_count, 4)
+
+            # Another prefix in the same directory is served from the directory cache
+            complete_all(self.commands, "@@src/ma")
+            self.assertEqual(scandir.call_count, 1)
+
+    def test_directory_cache_expires(self):
+        complete_all(self.commands, "@@src/")
+        with open(os.path.join(self.base_dir, "src", "new.py"), "w") as f:
+            f.write("")
+        self.assertNotIn("@@src/new.py", complete_all(self.commands, "@@src/n"))
+        with patch("src.chat_commands.COMPLETION_DIR_CACHE_TTL", 0):
+            self.assertIn("@@src/new.py", complete_all(self.commands, "@@src/n"))
+
+
+if __name__ == '__main__':
+    unittest.main()
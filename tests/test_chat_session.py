@@ -0,0 +1,139 @@
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from src.chat_session import ChatSession, SUMMARY_PREFIX
+from src.history_summarizer import HistorySummarizer
+from src.token_estimator import estimate_tokens, estimate_message_tokens
+
+
+class FakeBackend:
+    def __init__(self):
+        self.requests = []
+
+    def chat(self, messages, stream=False):
+        self.requests.append(list(messages))
+        reply = "r" * 36  # 9 + 4 tokens
+        return iter([reply]) if stream else reply
+
+
+USER_MESSAGE = "u" * 36  # 9 + 4 tokens
+
+
+class TestTokenEstimator(unittest.TestCase):
+    def test_estimate(self):
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertEqual(estimate_tokens("abcd"), 1)
+        self.assertEqual(estimate_tokens("abcde"), 2)
+        self.assertEqual(estimate_message_tokens({"role": "user", "content": "abcd"}), 5)
+
+
+class TestChatSession(unittest.TestCase):
+    def test_whole_history_without_budget(self):
+        backend = FakeBackend()
+        session = ChatSession(backend)
+        for _ in range(5):
+            list(session.ask(USER_MESSAGE, stream=True))
+        self.assertEqual(len(backend.requests[-1]), 9)
+        self.assertEqual(len(session.messages), 10)
+
+    def test_window_keeps_system_and_newest_turns(self):
+        backend = FakeBackend()
+        session = ChatSession(backend, system_prompt="Be brief.", token_budget=60)
+        for _ in range(5):
+            session.ask(USER_MESSAGE)
+
+        # system (3 + 4 tokens), the new user message and the newest whole turn fit in 60 tokens
+        last_request = backend.requests[-1]
+        self.assertEqual(last_request[0], {"role": "system", "content": "Be brief."})
+        self.assertEqual([m["role"] for m in last_request], ["system", "user", "assistant", "user"])
+        self.assertEqual(len(session.messages), 11)
+
+    def test_window_starts_on_user_message(self):
+        session = ChatSession(FakeBackend(), token_budget=30)
+        session.messages = [{"role": "user", "content": "u" * 36}, {"role": "assistant", "content": "a" * 36},
+                            {"role": "user", "content": "u" * 80}]
+        self.assertEqual([m["role"] for m in session.window()], ["user"])
+
+    def test_newest_message_always_sent(self):
+        session = ChatSession(FakeBackend(), token_budget=5)
+        session.add_user("x" * 400)
+        self.assertEqual(len(session.window()), 1)
+
+    def test_background_summary(self):
+        backend = FakeBackend()
+        summarizer = MagicMock()
+        release = threading.Event()
+
+        def summarize(previous_summary, messages):
+            release.wait(5)
+            return f"summary of {len(messages)}"
+
+        summarizer.summarize.side_effect = summarize
+        session = ChatSession(backend, token_budget=45, summarizer=summarizer)
+        for _ in range(3):
+            list(session.ask(USER_MESSAGE, stream=True))
+
+        # The summary is still running: the turn is sent without waiting for it
+        list(session.ask(USER_MESSAGE, stream=True))
+        self.assertNotIn("system", [m["role"] for m in backend.requests[-1]])
+
+        release.set()
+        session._summary_thread.join(5)
+        self.assertEqual(session.summary, "summary of 2")
+
+        session.ask(USER_MESSAGE)
+        first = backend.requests[-1][0]
+        self.assertEqual(first["role"], "system")
+        self.assertTrue(first["content"].startswith(SUMMARY_PREFIX))
+        # Summarized turns are not sent again
+        self.assertLessEqual(len(backend.requests[-1]), 5)
+
+    def test_clear_history_discards_summary(self):
+        summarizer = MagicMock()
+        summarizer.summarize.return_value = "old summary"
+        session = ChatSession(FakeBackend(), token_budget=30, summarizer=summarizer)
+        for _ in range(3):
+            session.ask(USER_MESSAGE)
+        session._summary_thread.join(5)
+        self.assertEqual(session.summary, "old summary")
+        session.clear_history()
+        self.assertIsNone(session.summary)
+        self.assertEqual(session.window(), [])
+
+
+class TestCancellation(unittest.TestCase):
+    def test_interrupt_closes_upstream_and_keeps_partial_answer(self):
+        closed = []
+
+        def stream():
+            try:
+                yield "Hello"
+                yield " there"
+            finally:
+                closed.append(True)
+
+        backend = MagicMock()
+        backend.chat.return_value = stream()
+        session = ChatSession(backend)
+        response = session.ask("Hi", stream=True)
+        self.assertEqual(next(response), "Hello")
+        response.close()
+
+        self.assertEqual(closed, [True])
+        self.assertEqual(session.messages[-1], {"role": "assistant", "content": "Hello", "partial": True})
+
+
+class TestHistorySummarizer(unittest.TestCase):
+    def test_summarize(self):
+        backend = MagicMock()
+        backend.chat.return_value = iter(["<think>hmm</think>", "  The user asked about X. "])
+        summary = HistorySummarizer(backend).summarize("Earlier summary", [{"role": "user", "content": "x" * 5000}])
+        self.assertEqual(summary, "The user asked about X.")
+        request = backend.chat.call_args[0][0]
+        self.assertIn("Earlier summary", request[1]["content"])
+        self.assertLess(len(request[1]["content"]), 4200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.context_cache import OllamaContextCache
+
+
+class TestOllamaContextCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = OllamaContextCache(Path(self.tmp_dir.name))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_load_missing_returns_none(self):
+        self.assertIsNone(self.cache.load("http://localhost:11434", "model", "default"))
+
+    def test_save_and_load(self):
+        self.cache.save("http://localhost:11434", "model", "default", [1, 2, 3])
+        self.assertEqual(self.cache.load("http://localhost:11434", "model", "default"), [1, 2, 3])
+
+    def test_entries_are_keyed_by_model_and_name(self):
+        self.cache.save("http://localhost:11434", "model-a", "default", [1])
+        self.cache.save("http://localhost:11434", "model-b", "default", [2])
+        self.cache.save("http://localhost:11434", "model-a", "review", [3])
+        self.assertEqual(self.cache.load("http://localhost:11434", "model-a", "default"), [1])
+        self.assertEqual(self.cache.load("http://localhost:11434", "model-b", "default"), [2])
+        self.assertEqual(self.cache.load("http://localhost:11434", "model-a", "review"), [3])
+
+    def test_clear(self):
+        self.cache.save("http://localhost:11434", "model", "default", [1])
+        self.cache.clear("http://localhost:11434", "model", "default")
+        self.assertIsNone(self.cache.load("http://localhost:11434", "model", "default"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest.mock import patch
+
+from src.daemon_client import DaemonConnection, forward, request
+from src.daemon_server import DaemonServer
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+
+class FakeConfigLoader:
+    def __init__(self, path: Path):
+        self.path = path
+        self.loads = 0
+
+    def config_path(self) -> Path:
+        return self.path
+
+    def load_config(self) -> dict:
+        self.loads += 1
+        return {"providers": {}}
+
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.socket_path = Path(self.tmp_dir.name) / "ocelot-cli" / "daemon.sock"
+        self.config_loader = FakeConfigLoader(Path(self.tmp_dir.name) / "config.yml")
+        self.requests = []
+        self.closed = threading.Event()
+        self.server = DaemonServer(self.config_loader, {"generate": self.generate, "list-models": self.list_models},
+                                   socket_path=self.socket_path)
+        self.server.start()
+        self.thread = threading.Thread(target=self.server._server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server._server.shutdown()
+        self.server.close()
+        self.tmp_dir.cleanup()
+
+    def generate(self, config, provider_factory, args, request):
+        self.requests.append(request)
+        if request["prompt"] == "fail":
+            raise ValueError("Provider 'missing' not found or not configured.")
+        try:
+            for token in ["Hello", " there"] if request["prompt"] != "slow" else ["first"] + ["more"] * 100:
+                yield {"token": token}
+                if request["prompt"] == "slow":
+                    time.sleep(0.05)
+        finally:
+            self.closed.set()
+
+    def list_models(self, config, provider_factory, args, request):
+        yield {"models": ["ollama/model1"], "errors": {"gemini": "timed out"}}
+
+    def forward(self, *argv):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            exit_code = forward(list(argv), socket_path=self.socket_path)
+        return exit_code, output.getvalue()
+
+    def test_generate(self):
+        exit_code, output = self.forward("generate", "--plain", "-m", "ollama/model1", "Hi")
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(output, "Hello there")
+        self.assertEqual(self.requests[0]["prompt"], "Hi")
+        self.assertEqual(self.requests[0]["argv"], ["generate", "--plain", "-m", "ollama/model1", "Hi"])
+
+    def test_error(self):
+        exit_code, _ = self.forward("generate", "--plain", "-m", "missing/model1", "fail")
+        self.assertEqual(exit_code, 1)
+
+    def test_list_models(self):
+        with patch("sys.stderr", new_callable=io.StringIO) as stderr:
+            exit_code, output = self.forward("list-models", "--plain")
+        # A provider that could not be listed fails the command, as it does in-process
+        self.assertEqual(exit_code, 1)
+        self.assertEqual(output, "ollama/model1\n")
+        self.assertIn("Failed to list models of gemini: timed out", stderr.getvalue())
+
+    def test_falls_back(self):
+        self.assertIsNone(forward(["generate", "--stats", "-m", "ollama/model1", "Hi"], socket_path=self.socket_path))
+        self.assertIsNone(forward(["chat", "-m", "ollama/model1"], socket_path=self.socket_path))
+        self.assertIsNone(forward(["generate", "-m", "ollama/model1", "Hi"],
+                                  socket_path=Path(self.tmp_dir.name) / "missing.sock"))
+        with patch.dict(os.environ, {"OCELOT_CLI_NO_DAEMON": "1"}):
+            self.assertIsNone(forward(["generate", "-m", "ollama/model1", "Hi"], socket_path=self.socket_path))
+        with patch("src.daemon_client.DAEMON_PROTOCOL_VERSION", 0):
+            self.assertIsNone(forward(["generate", "-m", "ollama/model1", "Hi"], socket_path=self.socket_path))
+        self.assertEqual(self.requests, [])
+
+    def test_client_disconnect_closes_generation(self):
+        connection = DaemonConnection.open(self.socket_path)
+        connection.send({"command": "run", "argv": ["generate", "-m", "ollama/model1"], "prompt": "slow"})
+        self.assertEqual(connection.receive(), {"token": "first"})
+        connection.close()
+        self.assertTrue(self.closed.wait(timeout=5))
+
+    def test_reloads_changed_config(self):
+        self.forward("generate", "--plain", "-m", "ollama/model1", "Hi")
+        self.assertEqual(self.config_loader.loads, 1)
+        self.config_loader.path.write_text("providers: {}\n")
+        self.forward("generate", "--plain", "-m", "ollama/model1", "Hi")
+        self.forward("generate", "--plain", "-m", "ollama/model1", "Hi")
+        self.assertEqual(self.config_loader.loads, 2)
+
+    def test_status_and_stop(self):
+        self.assertEqual(oct(self.socket_path.parent.stat().st_mode & 0o777), "0o700")
+        status = request("status", socket_path=self.socket_path)
+        self.assertEqual(status["pid"], os.getpid())
+        with self.assertRaises(RuntimeError):
+            DaemonServer(self.config_loader, {}, socket_path=self.socket_path).start()
+
+        self.assertEqual(request("stop", socket_path=self.socket_path), {"exit": 0})
+        self.thread.join(timeout=5)
+        self.assertFalse(self.thread.is_alive())
+
+    def test_forwarded_cli_skips_heavy_imports(self):
+        env = dict(os.environ, XDG_RUNTIME_DIR=self.tmp_dir.name)
+        env.pop("OCELOT_CLI_NO_DAEMON", None)
+        result = subprocess.run([sys.executable, "-X", "importtime", "ocelot_cli.py", "generate", "--plain",
+                                 "-m", "ollama/model1", "Hi"], cwd=ROOT_DIR, env=env, capture_output=True,
+                                text=True, timeout=60)
+        self.assertEqual(result.returncode, 0, result.stderr[-2000:])
+        self.assertEqual(result.stdout, "Hello there")
+        imported = {line.split("|")[-1].strip() for line in result.stderr.splitlines()}
+        for module in ["requests", "yaml", "rich", "src.provider_factory"]:
+            self.assertNotIn(module, imported)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import asyncio
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.gateway_server import GatewayServer
+from src.model_catalog import ModelCatalog
+from src.provider_factory import ProviderFactory
+
+
+class FakeDiscovery:
+    def is_available(self, provider_cfg):
+        return False
+
+
+def _ollama_app(state):
+    async def chat(request):
+        body = await request.json()
+        if body["messages"][-1]["content"] == "fail":
+            return web.Response(status=500, text="Internal Server Error")
+        response = web.StreamResponse()
+        await response.prepare(request)
+        tokens = ["<think>", "hmm", "</think>", "Hello", " there"]
+        if body["messages"][-1]["content"] == "slow":
+            tokens = ["first"] + ["more"] * 100
+        try:
+            for token in tokens:
+                await response.write(json.dumps({"message": {"content": token}}).encode() + b"\n")
+                if body["messages"][-1]["content"] == "slow":
+                    await asyncio.sleep(0.05)
+            await response.write(json.dumps({"message": {"content": ""}, "done": True}).encode() + b"\n")
+        except (ConnectionResetError, asyncio.CancelledError):
+            state["disconnected"].set()
+            raise
+        return response
+
+    async def tags(request):
+        return web.json_response({"models": [{"name": "model1"}]})
+
+    app = web.Application()
+    app.router.add_post("/api/chat", chat)
+    app.router.add_get("/api/tags", tags)
+    return app
+
+
+class TestGatewayServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.state = {"disconnected": asyncio.Event()}
+        self.upstream = TestServer(_ollama_app(self.state))
+        await self.upstream.start_server()
+        base_url = str(self.upstream.make_url("")).rstrip("/")
+        config = {"providers": {"ollama": {"type": "ollama", "base_url": base_url}}}
+        catalog = ModelCatalog(Path(self.tmp_dir.name) / "catalog.json")
+        self.factory = ProviderFactory(config, discovery=FakeDiscovery(), catalog=catalog)
+        self.server = GatewayServer(self.factory, catalog=catalog)
+        self.client = TestClient(TestServer(self.server.create_app()))
+        await self.client.start_server()
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.upstream.close()
+        self.factory.close()
+        self.tmp_dir.cleanup()
+
+    async def post(self, content, stream=False, model="ollama/model1"):
+        return await self.client.post("/v1/chat/completions", json={
+            "model": model, "stream": stream, "messages": [{"role": "user", "content": content}]})
+
+    async def test_stream(self):
+        response = await self.post("Hi", stream=True)
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.headers["Content-Type"], "text/event-stream")
+        events = [line[6:] for line in (await response.text()).splitlines() if line.startswith("data: ")]
+        self.assertEqual(events[-1], "[DONE]")
+        chunks = [json.loads(event) for event in events[:-1]]
+        deltas = [chunk["choices"][0]["delta"] for chunk in chunks]
+        self.assertEqual("".join(delta.get("content", "") for delta in deltas), "Hello there")
+        self.assertEqual("".join(delta.get("reasoning", "") for delta in deltas), "hmm")
+        self.assertEqual(chunks[-1]["choices"][0]["finish_reason"], "stop")
+        self.assertEqual(chunks[0]["model"], "ollama/model1")
+
+    async def test_complete(self):
+        response = await self.post([{"type": "text", "text": "Hi"}])
+        data = await response.json()
+        self.assertEqual(data["object"], "chat.completion")
+        self.assertEqual(data["choices"][0]["message"], {"role": "assistant", "content": "Hello there",
+                                                         "reasoning": "hmm"})
+
+    async def test_many_concurrent_clients(self):
+        async def ask(i):
+            response = await self.post(f"Hi {i}", stream=True)
+            return response.status == 200 and (await response.text()).endswith("data: [DONE]\n\n")
+
+        self.assertTrue(all(await asyncio.gather(*(ask(i) for i in range(200)))))
+
+    async def test_errors(self):
+        response = await self.post("fail", stream=True)
+        self.assertEqual(response.status, 502)
+        self.assertIn("Request error: 500", (await response.json())["error"]["message"])
+
+        response = await self.post("Hi", model="missing/model1")
+        self.assertEqual(response.status, 404)
+
+        response = await self.client.post("/v1/chat/completions", data="{")
+        self.assertEqual(response.status, 400)
+
+    async def test_client_disconnect_closes_upstream(self):
+        response = await self.post("slow", stream=True)
+        await response.content.readline()
+        response.close()
+        await asyncio.wait_for(self.state["disconnected"].wait(), timeout=5)
+
+    async def test_models(self):
+        response = await self.client.get("/v1/models")
+        data = await response.json()
+        self.assertEqual([model["id"] for model in data["data"]], ["ollama/model1"])
+
+    async def test_api_key(self):
+        self.server._api_key = "secret"
+        response = await self.client.get("/v1/models")
+        self.assertEqual(response.status, 401)
+        response = await self.client.get("/v1/models", headers={"Authorization": "Bearer secret"})
+        self.assertEqual(response.status, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
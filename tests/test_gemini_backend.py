@@ -0,0 +1,95 @@
+import json
+import unittest
+from unittest.mock import patch, Mock
+
+from src.gemini_backend import GeminiBackend
+
+
+def _sse_line(parts):
+    return f"data: {json.dumps({'candidates': [{'content': {'parts': parts, 'role': 'model'}}]})}".encode()
+
+
+class TestGeminiBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = GeminiBackend(api_key="test_api_key", model_name="test_model", show_reasoning=True)
+
+    @patch('requests.post')
+    def test_generate_stream_uses_sse_endpoint(self, mock_post):
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.iter_lines.return_value = [
+            _sse_line([{"text": "Hello"}]),
+            b'',
+            _sse_line([{"text": ", world"}]),
+        ]
+        mock_post.return_value = mock_response
+
+        result = list(self.backend.generate("test prompt", stream=True))
+        self.assertEqual(result, ["Hello", ", world"])
+        args, kwargs = mock_post.call_args
+        self.assertTrue(args[0].endswith("/models/test_model:streamGenerateContent?alt=sse"))
+        self.assertTrue(kwargs["stream"])
+
+    @patch('requests.post')
+    def test_chat_stream_yields_thoughts_as_reasoning(self, mock_post):
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.iter_lines.return_value = [
+            _sse_line([{"text": "Let me think", "thought": True}]),
+            _sse_line([{"text": " more", "thought": True}, {"text": "Answer"}]),
+            _sse_line([{"text": " done"}]),
+        ]
+        mock_post.return_value = mock_response
+
+        result = list(self.backend.chat([{"role": "user", "content": "test"}], stream=True))
+        self.assertEqual(result, ["<think>", "Let me think", " more", "</think>\n\n", "Answer", " done"])
+        # Thought summaries are only requested when the provider config opts in
+        self.assertNotIn("generationConfig", mock_post.call_args.kwargs["json"])
+
+        backend = GeminiBackend(api_key="test_api_key", model_name="test_model", show_reasoning=True,
+                                include_thoughts=True)
+        list(backend.chat([{"role": "user", "content": "test"}], stream=True))
+        self.assertEqual(mock_post.call_args.kwargs["json"]["generationConfig"],
+                         {"thinkingConfig": {"includeThoughts": True}})
+
+    @patch('requests.post')
+    def test_chat_stream_hides_reasoning(self, mock_post):
+        backend = GeminiBackend(api_key="test_api_key", model_name="test_model", show_reasoning=False)
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.iter_lines.return_value = [
+            _sse_line([{"text": "hidden", "thought": True}]),
+            _sse_line([{"text": "Answer"}]),
+        ]
+        mock_post.return_value = mock_response
+
+        result = list(backend.chat([{"role": "user", "content": "test"}], stream=True))
+        self.assertEqual(result, ["Answer"])
+        self.assertNotIn("generationConfig", mock_post.call_args.kwargs["json"])
+
+    @patch('requests.post')
+    def test_generate_without_stream_uses_generate_content(self, mock_post):
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"candidates": [{"content": {"parts": [{"text": "All at once"}]}}]}
+        mock_post.return_value = mock_response
+
+        result = list(self.backend.generate("test prompt"))
+        self.assertEqual(result, ["All at once"])
+        self.assertTrue(mock_post.call_args.args[0].endswith(":generateContent"))
+
+    @patch('requests.post')
+    def test_generate_stream_failure(self, mock_post):
+        mock_response = Mock()
+        mock_response.status_code = 400
+        mock_response.text = "Bad Request"
+        mock_post.return_value = mock_response
+
+        with self.assertRaises(RuntimeError) as context:
+            list(self.backend.generate("test prompt", stream=True))
+        self.assertIn("Request error: 400 - Bad Request", str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
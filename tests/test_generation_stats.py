@@ -0,0 +1,150 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from src.chat_commands import ChatCommands
+from src.generation_stats import GenerationStats, StatsBackend
+from src.ollama_backend import OllamaBackend
+from src.openai_compatible_backend import OpenAiCompatibleApiBackend
+from src.openrouter_backend import OpenRouterBackend
+
+
+class FakeBackend:
+    def __init__(self, tokens=None, usage=None):
+        self.tokens = tokens or ["Hello", " there", "!"]
+        self.usage = usage or {}
+        self.last_headers_time = None
+        self.last_usage = {}
+        self.name = "fake"
+
+    def chat(self, messages, stream=False):
+        self.last_headers_time = 0.25
+        for token in self.tokens:
+            yield token
+        self.last_usage = self.usage
+
+
+class TestGenerationStats(unittest.TestCase):
+    def test_timings(self):
+        stats = GenerationStats("ollama/model1")
+        with patch("src.generation_stats.time.perf_counter", side_effect=[1.5, 1.53, 1.6, 2.0]):
+            stats.token_received()
+            stats.token_received()
+            stats.token_received()
+            stats.finish({"completion_tokens": 3})
+
+        self.assertEqual(stats.tokens, 3)
+        self.assertAlmostEqual(stats.time_to_first_token, 1.5 - stats._start)
+        self.assertAlmostEqual(stats.tokens_per_second, 2 / 0.1)
+        self.assertAlmostEqual(stats.max_inter_token_latency, 0.07)
+        self.assertEqual(stats.histogram_dict()["<50ms"], 1)
+        self.assertEqual(stats.histogram_dict()["<100ms"], 1)
+        data = json.loads(stats.to_json())
+        self.assertEqual(data["server"], {"completion_tokens": 3})
+        self.assertTrue(data["completed"])
+
+    def test_no_tokens(self):
+        stats = GenerationStats("ollama/model1")
+        stats.finish()
+        self.assertIsNone(stats.tokens_per_second)
+        self.assertIn("Tokens: 0", stats.format())
+
+
+class TestStatsBackend(unittest.TestCase):
+    def test_records_each_stream(self):
+        backend = StatsBackend(FakeBackend(usage={"completion_tokens": 3}), "fake/model")
+        self.assertEqual("".join(backend.chat([], stream=True)), "Hello there!")
+        list(backend.chat([], stream=True))
+
+        self.assertEqual(len(backend.history), 2)
+        stats = backend.last
+        self.assertEqual(stats.tokens, 3)
+        self.assertEqual(stats.time_to_headers, 0.25)
+        self.assertEqual(stats.server, {"completion_tokens": 3})
+        self.assertEqual(backend.name, "fake")
+
+    def test_interrupted_stream(self):
+        backend = StatsBackend(FakeBackend(), "fake/model")
+        response = backend.chat([], stream=True)
+        next(response)
+        response.close()
+        self.assertFalse(backend.last.completed)
+        self.assertEqual(backend.last.tokens, 1)
+        self.assertIn("(interrupted)", backend.last.format())
+
+
+class TestServerUsage(unittest.TestCase):
+    @patch('requests.post')
+    def test_ollama_eval_counts(self, mock_post):
+        mock_response = MagicMock()
+        mock_response.ok = True
+        mock_response.elapsed = timedelta(milliseconds=120)
+        mock_response.iter_lines.return_value = [
+            b'{"message": {"content": "Hi"}}',
+            b'{"done": true, "prompt_eval_count": 12, "eval_count": 40, "eval_duration": 2000000000}']
+        mock_post.return_value = mock_response
+
+        backend = OllamaBackend(model_name="test_model:latest", base_url="http://localhost:11434")
+        self.assertEqual(list(backend.chat([{"role": "user", "content": "Hi"}], stream=True)), ["Hi"])
+        self.assertEqual(backend.last_headers_time, 0.12)
+        self.assertEqual(backend.last_usage, {"prompt_tokens": 12, "completion_tokens": 40, "eval_seconds": 2.0,
+                                              "tokens_per_second": 20.0})
+
+    @patch('requests.post')
+    def test_openrouter_usage_chunk(self, mock_post):
+        mock_response = MagicMock()
+        mock_response.ok = True
+        mock_response.iter_lines.return_value = [
+            b'data: {"choices": [{"delta": {"content": "Hi"}}]}',
+            b'data: {"choices": [], "usage": {"prompt_tokens": 5, "completion_tokens": 1, "cost": 0.0001}}',
+            b'data: [DONE]']
+        mock_post.return_value = mock_response
+
+        backend = OpenRouterBackend(api_key="key", model_name="test_model")
+        self.assertEqual(list(backend.chat([{"role": "user", "content": "Hi"}], stream=True)), ["Hi"])
+        self.assertEqual(backend.last_usage, {"prompt_tokens": 5, "completion_tokens": 1, "cost": 0.0001})
+        self.assertEqual(mock_post.call_args.kwargs["json"]["stream_options"], {"include_usage": True})
+
+    @patch('requests.post')
+    def test_openai_compatible_usage_is_opt_in(self, mock_post):
+        mock_response = MagicMock()
+        mock_response.ok = True
+        mock_response.iter_lines.return_value = [b'data: {"choices": [{"delta": {"content": "Hi"}}]}', b'data: [DONE]']
+        mock_post.return_value = mock_response
+
+        headers = {"Authorization": "Bearer key"}
+        backend = OpenAiCompatibleApiBackend(api_key="key", base_url="http://localhost:8000/v1", model_name="model",
+                                             extra_headers=headers)
+        list(backend.chat([{"role": "user", "content": "Hi"}], stream=True))
+        self.assertNotIn("stream_options", mock_post.call_args.kwargs["json"])
+
+        backend = OpenAiCompatibleApiBackend(api_key="key", base_url="http://localhost:8000/v1", model_name="model",
+                                             extra_headers=headers, stream_usage=True)
+        list(backend.chat([{"role": "user", "content": "Hi"}], stream=True))
+        self.assertEqual(mock_post.call_args.kwargs["json"]["stream_options"], {"include_usage": True})
+
+
+class TestStatsCommand(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.backend = StatsBackend(FakeBackend(), "fake/model")
+        self.commands = ChatCommands(stats_backend=self.backend)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_save_keeps_file_name_case(self):
+        list(self.backend.chat([], stream=True))
+        path = os.path.join(self.tmp_dir.name, "Stats.json")
+        self.assertTrue(self.commands.process_command(f"/STATS save {path}"))
+        with open(path) as f:
+            data = json.load(f)
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]["model"], "fake/model")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.hedged_backend import HedgedBackend
+from src.http_pool import create_session
+from src.ollama_backend import OllamaBackend
+from src.provider_factory import ProviderFactory
+
+
+class FakeBackend:
+    def __init__(self, tokens, delay=0.0, error=None):
+        self.tokens = tokens
+        self.delay = delay
+        self.error = error
+        self.last_headers_time = None
+        self.last_usage = {}
+        self.requests = 0
+        self.closed = threading.Event()
+
+    def chat(self, messages, stream=False):
+        self.requests += 1
+        if self.error:
+            raise self.error
+        return self._stream()
+
+    def _stream(self):
+        try:
+            # Stands for a server that has not sent the first token yet
+            time.sleep(self.delay)
+            yield from self.tokens
+        finally:
+            self.closed.set()
+
+
+class TestHedgedBackend(unittest.TestCase):
+    def hedged(self, primary, secondary, delay=0.1):
+        return HedgedBackend(primary, secondary, "a/model", "b/model", delay=delay)
+
+    def test_fast_primary_is_not_hedged(self):
+        primary, secondary = FakeBackend(["A"]), FakeBackend(["B"])
+        backend = self.hedged(primary, secondary, delay=5)
+        self.assertEqual(backend.chat([]), "A")
+        self.assertEqual(backend.last_winner, "a/model")
+        self.assertEqual(secondary.requests, 0)
+
+    def test_slow_primary_is_cancelled(self):
+        primary, secondary = FakeBackend(["A"], delay=1), FakeBackend(["B", "C"])
+        backend = self.hedged(primary, secondary)
+        start = time.perf_counter()
+        self.assertEqual(backend.chat([]), "BC")
+        self.assertLess(time.perf_counter() - start, 2)
+        self.assertEqual(backend.last_winner, "b/model")
+        # Its first token arrives after the race: the stream is closed without being read
+        self.assertTrue(primary.closed.wait(timeout=3))
+
+    def test_failed_primary_hands_over_at_once(self):
+        primary = FakeBackend(["A"], error=requests.ConnectionError("refused"))
+        backend = self.hedged(primary, FakeBackend(["B"]), delay=10)
+        start = time.perf_counter()
+        self.assertEqual(backend.chat([]), "B")
+        self.assertLess(time.perf_counter() - start, 2)
+
+    def test_both_failing_raise_the_primary_error(self):
+        primary = FakeBackend(["A"], error=RuntimeError("Request error: 500 - primary"))
+        secondary = FakeBackend(["B"], error=RuntimeError("Request error: 500 - secondary"))
+        with self.assertRaises(RuntimeError) as context:
+            self.hedged(primary, secondary).chat([])
+        self.assertIn("primary", str(context.exception))
+
+
+class _SlowOllamaHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        if self.server.slow == "headers":
+            self.wait_for_client()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        self.wfile.flush()
+        if self.server.slow == "body":
+            self.wait_for_client()
+            return
+        for chunk in [{"message": {"content": self.server.answer}}, {"message": {"content": ""}, "done": True}]:
+            self.wfile.write(json.dumps(chunk).encode() + b"\n")
+
+    def wait_for_client(self):
+        # Returns as soon as the client drops the connection, like a server that stops generating
+        self.connection.settimeout(10)
+        try:
+            if self.rfile.read(1) == b"":
+                self.server.disconnected.set()
+        except OSError:
+            pass
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestHedgedHttp(unittest.TestCase):
+    def setUp(self):
+        self.servers = []
+        self.sessions = []
+
+    def tearDown(self):
+        for session in self.sessions:
+            session.close()
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+    def backend(self, answer, slow=None):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowOllamaHandler)
+        server.answer, server.slow, server.disconnected = answer, slow, threading.Event()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.servers.append(server)
+        self.sessions.append(create_session({}, cancellable=True))
+        return OllamaBackend(model_name="model1:latest", base_url=f"http://127.0.0.1:{server.server_port}",
+                             session=self.sessions[-1])
+
+    def race(self, slow):
+        backend = HedgedBackend(self.backend("slow", slow), self.backend("fast"), "slow/model1", "fast/model1",
+                                delay=0.2)
+        start = time.perf_counter()
+        self.assertEqual(backend.chat([{"role": "user", "content": "Hi"}]), "fast")
+        self.assertLess(time.perf_counter() - start, 5)
+        # The loser was blocked reading its response; its connection is dropped without waiting for the server
+        self.assertTrue(self.servers[0].disconnected.wait(timeout=2))
+
+    def test_loser_is_cancelled_before_headers(self):
+        self.race("headers")
+
+    def test_loser_is_cancelled_while_reading_the_body(self):
+        self.race("body")
+
+    def test_only_hedging_sessions_are_cancellable(self):
+        self.assertIs(type(create_session({}).get_adapter("http://127.0.0.1")), HTTPAdapter)
+        config = {"providers": {"ollama": {"type": "ollama", "base_url": "http://127.0.0.1:1"}}}
+        factory = ProviderFactory(config)
+        self.assertIs(factory.resolve_backend("ollama", "model1")._session,
+                      factory.resolve_backend("ollama", "model2")._session)
+        hedged = factory.resolve_backend("ollama", "model1", cancellable=True)
+        self.assertIsNot(type(hedged._session.get_adapter("http://127.0.0.1")), HTTPAdapter)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+from src.markdown_stream import MarkdownBlockSplitter
+
+
+class TestMarkdownBlockSplitter(unittest.TestCase):
+    def setUp(self):
+        self.splitter = MarkdownBlockSplitter()
+
+    def _feed_chars(self, text):
+        blocks = []
+        for char in text:
+            blocks.extend(self.splitter.feed(char))
+        return blocks
+
+    def test_open_paragraph_stays_pending(self):
+        self.assertEqual(self.splitter.feed("Hello "), [])
+        self.assertEqual(self.splitter.feed("world"), [])
+        self.assertEqual(self.splitter.pending, "Hello world")
+
+    def test_paragraph_finished_by_next_block(self):
+        blocks = self._feed_chars("First paragraph.\n\nSecond")
+        self.assertEqual(blocks, ["First paragraph.\n\n"])
+        self.assertEqual(self.splitter.pending, "Second")
+
+    def test_blank_line_alone_does_not_finish_block(self):
+        blocks = self._feed_chars("First paragraph.\n\n")
+        self.assertEqual(blocks, [])
+        self.assertEqual(self.splitter.pending, "First paragraph.\n\n")
+
+    def test_code_fence_with_blank_lines_is_one_block(self):
+        text = "```python\nx = 1\n\ny = 2\n```\nAfter"
+        blocks = self._feed_chars(text)
+        self.assertEqual(blocks, ["```python\nx = 1\n\ny = 2\n```\n"])
+        self.assertEqual(self.splitter.pending, "After")
+
+    def test_indented_continuation_keeps_list_together(self):
+        text = "- item one\n\n  more of item one\n\n- item two\n\nDone"
+        blocks = self._feed_chars(text)
+        self.assertEqual(blocks, ["- item one\n\n  more of item one\n\n", "- item two\n\n"])
+        self.assertEqual(self.splitter.pending, "Done")
+
+    def test_flush_returns_remaining_text(self):
+        self.splitter.feed("Tail text")
+        self.assertEqual(self.splitter.flush(), "Tail text")
+        self.assertEqual(self.splitter.pending, "")
+
+    def test_blocks_reassemble_original_text(self):
+        text = "# Title\n\nSome text\nmore text\n\n~~~\ncode\n~~~\n\n1. one\n2. two\n\nEnd."
+        blocks = self.splitter.feed(text[:10]) + self.splitter.feed(text[10:])
+        self.assertEqual("".join(blocks) + self.splitter.flush(), text)
+
+
+if __name__ == '__main__':
+    unittest.main()
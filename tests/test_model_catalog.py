@@ -0,0 +1,131 @@
+import argparse
+import os
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from ocelot_cli import collect_models
+from src.model_catalog import ModelCatalog, fetch_models
+from src.provider_factory import ProviderFactory
+
+
+class _FakeBackend:
+    def __init__(self, models=None, delay=0.0, error=None):
+        self._models = models or []
+        self._delay = delay
+        self._error = error
+
+    def list_models(self):
+        time.sleep(self._delay)
+        if self._error:
+            raise self._error
+        return self._models
+
+
+class _FakeProviderFactory:
+    def __init__(self, backends):
+        self._backends = backends
+
+    def resolve_backend(self, provider_name=None, debug=False):
+        return self._backends[provider_name]
+
+    def all_providers(self):
+        return list(self._backends)
+
+
+class TestModelCatalog(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name) / "model_catalog.json"
+        self.catalog = ModelCatalog(self.path, ttl=60)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_empty_catalog(self):
+        self.assertIsNone(self.catalog.models("ollama"))
+        self.assertTrue(self.catalog.is_stale("ollama"))
+
+    def test_update_merges_providers(self):
+        self.catalog.update({"ollama": ["llama:8b"]})
+        self.catalog.update({"gemini": ["gemini-2.5-flash"]})
+        self.assertEqual(self.catalog.models("ollama"), ["llama:8b"])
+        self.assertEqual(self.catalog.models("gemini"), ["gemini-2.5-flash"])
+        self.assertFalse(self.catalog.is_stale("ollama"))
+
+    def test_entries_become_stale(self):
+        catalog = ModelCatalog(self.path, ttl=0)
+        catalog.update({"ollama": ["llama:8b"]})
+        self.assertTrue(catalog.is_stale("ollama"))
+        self.assertEqual(catalog.models("ollama"), ["llama:8b"])
+
+    def test_find_providers(self):
+        self.catalog.update({"ollama": ["llama:8b"], "openrouter": ["llama:8b", "gpt"]})
+        self.assertEqual(self.catalog.find_providers("gpt"), ["openrouter"])
+        self.assertEqual(set(self.catalog.find_providers("llama:8b")), {"ollama", "openrouter"})
+
+    def test_refresh_is_claimed_once(self):
+        self.assertTrue(self.catalog.claim_refresh())
+        self.assertFalse(self.catalog.claim_refresh())
+        self.catalog.finish_refresh()
+        self.assertTrue(self.catalog.claim_refresh())
+        # A marker older than the timeout was left by a refresh that did not finish
+        self.assertTrue(self.catalog.claim_refresh(timeout=0))
+
+    def test_parse_model_name_uses_catalog(self):
+        self.catalog.update({"gemini": ["gemini-2.5-flash"]})
+        config = {"providers": {"ollama": {"type": "ollama"}, "gemini": {"type": "gemini", "api_key": "k"}}}
+        provider_factory = ProviderFactory(config, catalog=self.catalog)
+        self.assertEqual(provider_factory.parse_model_name("gemini-2.5-flash"), ("gemini", "gemini-2.5-flash"))
+        self.assertEqual(provider_factory.parse_model_name("unknown"), ("ollama", "unknown"))
+
+
+class TestFetchModels(unittest.TestCase):
+    def test_providers_are_queried_in_parallel(self):
+        factory = _FakeProviderFactory({name: _FakeBackend([name], delay=0.3) for name in ["a", "b", "c"]})
+        start = time.monotonic()
+        models, errors = fetch_models(factory, ["a", "b", "c"], timeout=5)
+        self.assertLess(time.monotonic() - start, 0.8)
+        self.assertEqual(models, {"a": ["a"], "b": ["b"], "c": ["c"]})
+        self.assertEqual(errors, {})
+
+    def test_slow_and_failing_providers_are_reported(self):
+        factory = _FakeProviderFactory({
+            "fast": _FakeBackend(["m1"]),
+            "slow": _FakeBackend(["m2"], delay=2),
+            "broken": _FakeBackend(error=RuntimeError("Request error: 500")),
+        })
+        start = time.monotonic()
+        models, errors = fetch_models(factory, ["fast", "slow", "broken"], timeout=0.2)
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(models, {"fast": ["m1"]})
+        self.assertIn("no answer within 0.2s", errors["slow"])
+        self.assertIn("Request error: 500", errors["broken"])
+
+
+class TestCachedListing(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        env = patch.dict(os.environ, {"XDG_CACHE_HOME": self.tmp_dir.name})
+        env.start()
+        self.addCleanup(env.stop)
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.factory = _FakeProviderFactory({"a": _FakeBackend(["m1"]), "b": _FakeBackend(["m2"])})
+        self.args = argparse.Namespace(provider_name="all", cached=True, timeout=1, debug=False)
+
+    def test_stale_providers_are_refreshed_by_one_child(self):
+        with patch("src.model_catalog.time.time", return_value=0):
+            ModelCatalog().update({"a": ["m1"], "b": ["m2"]})
+        with patch("subprocess.Popen") as popen:
+            self.assertEqual(collect_models(self.factory, self.args), (["a/m1", "b/m2"], {}))
+            # Listings made while the refresh runs, such as one per TAB, do not start another
+            collect_models(self.factory, self.args)
+        popen.assert_called_once()
+        self.assertEqual(popen.call_args.args[0][-3:], ["--refresh-catalog", "a", "b"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -32,5 +32,40 @@ class TestModelOutput(unittest.TestCase):
         self.output.add_token("<think>This is <nested> thought</nested></think>")
         self.assertEqual(self.output.content(), "")
 
+    def test_add_token_tag_split_across_tokens_hidden(self):
+        self.output.add_token("Answer <thi")
+        self.output.add_token("nk>hidden</th")
+        self.output.add_token("ink>visible")
+        self.assertEqual(self.output.content(), "Answer visible")
+        self.assertEqual(self.output.reasoning(), "hidden")
+
+    def test_add_token_tag_split_across_tokens_shown(self):
+        output = ModelOutput(show_reasoning=True)
+        for char in "<think>idea</think>done":
+            output.add_token(char)
+        self.assertEqual(output.content(), "\\<think\\>idea\\</think\\>done")
+
+    def test_add_token_returns_appended_content(self):
+        self.assertEqual(self.output.add_token("Hi <"), "Hi ")
+        self.assertEqual(self.output.add_token("b>"), "<b>")
+        self.assertEqual(self.output.add_token("<think>x</think>!"), "!")
+
+    def test_content_before_reasoning_is_kept(self):
+        self.output.add_token("Intro <think>pondering")
+        self.assertEqual(self.output.content(), "Intro ")
+        self.assertTrue(self.output.is_reasoning)
+
+    def test_finish_releases_partial_tag(self):
+        self.output.add_token("ends with <thi")
+        self.assertEqual(self.output.content(), "ends with ")
+        self.assertEqual(self.output.finish(), "<thi")
+        self.assertEqual(self.output.content(), "ends with <thi")
+
+    def test_segments_are_append_only(self):
+        self.output.add_token("a<think>b</think>c")
+        self.output.add_token("d")
+        self.assertEqual(self.output.content_segments, ["a", "c", "d"])
+        self.assertEqual(self.output.reasoning_segments, ["b"])
+
 if __name__ == '__main__':
     unittest.main()
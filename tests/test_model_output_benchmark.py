@@ -0,0 +1,50 @@
+import os
+import time
+import unittest
+
+from src.model_output import ModelOutput
+
+TOKENS = ["Some ", "streamed ", "text ", "<thi", "nk>", "a thought", "</think>", "\n"]
+
+
+def stream(token_count: int) -> ModelOutput:
+    output = ModelOutput(show_reasoning=False)
+    for i in range(token_count):
+        output.add_token(TOKENS[i % len(TOKENS)])
+    output.finish()
+    return output
+
+
+class TestModelOutputBenchmark(unittest.TestCase):
+    """
+    Per-token cost of ModelOutput.add_token must not grow with the length of the output.
+    """
+
+    def test_long_stream_is_split(self):
+        rounds = 10_000
+        output = stream(rounds * len(TOKENS))
+        self.assertEqual(output.content(), "Some streamed text \n" * rounds)
+        self.assertEqual(output.reasoning(), "a thought" * rounds)
+        # Segments are appended per token, never merged back into one string
+        self.assertEqual(len(output.content_segments), 4 * rounds)
+
+    @staticmethod
+    def _time_per_token(token_count: int, repeats: int = 3) -> float:
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            stream(token_count)
+            best = min(best, (time.perf_counter() - start) / token_count)
+        return best
+
+    @unittest.skipUnless(os.getenv("OCELOT_CLI_BENCHMARK"), "timing benchmark, set OCELOT_CLI_BENCHMARK=1 to run")
+    def test_time_per_token_is_flat(self):
+        small = self._time_per_token(1_000, repeats=20)
+        large = self._time_per_token(100_000)
+        # A quadratic rescan makes the 100k run about a hundred times slower per token; noise stays well below 5x
+        self.assertLess(large, small * 5,
+                        f"per-token time grew from {small * 1e6:.2f}us (1k) to {large * 1e6:.2f}us (100k)")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,222 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import aiohttp
+import requests
+
+from src.base_llm_backend import RequestError
+from src.model_router import RoutedBackend, RouterStats, RouteTarget, is_failover_error, parse_alias
+from src.provider_factory import ProviderFactory
+
+
+class FakeBackend:
+    def __init__(self, tokens=None, error=None, error_after_first=False):
+        self.tokens = tokens or ["Hello", " there"]
+        self.error = error
+        self.error_after_first = error_after_first
+        self.last_headers_time = 0.1
+        self.last_usage = {"completion_tokens": 2}
+        self.closed = False
+        self.requests = 0
+
+    def chat(self, messages, stream=False):
+        self.requests += 1
+        if self.error and not self.error_after_first:
+            raise self.error
+        return self._stream()
+
+    def _stream(self):
+        try:
+            yield self.tokens[0]
+            if self.error:
+                raise self.error
+            yield from self.tokens[1:]
+        finally:
+            self.closed = True
+
+
+class TestRouterStats(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name) / "router_stats.json"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_moving_averages_are_saved(self):
+        stats = RouterStats(self.path, alpha=0.5)
+        stats.record("ollama/model1", 1.0)
+        stats.record("ollama/model1", 3.0)
+        stats.record("ollama/model1", None)
+        # Kept in memory until the save interval has passed or the stats are closed
+        self.assertFalse(self.path.exists())
+        stats.close()
+
+        entry = RouterStats(self.path).get("ollama/model1")
+        self.assertEqual(entry["ttft"], 2.0)
+        self.assertEqual(entry["error_rate"], 0.5)
+
+    def test_saves_on_interval_and_keeps_other_processes_entries(self):
+        other = RouterStats(self.path, save_interval=0)
+        other.record("openrouter/x", 1.0)
+        stats = RouterStats(self.path, save_interval=0)
+        other.record("openrouter/y", 2.0)
+        stats.record("ollama/model1", 0.5)
+        stats.close()
+        other.close()
+
+        saved = RouterStats(self.path)
+        self.assertEqual({name for name in ["openrouter/x", "openrouter/y", "ollama/model1"] if saved.get(name)},
+                         {"openrouter/x", "openrouter/y", "ollama/model1"})
+
+    def test_old_entries_are_forgotten(self):
+        stats = RouterStats(self.path)
+        stats.record("ollama/model1", None)
+        stats.close()
+        stats = RouterStats(self.path, ttl=0)
+        self.assertIsNone(stats.get("ollama/model1"))
+        self.assertIsNone(stats.expected_wait("ollama/model1"))
+
+    def test_failover_errors(self):
+        self.assertTrue(is_failover_error(RequestError(503, "Service Unavailable")))
+        self.assertTrue(is_failover_error(RequestError(429, "Too Many Requests")))
+        self.assertFalse(is_failover_error(RequestError(401, "Unauthorized")))
+        self.assertTrue(is_failover_error(requests.exceptions.ChunkedEncodingError("cut")))
+        self.assertFalse(is_failover_error(RuntimeError("Request error: 503 - not from a backend")))
+        self.assertTrue(is_failover_error(aiohttp.ServerDisconnectedError()))
+
+
+class TestRoutedBackend(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.stats = RouterStats(Path(self.tmp_dir.name) / "router_stats.json")
+        self.backends = {"a/model": FakeBackend(["A"]), "b/model": FakeBackend(["B"])}
+        self.targets = [RouteTarget("a", "model", 1), RouteTarget("b", "model", 1)]
+
+    def tearDown(self):
+        self.stats.close()
+        self.tmp_dir.cleanup()
+
+    def routed(self, strategy="ordered"):
+        return RoutedBackend("fast", self.targets, lambda target: self.backends[target.name], strategy=strategy,
+                             stats=self.stats)
+
+    def test_fails_over_before_first_token(self):
+        self.backends["a/model"].error = requests.ConnectionError("refused")
+        backend = self.routed()
+        self.assertEqual(backend.chat([], stream=False), "B")
+        self.assertEqual(backend.last_target, "b/model")
+        self.assertEqual(backend.last_usage, {"completion_tokens": 2})
+        self.assertEqual(self.stats.get("a/model")["error_rate"], 1.0)
+        self.assertEqual(self.stats.get("b/model")["error_rate"], 0.0)
+
+        # The failing target is now tried last
+        self.assertEqual([target.name for target in backend.route()], ["b/model", "a/model"])
+
+    def test_fails_over_on_server_errors_only(self):
+        self.backends["a/model"].error = RequestError(503, "Service Unavailable")
+        self.assertEqual(self.routed().chat([]), "B")
+
+        self.backends["a/model"].error = RequestError(401, "Unauthorized")
+        self.stats.close()
+        self.stats = RouterStats(Path(self.tmp_dir.name) / "other.json")
+        with self.assertRaises(RuntimeError):
+            self.routed().chat([])
+        self.assertEqual(self.backends["b/model"].requests, 1)
+
+    def test_error_after_first_token_is_raised(self):
+        self.backends["a/model"] = FakeBackend(["A", "B"], error=requests.ConnectionError("reset"),
+                                               error_after_first=True)
+        tokens = self.routed().chat([], stream=True)
+        self.assertEqual(next(tokens), "A")
+        with self.assertRaises(requests.ConnectionError):
+            next(tokens)
+        self.assertEqual(self.backends["b/model"].requests, 0)
+
+    def test_all_targets_failing(self):
+        for backend in self.backends.values():
+            backend.error = requests.Timeout("timed out")
+        with self.assertRaises(RuntimeError) as context:
+            self.routed().chat([])
+        self.assertIn("All targets of 'fast' failed", str(context.exception))
+
+    def test_closing_the_stream_closes_the_target(self):
+        tokens = self.routed().chat([], stream=True)
+        next(tokens)
+        tokens.close()
+        self.assertTrue(self.backends["a/model"].closed)
+
+    def test_warm_up_skips_unavailable_targets(self):
+        def resolve(target):
+            if target.name == "a/model":
+                raise ValueError("Provider 'a' not found or not configured.")
+            return self.backends[target.name]
+
+        self.backends["b/model"].warm_up = lambda load: None
+        backend = RoutedBackend("fast", self.targets, resolve, stats=self.stats)
+        backend.warm_up(load=False)
+        self.assertEqual(self.stats.get("a/model")["error_rate"], 1.0)
+        self.assertEqual(backend.chat([]), "B")
+
+    def test_fastest(self):
+        self.stats.record("a/model", 2.0)
+        self.stats.record("b/model", 0.5)
+        self.assertEqual([target.name for target in self.routed("fastest").route()], ["b/model", "a/model"])
+
+    def test_weighted(self):
+        self.targets[0].weight = 3
+        self.stats.record("a/model", 1.0)
+        self.stats.record("b/model", 1.0)
+        with patch("src.model_router.random.choices", side_effect=lambda targets, weights: [targets[0]]) as choices:
+            self.assertEqual(self.routed("weighted").route()[0].name, "a/model")
+        self.assertEqual(choices.call_args.kwargs["weights"], [3.0, 1.0])
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            self.routed("random")
+
+
+class TestAliases(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        env = patch.dict(os.environ, {"XDG_CACHE_HOME": self.tmp_dir.name})
+        env.start()
+        self.addCleanup(env.stop)
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.config = {
+            "providers": {"ollama": {"type": "ollama"}, "openrouter": {"type": "openrouter", "api_key": "key"}},
+            "aliases": {
+                "fast": ["openrouter/meta-llama/llama-3.1-8b", "ollama/llama3.1"],
+                "spread": {"targets": [{"model": "ollama/llama3.1", "weight": 2}, "openrouter/x"]},
+                "loop": ["fast"],
+            },
+        }
+        self.factory = ProviderFactory(self.config)
+        self.addCleanup(self.factory.close)
+
+    def test_parse_alias(self):
+        self.assertEqual(parse_alias("fast", self.config["aliases"]["fast"]),
+                         ("ordered", [("openrouter/meta-llama/llama-3.1-8b", 1.0), ("ollama/llama3.1", 1.0)]))
+        self.assertEqual(parse_alias("spread", self.config["aliases"]["spread"])[0], "weighted")
+        with self.assertRaises(ValueError):
+            parse_alias("bad", {"strategy": "ordered"})
+
+    def test_resolve(self):
+        self.assertEqual(self.factory.parse_model_name("fast"), ("alias", "fast"))
+        backend = self.factory.resolve_backend("alias", "fast")
+        self.assertIsInstance(backend, RoutedBackend)
+        self.assertEqual([target.name for target in backend.route()],
+                         ["openrouter/meta-llama/llama-3.1-8b", "ollama/llama3.1"])
+
+    def test_invalid_aliases(self):
+        with self.assertRaises(ValueError):
+            self.factory.resolve_backend("alias", "loop")
+        with self.assertRaises(ValueError):
+            self.factory.resolve_async_backend("alias", "fast")
+
+
+if __name__ == '__main__':
+    unittest.main()
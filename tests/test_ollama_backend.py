@@ -5,7 +5,7 @@ from src.ollama_backend import OllamaBackend
 class TestOllamaBackend(unittest.TestCase):
 
     def setUp(self):
-        self.backend = OllamaBackend(model_name="test_model", base_url="http://localhost:11434")
+        self.backend = OllamaBackend(model_name="test_model:latest", base_url="http://localhost:11434")
 
     @patch('requests.post')
     def test_generate_success(self, mock_post):
@@ -72,5 +72,115 @@ class TestOllamaBackend(unittest.TestCase):
         result = self.backend.list_models()
         self.assertEqual(result, [])
 
+    @patch('requests.post')
+    def test_generate_sends_keep_alive_per_model(self, mock_post):
+        backend = OllamaBackend(model_name="big:70b", keep_alive="5m", models={"big:70b": {"keep_alive": "1h"}})
+        mock_response = MagicMock()
+        mock_response.ok = True
+        mock_response.iter_lines.return_value = []
+        mock_post.return_value = mock_response
+
+        list(backend.generate("Test prompt", stream=True))
+        self.assertEqual(mock_post.call_args.kwargs["json"]["keep_alive"], "1h")
+
+    @patch('requests.post')
+    def test_generate_records_timings_from_final_chunk(self, mock_post):
+        mock_response = MagicMock()
+        mock_response.ok = True
+        mock_response.iter_lines.return_value = [
+            b'{"response": "Hi"}',
+            b'{"response": "", "done": true, "load_duration": 2000000000, "eval_duration": 500000000}'
+        ]
+        mock_post.return_value = mock_response
+
+        result = list(self.backend.generate("Test prompt", stream=True))
+        self.assertEqual(result, ["Hi"])
+        self.assertEqual(self.backend.last_timings, {"load": 2.0, "eval": 0.5})
+
+    @patch('requests.post')
+    def test_generate_sends_and_captures_context(self, mock_post):
+        mock_response = MagicMock()
+        mock_response.ok = True
+        mock_response.iter_lines.return_value = [b'{"response": "Hi"}', b'{"done": true, "context": [4, 5, 6]}']
+        mock_post.return_value = mock_response
+
+        self.backend.context = [1, 2, 3]
+        list(self.backend.generate("Test prompt", stream=True))
+        self.assertEqual(mock_post.call_args.kwargs["json"]["context"], [1, 2, 3])
+        self.assertEqual(self.backend.last_context, [4, 5, 6])
+
+    @patch('requests.post')
+    def test_cancelled_stream_closes_response(self, mock_post):
+        mock_response = MagicMock()
+        mock_response.ok = True
+        mock_response.iter_lines.return_value = iter([b'{"message": {"content": "Hel"}}',
+                                                      b'{"message": {"content": "lo"}}'])
+        mock_post.return_value = mock_response
+
+        tokens = self.backend.chat([{"role": "user", "content": "Test prompt"}], stream=True)
+        self.assertEqual(next(tokens), "Hel")
+        mock_response.close.assert_not_called()
+        tokens.close()
+        mock_response.close.assert_called_once()
+
+    @patch('requests.get')
+    def test_resolve_model_prefers_running_fallback(self, mock_get):
+        backend = OllamaBackend(model_name="coder", fallbacks={"coder": ["coder:32b", "coder:7b"]})
+        mock_response = MagicMock()
+        mock_response.ok = True
+        mock_response.json.return_value = {"models": [{"name": "coder:7b"}]}
+        mock_get.return_value = mock_response
+
+        self.assertEqual(backend.resolve_model(), "coder:7b")
+        self.assertTrue(mock_get.call_args.args[0].endswith("/api/ps"))
+
+    @patch('requests.get')
+    def test_resolve_model_ambiguous_name_prefers_running_variant(self, mock_get):
+        backend = OllamaBackend(model_name="llama")
+        tags = MagicMock(ok=True)
+        tags.json.return_value = {"models": [{"name": "llama:latest"}, {"name": "llama:70b"}, {"name": "other:1b"}]}
+        ps = MagicMock(ok=True)
+        ps.json.return_value = {"models": [{"name": "llama:70b"}]}
+        mock_get.side_effect = [tags, ps]
+
+        self.assertEqual(backend.resolve_model(), "llama:70b")
+        self.assertEqual(backend.resolve_model(), "llama:70b")
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch('requests.post')
+    @patch('requests.get')
+    def test_model_is_resolved_by_the_first_request(self, mock_get, mock_post):
+        backend = OllamaBackend(model_name="llama")
+        tags = MagicMock(ok=True)
+        tags.json.return_value = {"models": [{"name": "llama:latest"}, {"name": "llama:70b"}]}
+        ps = MagicMock(ok=True)
+        ps.json.return_value = {"models": [{"name": "llama:70b"}]}
+        mock_get.side_effect = [tags, ps]
+        mock_post.return_value = MagicMock(ok=True)
+        mock_post.return_value.iter_lines.return_value = [b'{"message": {"content": "Hi"}, "done": true}']
+
+        mock_get.assert_not_called()
+        for _ in range(2):
+            self.assertEqual(list(backend.chat([{"role": "user", "content": "Hi"}], stream=True)), ["Hi"])
+        self.assertEqual(mock_post.call_args.kwargs["json"]["model"], "llama:70b")
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch('requests.get')
+    def test_resolve_model_tagged_name_is_kept(self, mock_get):
+        backend = OllamaBackend(model_name="llama:8b")
+        self.assertEqual(backend.resolve_model(), "llama:8b")
+        mock_get.assert_not_called()
+
+    @patch('requests.post')
+    def test_warm_up_loads_model_with_keep_alive(self, mock_post):
+        backend = OllamaBackend(model_name="llama:8b", keep_alive=-1)
+        mock_response = MagicMock()
+        mock_response.ok = True
+        mock_response.json.return_value = {"done": True, "load_duration": 1000000000}
+        mock_post.return_value = mock_response
+
+        backend.warm_up()
+        self.assertEqual(mock_post.call_args.kwargs["json"], {"model": "llama:8b", "stream": False, "keep_alive": -1})
+
 if __name__ == '__main__':
     unittest.main()
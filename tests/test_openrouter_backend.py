@@ -142,6 +142,19 @@ class TestOpenRouterBackend(unittest.TestCase):
         result = list(self.backend.generate("test prompt", stream=True))
         self.assertEqual(result, ["test content"])
 
+    @patch('requests.post')
+    def test_cancelled_stream_closes_response(self, mock_post):
+        mock_response = Mock()
+        mock_response.ok = True
+        mock_response.iter_lines.return_value = iter([b'data: {"choices":[{"delta":{"content":"a"}}]}',
+                                                      b'data: {"choices":[{"delta":{"content":"b"}}]}'])
+        mock_post.return_value = mock_response
+
+        tokens = self.backend.generate("test prompt", stream=True)
+        self.assertEqual(next(tokens), "a")
+        tokens.close()
+        mock_response.close.assert_called_once()
+
     @patch('requests.post')
     def test_generate_stream_failure(self, mock_post):
         mock_response = Mock()
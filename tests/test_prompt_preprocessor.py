@@ -0,0 +1,129 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from src.prompt_preprocessor import PromptPreprocessor
+
+
+class TestPromptPreprocessor(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file = Path(self.tmp_dir.name) / "example.txt"
+        self.file.write_text("This is an example file.\n")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_file_reference(self):
+        result = PromptPreprocessor().process_prompt(f"Explain: @@{self.file}")
+        self.assertEqual(result, f"Explain: \n\nFILE: {self.file}\n```\nThis is an example file.\n```\n")
+
+    def test_missing_file_keeps_reference(self):
+        prompt = f"Explain: @@{self.tmp_dir.name}/missing.txt @@{self.tmp_dir.name}/missing/ @@missing/*.py"
+        self.assertEqual(PromptPreprocessor().process_prompt(prompt), prompt)
+
+    def test_repeated_reference_read_once(self):
+        preprocessor = PromptPreprocessor()
+        with patch.object(preprocessor, "_read_text", wraps=preprocessor._read_text) as read_text:
+            result = preprocessor.process_prompt(f"@@{self.file} and again @@{self.file}")
+        self.assertEqual(read_text.call_count, 1)
+        self.assertEqual(result.count("This is an example file."), 2)
+
+    def test_cache_across_prompts(self):
+        preprocessor = PromptPreprocessor()
+        with patch.object(preprocessor, "_read_text", wraps=preprocessor._read_text) as read_text:
+            preprocessor.process_prompt(f"@@{self.file}")
+            preprocessor.process_prompt(f"@@{self.file}")
+            self.assertEqual(read_text.call_count, 1)
+
+            # A changed file is read again
+            self.file.write_text("Changed content, longer.\n")
+            stat = self.file.stat()
+            os.utime(self.file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            result = preprocessor.process_prompt(f"@@{self.file}")
+            self.assertEqual(read_text.call_count, 2)
+        self.assertIn("Changed content, longer.", result)
+
+    def test_large_file_through_mmap(self):
+        self.file.write_bytes("linha ação\r\n".encode("utf-8") * 1000)
+        result = PromptPreprocessor(mmap_threshold=1024).read_file(str(self.file))
+        self.assertEqual(result, "\n".join(["linha ação"] * 1000))
+
+
+class TestMultiFileReferences(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+        os.makedirs(".git")
+        os.makedirs("src/pkg/build")
+        os.makedirs("src/pkg/generated")
+        Path(".gitignore").write_text("*.log\nbuild/\n/src/pkg/generated\n")
+        Path("src/pkg/.gitignore").write_text("secret_*.py\n!secret_ok.py\n")
+        Path("src/main.py").write_text("print('main')\n")
+        Path("src/notes.txt").write_text("notes\n")
+        Path("src/debug.log").write_text("log\n")
+        Path("src/pkg/util.py").write_text("def util(): pass\n")
+        Path("src/pkg/secret_key.py").write_text("KEY = 1\n")
+        Path("src/pkg/secret_ok.py").write_text("OK = 1\n")
+        Path("src/pkg/image.py").write_bytes(b"\x89PNG\x00\x00data")
+        Path("src/pkg/build/out.py").write_text("built\n")
+        Path("src/pkg/generated/gen.py").write_text("generated\n")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+
+    @staticmethod
+    def attached(result):
+        return [line[len("FILE: "):] for line in result.splitlines() if line.startswith("FILE: ")]
+
+    def test_glob_reference(self):
+        result = PromptPreprocessor().process_prompt("Review @@src/**/*.py please")
+        self.assertEqual(self.attached(result), ["src/main.py", "src/pkg/secret_ok.py", "src/pkg/util.py"])
+        self.assertTrue(result.startswith("Review \n\nFILE: src/main.py\n```\nprint('main')\n```\n"))
+        self.assertTrue(result.endswith(" please"))
+
+    def test_directory_reference(self):
+        result = PromptPreprocessor().process_prompt("@@src/")
+        self.assertEqual(self.attached(result), ["src/main.py", "src/notes.txt", "src/pkg/.gitignore",
+                                                 "src/pkg/secret_ok.py", "src/pkg/util.py"])
+
+    def test_byte_cap(self):
+        preprocessor = PromptPreprocessor(max_bytes=len("print('main')\n") + len("notes\n"))
+        result = preprocessor.process_prompt("@@src/")
+        self.assertEqual(self.attached(result), ["src/main.py", "src/notes.txt"])
+        # Files past the cap are not read, so a binary one among them counts as omitted
+        self.assertIn("[4 more files of src/ omitted", result)
+        self.assertNotIn("binary", result)
+
+    def test_binary_files_do_not_use_the_cap(self):
+        os.makedirs("assets")
+        Path("assets/a_model.bin").write_bytes(b"\x00" * 4)
+        Path("assets/b.txt").write_text("bee\n")
+        Path("assets/c.txt").write_text("sea\n")
+        result = PromptPreprocessor(max_bytes=len("bee\n") + len("sea\n")).process_prompt("@@assets/")
+        self.assertEqual(self.attached(result), ["assets/b.txt", "assets/c.txt"])
+        self.assertNotIn("omitted", result)
+        self.assertIn("[1 binary files of assets/ skipped]", result)
+
+    def test_file_name_with_glob_characters(self):
+        Path("src/notes[1].md").write_text("first\n")
+        Path("src/what?.txt").write_text("why\n")
+        result = PromptPreprocessor().process_prompt("@@src/notes[1].md @@src/what?.txt")
+        self.assertEqual(self.attached(result), ["src/notes[1].md", "src/what?.txt"])
+        # Without such a file, the same characters make a glob
+        self.assertEqual(self.attached(PromptPreprocessor().process_prompt("@@src/[mn]*")),
+                         ["src/main.py", "src/notes.txt", "src/notes[1].md"])
+
+    def test_files_are_read_once_across_references(self):
+        preprocessor = PromptPreprocessor()
+        with patch.object(preprocessor, "_read_text", wraps=preprocessor._read_text) as read_text:
+            preprocessor.process_prompt("@@src/*.py @@src/main.py")
+        self.assertEqual(read_text.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+import requests
+
+from src.config import ConfigLoader
+from src.provider_discovery import ProviderDiscovery
+from src.provider_factory import ProviderFactory
+
+OLLAMA_CFG = {"type": "ollama", "base_url": "http://localhost:11434"}
+
+
+class TestProviderDiscovery(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_file = Path(self.tmp_dir.name) / "discovery.json"
+        self.discovery = ProviderDiscovery(cache_file=self.cache_file, ttl=60)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    @patch('requests.get')
+    def test_probe_result_is_cached_on_disk(self, mock_get):
+        mock_get.return_value = MagicMock(ok=True)
+        self.assertTrue(self.discovery.is_available(OLLAMA_CFG))
+        self.assertTrue(ProviderDiscovery(cache_file=self.cache_file).is_available(OLLAMA_CFG))
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch('requests.get')
+    def test_expired_entry_is_probed_again(self, mock_get):
+        mock_get.side_effect = requests.ConnectionError()
+        discovery = ProviderDiscovery(cache_file=self.cache_file, ttl=0)
+        self.assertFalse(discovery.is_available(OLLAMA_CFG))
+        self.assertFalse(discovery.is_available(OLLAMA_CFG))
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch('requests.get')
+    def test_factory_probes_only_when_provider_is_used(self, mock_get):
+        mock_get.return_value = MagicMock(ok=True)
+        config = {"providers": {"openrouter": {"type": "openrouter", "api_key": "key"}},
+                  "discover": {"ollama": OLLAMA_CFG}}
+        provider_factory = ProviderFactory(config, discovery=self.discovery)
+
+        provider_factory.resolve_backend("openrouter", "model")
+        mock_get.assert_not_called()
+
+        self.assertEqual(provider_factory.all_providers(), ["ollama", "openrouter"])
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch('requests.get')
+    def test_factory_unavailable_provider_not_found(self, mock_get):
+        mock_get.return_value = MagicMock(ok=False)
+        provider_factory = ProviderFactory({"providers": {}, "discover": {"ollama": OLLAMA_CFG}},
+                                           discovery=self.discovery)
+        with self.assertRaises(ValueError) as context:
+            provider_factory.resolve_backend("ollama", "model")
+        self.assertIn("Provider 'ollama' not found or not configured.", str(context.exception))
+
+    @patch('requests.get')
+    def test_config_loader_does_not_probe(self, mock_get):
+        with patch.dict('os.environ', {"XDG_CONFIG_HOME": self.tmp_dir.name}):
+            config = ConfigLoader().load_config()
+        mock_get.assert_not_called()
+        self.assertEqual(config["discover"]["ollama"], OLLAMA_CFG)
+
+
+if __name__ == '__main__':
+    unittest.main()
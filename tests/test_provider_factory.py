@@ -59,6 +59,35 @@ class TestProviderFactory(unittest.TestCase):
             provider_factory.resolve_backend(provider_name="ollama", model_name="test-model")
         self.assertTrue("Provider type 'unsupported-type' not supported." in str(context.exception))
 
+    def test_resolve_backend_reuses_provider_session(self):
+        first = self.provider_factory.resolve_backend(provider_name="ollama", model_name="model-a")
+        second = self.provider_factory.resolve_backend(provider_name="ollama", model_name="model-b")
+        self.assertIs(first._session, second._session)
+
+    def test_resolve_backend_separate_session_per_provider(self):
+        config = {
+            "providers": {
+                "local": {"type": "ollama"},
+                "remote": {"type": "ollama", "base_url": "http://remote:11434"},
+            }
+        }
+        provider_factory = ProviderFactory(config=config)
+        local = provider_factory.resolve_backend(provider_name="local", model_name="test-model")
+        remote = provider_factory.resolve_backend(provider_name="remote", model_name="test-model")
+        self.assertIsNot(local._session, remote._session)
+
+    def test_resolve_backend_http_settings(self):
+        config = {
+            "http": {"pool_size": 4, "connect_timeout": 2, "read_timeout": 60},
+            "providers": {
+                "ollama": {"type": "ollama", "http": {"read_timeout": 30, "keep_alive": False}},
+            }
+        }
+        backend = ProviderFactory(config=config).resolve_backend(provider_name="ollama", model_name="test-model")
+        self.assertEqual(backend._timeout, (2, 30))
+        self.assertEqual(backend._session.headers["Connection"], "close")
+        self.assertEqual(backend._session.get_adapter("http://localhost")._pool_maxsize, 4)
+
     def test_all_providers(self):
         providers = self.provider_factory.all_providers()
         self.assertEqual(set(providers), set(["ollama", "openrouter", "openai"]))
@@ -0,0 +1,104 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from src.response_cache import CachedBackend, ResponseCache, request_key
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name) / "responses.sqlite3"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_get_and_put(self):
+        cache = ResponseCache(self.path)
+        self.assertIsNone(cache.get("key"))
+        cache.put("key", ["Hello", " world"])
+        self.assertEqual(cache.get("key"), ["Hello", " world"])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        cache.close()
+
+        # Entries and totals persist across instances
+        cache = ResponseCache(self.path)
+        self.assertEqual(cache.get("key"), ["Hello", " world"])
+        self.assertEqual(cache.totals(), {"hits": 2, "misses": 1})
+
+    def test_ttl(self):
+        cache = ResponseCache(self.path, ttl=0.05)
+        cache.put("key", ["old"])
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("key"))
+
+    def test_lru_eviction_by_size(self):
+        cache = ResponseCache(self.path, max_size=60)
+        cache.put("a", ["x" * 20])
+        time.sleep(0.01)
+        cache.put("b", ["y" * 20])
+        time.sleep(0.01)
+        cache.get("a")  # "b" becomes the least recently used
+        cache.put("c", ["z" * 20])
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+    def test_request_key(self):
+        messages = [{"role": "user", "content": "Hi"}]
+        key = request_key("ollama", "model1", messages, {"show_reasoning": True})
+        self.assertEqual(key, request_key("ollama", "model1", [dict(m) for m in messages], {"show_reasoning": True}))
+        self.assertNotEqual(key, request_key("openrouter", "model1", messages, {"show_reasoning": True}))
+        self.assertNotEqual(key, request_key("ollama", "model2", messages, {"show_reasoning": True}))
+        self.assertNotEqual(key, request_key("ollama", "model1", messages, {"show_reasoning": False}))
+        self.assertNotEqual(key, request_key("ollama", "model1", [{"role": "user", "content": "Hi!"}],
+                                             {"show_reasoning": True}))
+
+
+class TestCachedBackend(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(Path(self.tmp_dir.name) / "responses.sqlite3")
+        self.backend = MagicMock()
+        self.backend.generate.side_effect = lambda prompt, stream: iter(["<think>hmm</think>", "Hello"])
+        self.backend.chat.side_effect = lambda messages, stream: iter(["Hi", " there"])
+        self.cached = CachedBackend(self.backend, self.cache, "ollama", "model1", params={"show_reasoning": True})
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp_dir.cleanup()
+
+    def test_generate_stream_is_replayed(self):
+        self.assertEqual(list(self.cached.generate("prompt", stream=True)), ["<think>hmm</think>", "Hello"])
+        self.assertEqual(list(self.cached.generate("prompt", stream=True)), ["<think>hmm</think>", "Hello"])
+        self.assertEqual(self.backend.generate.call_count, 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_chat_and_generate_do_not_share_entries(self):
+        list(self.cached.generate("Hi", stream=True))
+        self.assertEqual(list(self.cached.chat([{"role": "user", "content": "Hi"}], stream=True)), ["Hi", " there"])
+        self.assertEqual(self.backend.chat.call_count, 1)
+
+    def test_interrupted_stream_is_not_stored(self):
+        response = self.cached.generate("prompt", stream=True)
+        next(response)
+        response.close()
+        list(self.cached.generate("prompt", stream=True))
+        self.assertEqual(self.backend.generate.call_count, 2)
+
+    def test_non_stream(self):
+        self.assertEqual(self.cached.chat([{"role": "user", "content": "Hi"}]), "Hi there")
+        self.assertEqual(self.cached.chat([{"role": "user", "content": "Hi"}]), "Hi there")
+        self.assertEqual(self.backend.chat.call_count, 1)
+
+    def test_delegates_other_attributes(self):
+        self.backend.base_url = "http://localhost:11434"
+        self.assertEqual(self.cached.base_url, "http://localhost:11434")
+        self.cached.warm_up(load=False)
+        self.backend.warm_up.assert_called_once_with(load=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import json
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from src.chat_session import ChatSession
+from src.session_store import SessionStore
+
+
+class FakeBackend:
+    def __init__(self, tokens=None):
+        self.tokens = tokens or ["Hello", " there"]
+        self.requests = []
+
+    def chat(self, messages, stream=False):
+        self.requests.append(list(messages))
+        return iter(self.tokens) if stream else "".join(self.tokens)
+
+
+class TestSessionStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.directory = Path(self.tmp_dir.name) / "sessions"
+        self.store = SessionStore(self.directory)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def start_session(self, name="work", backend=None):
+        session = ChatSession(backend or FakeBackend())
+        log = self.store.open(name, "ollama/model1")
+        log.replay(session)
+        session.log = log
+        return session
+
+    def read_records(self, name="work"):
+        return [json.loads(line) for line in (self.directory / f"{name}.jsonl").read_text().splitlines()]
+
+    def test_messages_are_appended_as_produced(self):
+        session = self.start_session()
+        response = session.ask("Hi", stream=True)
+        self.assertEqual([r["role"] for r in self.read_records()], ["user"])
+        list(response)
+        self.assertEqual([(r["role"], r["content"]) for r in self.read_records()],
+                         [("user", "Hi"), ("assistant", "Hello there")])
+
+    def test_resume(self):
+        session = self.start_session()
+        session.ask("First")
+        session.ask("Second")
+        session.log.close()
+
+        backend = FakeBackend()
+        resumed = self.start_session(backend=backend)
+        self.assertEqual(resumed.messages, session.messages)
+        resumed.ask("Third")
+        self.assertEqual(len(backend.requests[0]), 5)
+        self.assertEqual(len(self.read_records()), 6)
+
+    def test_partial_answer_on_interrupt(self):
+        session = self.start_session()
+        response = session.ask("Hi", stream=True)
+        next(response)
+        response.close()
+
+        records = self.read_records()
+        self.assertEqual(records[-1]["content"], "Hello")
+        self.assertTrue(records[-1]["partial"])
+        resumed = self.start_session("work")
+        self.assertEqual(resumed.messages[-1], {"role": "assistant", "content": "Hello", "partial": True})
+        # The mark stays out of the request
+        self.assertEqual(resumed.window()[-1], {"role": "assistant", "content": "Hello"})
+
+    def test_attachments_written_once(self):
+        session = self.start_session()
+        for _ in range(2):
+            session.ask("Check" + session.attachments.reference("a.py", "print(1)"))
+        session.log.close()
+
+        records = self.read_records()
+        self.assertEqual([r["type"] for r in records].count("attachment"), 1)
+        resumed = self.start_session()
+        self.assertIn("print(1)", resumed.window()[0]["content"])
+
+    def test_clear_and_truncated_line(self):
+        session = self.start_session()
+        session.ask("Old")
+        session.clear_history()
+        session.ask("New")
+        session.log.close()
+        with (self.directory / "work.jsonl").open("a") as f:
+            f.write('{"type": "message", "ro')
+
+        resumed = self.start_session()
+        self.assertEqual([m["content"] for m in resumed.messages], ["New", "Hello there"])
+        resumed.ask("After crash")
+        resumed.log.close()
+        self.assertEqual(self.read_records_count_valid(), 7)
+
+    def read_records_count_valid(self):
+        valid = 0
+        for line in (self.directory / "work.jsonl").read_text().splitlines():
+            try:
+                json.loads(line)
+                valid += 1
+            except json.JSONDecodeError:
+                pass
+        return valid
+
+    def test_index(self):
+        self.start_session("first").ask("Explain" + "x" * 100)
+        time.sleep(0.01)
+        self.start_session("second").ask("Other")
+        sessions = self.store.list()
+        self.assertEqual([s["name"] for s in sessions], ["second", "first"])
+        self.assertEqual(sessions[1]["messages"], 2)
+        self.assertEqual(sessions[1]["model"], "ollama/model1")
+        self.assertEqual(len(sessions[1]["preview"]), 60)
+
+    def test_invalid_name(self):
+        with self.assertRaises(ValueError):
+            self.store.open("../escape", "ollama/model1")
+
+
+if __name__ == '__main__':
+    unittest.main()
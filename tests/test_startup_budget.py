@@ -0,0 +1,91 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# Total import time allowed for `generate --plain`, measured with `python -X importtime`
+IMPORT_TIME_BUDGET_MS = 250
+
+# Modules that the `generate --plain` path must not import
+FORBIDDEN_MODULES = ["rich", "readline", "aiohttp", "src.chat_commands", "src.gemini_backend",
+                     "src.openai_compatible_backend"]
+
+
+class _OllamaHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = b"".join(json.dumps(chunk).encode() + b"\n"
+                        for chunk in [{"response": "150"}, {"response": "", "done": True}])
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def parse_importtime(stderr: str) -> dict:
+    """
+    Returns {module: self time in microseconds} from `python -X importtime` output.
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(self_us)
+    return modules
+
+
+class TestStartupBudget(unittest.TestCase):
+    def setUp(self):
+        self.server = HTTPServer(("127.0.0.1", 0), _OllamaHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        config_dir = Path(self.tmp_dir.name) / "config" / "ocelot-cli"
+        config_dir.mkdir(parents=True)
+        (config_dir / "config.yml").write_text(
+            f"providers:\n  ollama:\n    type: ollama\n    base_url: http://127.0.0.1:{self.server.server_port}\n")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp_dir.cleanup()
+
+    def _run_generate_plain(self):
+        env = dict(os.environ,
+                   XDG_CONFIG_HOME=str(Path(self.tmp_dir.name) / "config"),
+                   XDG_CACHE_HOME=str(Path(self.tmp_dir.name) / "cache"),
+                   # Keeps a daemon the user may be running out of the measured path
+                   XDG_RUNTIME_DIR=str(Path(self.tmp_dir.name) / "runtime"))
+        return subprocess.run([sys.executable, "-X", "importtime", "ocelot_cli.py", "generate", "--plain",
+                               "-m", "ollama/model:1b", "How much is 75 + 75?"],
+                              cwd=ROOT_DIR, env=env, capture_output=True, text=True, timeout=60)
+
+    def test_generate_plain_import_budget(self):
+        result = self._run_generate_plain()
+        self.assertEqual(result.returncode, 0, result.stderr[-2000:])
+        self.assertIn("150", result.stdout)
+
+        modules = parse_importtime(result.stderr)
+        for forbidden in FORBIDDEN_MODULES:
+            imported = [name for name in modules if name == forbidden or name.startswith(f"{forbidden}.")]
+            self.assertEqual(imported, [], f"generate --plain imported {forbidden}")
+
+        total_ms = sum(modules.values()) / 1000
+        slowest = sorted(modules.items(), key=lambda item: item[1], reverse=True)[:5]
+        self.assertLess(total_ms, IMPORT_TIME_BUDGET_MS,
+                        f"imports took {total_ms:.0f}ms (budget {IMPORT_TIME_BUDGET_MS}ms); slowest: {slowest}")
+
+
+if __name__ == '__main__':
+    unittest.main()